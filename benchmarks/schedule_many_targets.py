@@ -0,0 +1,99 @@
+"""Micro-benchmark for building and scheduling a large workflow.
+
+The workflow consists of many independent chains of targets, each reading the
+output of the previous target in the chain. All files exist and are up to
+date, so every target is checked but nothing is scheduled.
+
+Run it with::
+
+    python benchmarks/schedule_many_targets.py --targets 100000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from gwf.core import Graph, LevelScheduler, Scheduler, Target
+
+
+class UpToDateFilesystem:
+    """A file system in which every file exists and has the same timestamp."""
+
+    def exists(self, path):
+        return True
+
+    def changed_at(self, path):
+        return 0
+
+
+def make_targets(num_targets, chain_length):
+    targets = []
+    for idx in range(num_targets):
+        inputs = []
+        if idx % chain_length:
+            inputs.append("data/output_{}.txt".format(idx - 1))
+        targets.append(
+            Target(
+                name="Target{}".format(idx),
+                inputs=inputs,
+                outputs={"out": "data/output_{}.txt".format(idx)},
+                options={"cores": 1, "memory": "1g"},
+                working_dir="/some/dir",
+            )
+        )
+    return targets
+
+
+def measure(label, func, *args):
+    gc.collect()
+    start = time.perf_counter()
+    result = func(*args)
+    print("{:<40s} {:8.3f}s".format(label, time.perf_counter() - start))
+    return result
+
+
+def schedule_all(graph):
+    scheduler = Scheduler(filesystem=UpToDateFilesystem())
+    return [scheduler.should_schedule(target, graph) for target in graph]
+
+
+def schedule_endpoints(scheduler_cls, graph):
+    scheduler = scheduler_cls(filesystem=UpToDateFilesystem())
+    return scheduler.schedule(list(graph.endpoints()), graph)
+
+
+def flatten_all(graph, rounds):
+    for _ in range(rounds):
+        for target in graph:
+            target.flattened_inputs()
+            target.flattened_outputs()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", type=int, default=100000)
+    parser.add_argument("--chain-length", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    targets = measure("Create targets", make_targets, args.targets, args.chain_length)
+
+    tracemalloc.start()
+    sample = make_targets(10000, args.chain_length)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:<40s} {:8.1f}B".format("Memory per target", size / len(sample)))
+    del sample
+
+    graph = measure("Build graph", Graph.from_targets, targets)
+    measure("Schedule all targets", schedule_all, graph)
+    measure("Schedule endpoints (depth-first)", schedule_endpoints, Scheduler, graph)
+    measure("Schedule endpoints (level)", schedule_endpoints, LevelScheduler, graph)
+    measure(
+        "Flatten paths ({} rounds)".format(args.rounds), flatten_all, graph, args.rounds
+    )
+
+
+if __name__ == "__main__":
+    main()
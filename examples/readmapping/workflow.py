@@ -1,6 +1,6 @@
 """This is an example workflow for read-mapping using bwa and samtools."""
 
-from gwf import Workflow, AnonymousTarget
+from gwf import Workflow, AnonymousTarget, SpecTemplate
 
 gwf = Workflow()
 
@@ -14,9 +14,9 @@ def unzip(inputfile, outputfile):
         'memory': '2g',
     }
 
-    spec = '''
+    spec = SpecTemplate('''
     gzcat {} > {}
-    '''.format(inputfile, outputfile)
+    ''', inputfile, outputfile)
 
     return AnonymousTarget(inputs=inputs, outputs=outputs, options=options, spec=spec)
 
@@ -35,9 +35,9 @@ def bwa_index(ref_genome):
         'memory': '1g',
     }
 
-    spec = """
+    spec = SpecTemplate("""
     bwa index -p {ref_genome} -a bwtsw {ref_genome}.fa
-    """.format(ref_genome=ref_genome)
+    """, ref_genome=ref_genome)
 
     return AnonymousTarget(inputs=inputs, outputs=outputs, options=options, spec=spec)
 
@@ -55,11 +55,11 @@ def bwa_map(ref_genome, r1, r2, bamfile):
         'memory': '1g',
     }
 
-    spec = '''
+    spec = SpecTemplate('''
     bwa mem -t 16 {ref_genome} {r1} {r2} | \
     samtools sort | \
     samtools rmdup -s - {bamfile}
-    '''.format(ref_genome=ref_genome, r1=r1, r2=r2, bamfile=bamfile)
+    ''', ref_genome=ref_genome, r1=r1, r2=r2, bamfile=bamfile)
 
     return AnonymousTarget(inputs=inputs, outputs=outputs, options=options, spec=spec)
 
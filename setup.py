@@ -19,6 +19,7 @@ setup(
     package_dir={"": "src"},
     python_requires=">=3.5",
     install_requires=["click", "click-plugins"],
+    extras_require={"numpy": ["numpy"]},
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Environment :: Console",
@@ -44,6 +45,10 @@ setup(
             "workers = gwf.plugins.workers:workers",
             "cancel = gwf.plugins.cancel:cancel",
             "touch = gwf.plugins.touch:touch",
+            "compile = gwf.plugins.compile:compile",
+            "downstream = gwf.plugins.downstream:downstream",
+            "upstream = gwf.plugins.upstream:upstream",
+            "why = gwf.plugins.why:why",
         ],
         "gwf.backends": [
             "slurm = gwf.backends.slurm:SlurmBackend",
@@ -1,6 +1,6 @@
-from .core import AnonymousTarget, Target
+from .core import AnonymousTarget, SpecTemplate, Target
 from .workflow import TargetList, Workflow
 
 __version__ = "1.7.2"
 
-__all__ = ("Target", "AnonymousTarget", "Workflow", "TargetList")
+__all__ = ("Target", "AnonymousTarget", "SpecTemplate", "Workflow", "TargetList")
@@ -1,10 +1,25 @@
+import collections
+import fractions
+import functools
 import logging
+import math
+import os.path
+import re
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from pkg_resources import iter_entry_points
 
-from ..utils import PersistableDict, retry
-from .exceptions import BackendError, DependencyError, TargetError
+from ..conf import config
+from ..utils import (
+    OptionSet,
+    PersistableDict,
+    ensure_trailing_newline,
+    memoized_method,
+    retry,
+)
+from .exceptions import BackendError, DependencyError, SubmitError, TargetError
 from .logmanager import FileLogManager
+from .utils import rate_controller
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +54,9 @@ class Backend:
     option_defaults = {}
     log_manager = FileLogManager()
 
+    #: Whether :func:`submit` may be called from several threads at once.
+    supports_concurrent_submit = False
+
     @classmethod
     def list(cls):
         """Return the names of all registered backends."""
@@ -89,22 +107,66 @@ class Backend:
         :func:`submit` directly, unless you want to manually deal with with
         injection of option defaults.
         """
+        self._prepare(target)
+        self.submit(target, dependencies)
+
+    def submit_full_many(self, targets, dependencies, workers=1):
+        """Prepare and submit `targets`.
+
+        Like :func:`submit_full`, but for many targets at once, which allows
+        backends to submit them with fewer calls to the workload manager.
+
+        :param list targets:
+            The targets to submit, ordered such that every target comes after
+            the targets in `targets` that it depends on.
+        :param dependencies:
+            A mapping from each target in `targets` to the targets it depends
+            on.
+        :param int workers:
+            Number of threads submitting targets. See :func:`submit_many`.
+        """
+        for target in targets:
+            self._prepare(target)
+        self.submit_many(targets, dependencies, workers=workers)
+
+    def _prepare(self, target):
+        option_set = target.option_set
+        if option_set.is_hashable:
+            new_options, unsupported = self._resolve_options_cached(option_set)
+        else:
+            new_options, unsupported = self._resolve_options(option_set)
+
+        for option_name in unsupported:
+            logger.warning(
+                'Option "{}" used in "{}" is not supported by backend. Ignored.'.format(
+                    option_name, target.name
+                )
+            )
+        target.option_set = new_options
+
+    def _resolve_options(self, option_set):
+        """Return `option_set` resolved against the backend option defaults.
+
+        Returns a tuple of the resolved option set and the names of options
+        not supported by the backend.
+        """
         new_options = dict(self.option_defaults)
-        new_options.update(target.options)
+        new_options.update(option_set)
 
+        unsupported = []
         for option_name, option_value in list(new_options.items()):
             if option_name not in self.option_defaults.keys():
-                logger.warning(
-                    'Option "{}" used in "{}" is not supported by backend. Ignored.'.format(
-                        option_name, target.name
-                    )
-                )
+                unsupported.append(option_name)
                 del new_options[option_name]
             elif option_value is None:
                 del new_options[option_name]
-        target.options = new_options
+        return OptionSet.intern(new_options), tuple(unsupported)
 
-        self.submit(target, dependencies)
+    # Most targets share a few distinct option sets, so each option set is
+    # only resolved once.
+    @memoized_method(maxsize=1024)
+    def _resolve_options_cached(self, option_set):
+        return self._resolve_options(option_set)
 
     def submit(self, target, dependencies):
         """Submit `target` with `dependencies`.
@@ -119,6 +181,71 @@ class Backend:
             and that have already been submitted to the backend.
         """
 
+    def submit_many(self, targets, dependencies, workers=1):
+        """Submit `targets` with `dependencies`.
+
+        By default, each target is submitted with :func:`submit`. Backends
+        which can submit many targets at once should override
+        :func:`_submissions`.
+
+        If `workers` is larger than one and the backend supports concurrent
+        submission, targets are split into levels such that targets only
+        depend on targets in earlier levels, and the targets in each level
+        are submitted by `workers` threads. If submitting some targets fails,
+        the rest of the level is still submitted, as are later targets which
+        do not depend on the failed targets. Then a
+        :class:`~gwf.backends.exceptions.SubmitError` is raised. Targets which
+        were submitted are tracked by the backend as usual.
+
+        :param list targets:
+            The targets to submit, ordered such that every target comes after
+            the targets in `targets` that it depends on.
+        :param dependencies:
+            A mapping from each target in `targets` to the targets it depends
+            on. Dependencies not in `targets` must already have been submitted
+            to the backend.
+        :param int workers:
+            Number of threads submitting targets.
+        """
+        if workers > 1 and self.supports_concurrent_submit:
+            self._submit_levels(targets, dependencies, workers)
+            return
+        for target in targets:
+            self.submit(target, dependencies[target])
+
+    def _submissions(self, targets, dependencies):
+        """Return the submissions needed to submit a level of `targets`.
+
+        Returns a list of tuples `(targets, submit)`, where `submit` is a
+        function submitting `targets` when called.
+        """
+        return [
+            ([target], functools.partial(self.submit, target, dependencies[target]))
+            for target in targets
+        ]
+
+    def _submit_levels(self, targets, dependencies, workers):
+        failed = []
+        skipped = []
+        unsubmitted = set()
+        for level in _levels(targets, dependencies):
+            if unsubmitted:
+                ready = []
+                for target in level:
+                    if unsubmitted.intersection(dependencies[target]):
+                        skipped.append(target)
+                        unsubmitted.add(target)
+                    else:
+                        ready.append(target)
+                level = ready
+
+            submissions = self._submissions(level, dependencies)
+            for submitted, exc in _run_submissions(submissions, workers):
+                failed.extend((target, exc) for target in submitted)
+                unsubmitted.update(submitted)
+        if failed:
+            raise SubmitError(failed, skipped)
+
     def cancel(self, target):
         """Cancel `target`.
 
@@ -152,6 +279,13 @@ class Backend:
             return cls.log_manager.open_stderr(target)
         return cls.log_manager.open_stdout(target)
 
+    def refresh(self):
+        """Update the status of all targets.
+
+        Backends which read the status of targets once, e.g. from the queue
+        of a workload manager, should read it again.
+        """
+
     def close(self):
         """Close the backend.
 
@@ -160,21 +294,226 @@ class Backend:
         """
 
 
+def _levels(targets, dependencies):
+    """Split `targets` into levels.
+
+    Targets only depend on targets in earlier levels, so all targets in a
+    level can be submitted once the earlier levels have been submitted.
+    """
+    level_of = {}
+    levels = []
+    for target in targets:
+        level = 0
+        for dep in dependencies[target]:
+            if dep in level_of:
+                level = max(level, level_of[dep] + 1)
+        level_of[target] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(target)
+    return levels
+
+
+def _run_submissions(submissions, workers):
+    """Run `submissions` and return the failed ones.
+
+    `submissions` is a list of `(targets, submit)` tuples. With a single
+    worker, submissions run one after another and the first exception is
+    raised. Otherwise, they run in a pool of `workers` threads and a list of
+    `(targets, exception)` tuples is returned for the failed submissions.
+    """
+    if workers <= 1:
+        for _, submit in submissions:
+            submit()
+        return []
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (targets, executor.submit(submit)) for targets, submit in submissions
+        ]
+        for targets, future in futures:
+            exc = future.exception()
+            if exc is not None:
+                logger.debug(
+                    "Could not submit %d target(s)", len(targets), exc_info=exc
+                )
+                failed.append((targets, exc))
+    return failed
+
+
+def _parse_walltime(value):
+    """Return a walltime of the form ``[D-]HH:MM:SS`` in seconds.
+
+    Returns `None` if `value` is not of this form.
+    """
+    if not isinstance(value, str):
+        return None
+    days, sep, rest = value.rpartition("-")
+    parts = rest.split(":")
+    if len(parts) != 3:
+        return None
+    try:
+        hours, minutes, seconds = (int(part) for part in parts)
+        days = int(days) if sep else 0
+    except ValueError:
+        return None
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def _format_walltime(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return "{:02d}:{:02d}:{:02d}".format(hours, minutes, seconds)
+
+
+_MEMORY_UNITS = "tgmk"
+
+
+def _scale_memory(value, factor):
+    """Return the memory requirement `value` multiplied by `factor`.
+
+    The result is always a whole number, since neither Slurm nor SGE accept
+    fractional or exponent notation. If the product is not whole, it is given
+    in the next smaller unit, e.g. ``4.5g`` becomes ``4608m``. Products which
+    are not whole in the smallest unit are rounded up.
+
+    Returns `None` if `value` is not a number followed by an optional unit.
+    """
+    match = re.match(r"^(\d+(?:\.\d+)?)([a-zA-Z]*)$", str(value))
+    if match is None:
+        return None
+    number, unit = match.groups()
+    amount = fractions.Fraction(number) * factor
+    while amount.denominator != 1 and unit and unit.lower() in _MEMORY_UNITS[:-1]:
+        smaller = _MEMORY_UNITS[_MEMORY_UNITS.index(unit.lower()) + 1]
+        unit = smaller.upper() if unit.isupper() else smaller
+        amount *= 1024
+    return "{}{}".format(math.ceil(amount), unit)
+
+
+def _common_name(targets):
+    """Return a job name for a job running all of `targets`."""
+    names = [target.name for target in targets]
+    return os.path.commonprefix(names).rstrip("_-.") or names[0]
+
+
+class _Pack:
+    """A pack of targets run in one job.
+
+    The targets are distributed over `parallelism` slots which run in
+    parallel, such that the walltime of the pack is the largest sum of
+    walltimes in a slot.
+    """
+
+    def __init__(self, parallelism):
+        self.slots = []
+        self.loads = []
+        self.parallelism = parallelism
+        self.targets = []
+
+    @property
+    def walltime(self):
+        return max(self.loads)
+
+    def add(self, target, walltime, budget):
+        """Add `target` if the walltime of the pack stays within `budget`."""
+        if len(self.slots) < self.parallelism:
+            # Targets never exceed the budget, so they fit in an empty slot.
+            slot = len(self.slots)
+            self.slots.append([])
+            self.loads.append(0)
+        else:
+            slot = min(range(len(self.loads)), key=self.loads.__getitem__)
+        if self.loads[slot] + walltime > budget:
+            return False
+        self.slots[slot].append(target)
+        self.loads[slot] += walltime
+        self.targets.append(target)
+        return True
+
+
+def _pack(targets, budget, parallelism):
+    """Pack `targets` such that the walltime of each pack is within `budget`.
+
+    Only targets with the same options apart from their walltime are packed
+    together. When packing targets in parallel, targets with a memory
+    requirement which can not be scaled are not packed. Returns a tuple of the
+    packs with more than one target and the targets not packed.
+    """
+    groups = collections.OrderedDict()
+    rest = []
+    for target in targets:
+        walltime = _parse_walltime(target.options.get("walltime"))
+        if walltime is None or walltime > budget or not target.option_set.is_hashable:
+            rest.append(target)
+            continue
+        # The memory of a job running targets in parallel is scaled, which is
+        # only possible if we understand the memory requirement.
+        memory = target.options.get("memory")
+        if parallelism > 1 and memory is not None and not _scale_memory(memory, 1):
+            rest.append(target)
+            continue
+        key = target.option_set.remove("walltime")
+        groups.setdefault(key, []).append((target, walltime))
+
+    packs = []
+    for members in groups.values():
+        pack = _Pack(parallelism)
+        for target, walltime in members:
+            if not pack.add(target, walltime, budget):
+                packs.append(pack)
+                pack = _Pack(parallelism)
+                pack.add(target, walltime, budget)
+        packs.append(pack)
+
+    # Packing a single target only delays it.
+    rest.extend(pack.targets[0] for pack in packs if len(pack.targets) == 1)
+    return [pack for pack in packs if len(pack.targets) > 1], rest
+
+
 class PbsLikeBackendBase(Backend):
-    """PBS-like backend base class."""
+    """PBS-like backend base class.
+
+    If the backend option ``backend.<name>.job_arrays`` is set, targets with
+    the same options which are submitted together are submitted as job
+    arrays, where each task of the array runs one of the targets. Tasks are
+    tracked as ``<array job id><array_task_separator><task index>``.
+
+    If the backend option ``backend.<name>.pack_walltime`` is set to a
+    walltime, targets whose walltime is at most this budget are packed into
+    jobs which run several targets within the budget. Up to
+    ``backend.<name>.pack_parallelism`` targets run at the same time in a
+    packed job. All targets in a packed job are tracked with its job id.
+    """
 
     option_flags = {}
     option_defaults = {}
     log_manager = FileLogManager()
 
+    # Submitting only runs a command and records the job id.
+    supports_concurrent_submit = True
+
+    #: Separator between the job id of an array and the index of a task. The
+    #: backend does not support job arrays if this is `None`.
+    array_task_separator = None
+
+    #: Index of the first task of a job array.
+    array_first_index = 0
+
+    #: Default maximum number of tasks in a job array.
+    max_array_size = 1000
+
+    #: Whether a task of an array can depend on the task with the same index
+    #: in other arrays.
+    supports_corresponding_dependencies = False
+
     def __init__(self):
-        try:
-            self._status = self.parse_queue_output(self.call_queue_command())
-        except retry.RetryError as exc:
-            raise BackendError("Could not get queue state") from exc
+        self.refresh()
 
         class_name = self.__class__.__name__
         backend_name = class_name.strip("Backend").lower()
+        self._name = backend_name
 
         path = ".gwf/{name}-backend-tracked.json".format(name=backend_name)
         self._tracked = PersistableDict(path=path)
@@ -191,9 +530,24 @@ class PbsLikeBackendBase(Backend):
     def call_cancel_command(self):
         raise NotImplementedError("call_cancel_command")
 
+    def call_array_submit_command(self, script, dependencies, indices, corresponding):
+        raise NotImplementedError("call_array_submit_command")
+
     def compile_script(self, target):
         raise NotImplementedError("compile_script")
 
+    def compile_array_script(self, targets, indices):
+        raise NotImplementedError("compile_array_script")
+
+    def compile_packed_script(self, slots, options):
+        raise NotImplementedError("compile_packed_script")
+
+    def refresh(self):
+        try:
+            self._status = self.parse_queue_output(self.call_queue_command())
+        except retry.RetryError as exc:
+            raise BackendError("Could not get queue state") from exc
+
     def status(self, target):
         try:
             return self._get_status(target)
@@ -211,6 +565,260 @@ class PbsLikeBackendBase(Backend):
             job_id = stdout.strip()
             self._add_job(target, job_id)
 
+    def submit_many(self, targets, dependencies, workers=1):
+        try:
+            self._submit_levels(targets, dependencies, workers)
+        finally:
+            # Persist the jobs submitted so far, such that they are known
+            # even if gwf is killed before the backend is closed.
+            self._tracked.persist()
+
+    def _submissions(self, targets, dependencies):
+        submissions = []
+        pack_walltime = self._pack_walltime()
+        if pack_walltime is not None:
+            parallelism = config.get(
+                "backend.{}.pack_parallelism".format(self._name), 1
+            )
+            packs, targets = _pack(targets, pack_walltime, parallelism)
+            for pack in packs:
+                submit = functools.partial(self._submit_pack, pack, dependencies)
+                submissions.append((pack.targets, submit))
+        if self._use_job_arrays():
+            submissions.extend(self._array_submissions(targets, dependencies))
+        else:
+            submissions.extend(super()._submissions(targets, dependencies))
+        return submissions
+
+    def _pack_walltime(self):
+        key = "backend.{}.pack_walltime".format(self._name)
+        value = config.get(key)
+        if value is None:
+            return None
+        seconds = _parse_walltime(value)
+        if seconds is None:
+            raise BackendError(
+                'Invalid value "{}" for key "{}", must be a walltime of the form '
+                "[D-]HH:MM:SS.".format(value, key)
+            )
+        return seconds
+
+    def _submit_pack(self, pack, dependencies):
+        dependency_ids = set()
+        for target in pack.targets:
+            dependency_ids.update(self._collect_dependency_ids(dependencies[target]))
+
+        options = dict(pack.targets[0].options)
+        options["walltime"] = _format_walltime(pack.walltime)
+        slots = len(pack.slots)
+        if slots > 1:
+            options["cores"] = options.get("cores", 1) * slots
+            if "memory" in options:
+                options["memory"] = _scale_memory(options["memory"], slots)
+
+        script = self.compile_packed_script(pack.slots, options)
+        try:
+            stdout = self.call_submit_command(script, sorted(dependency_ids))
+        except retry.RetryError as exc:
+            raise BackendError("Could not submit targets") from exc
+        else:
+            job_id = stdout.strip()
+            for target in pack.targets:
+                self._add_job(target, job_id)
+
+    def _array_submissions(self, targets, dependencies):
+        max_size = config.get(
+            "backend.{}.max_array_size".format(self._name), self.max_array_size
+        )
+        submissions = []
+        for group, indices, dependency_ids, corresponding in self._array_groups(
+            targets, dependencies
+        ):
+            for start in range(0, len(group), max_size):
+                chunk = group[start : start + max_size]
+                if len(chunk) == 1:
+                    submit = functools.partial(
+                        self.submit, chunk[0], dependencies[chunk[0]]
+                    )
+                    submissions.append((chunk, submit))
+                    continue
+                if indices is None:
+                    first = self.array_first_index
+                    chunk_indices = list(range(first, first + len(chunk)))
+                else:
+                    chunk_indices = indices[start : start + max_size]
+                submit = functools.partial(
+                    self._submit_array,
+                    chunk,
+                    chunk_indices,
+                    dependency_ids,
+                    corresponding,
+                )
+                submissions.append((chunk, submit))
+        return submissions
+
+    def _use_job_arrays(self):
+        if self.array_task_separator is None:
+            return False
+        return config.get("backend.{}.job_arrays".format(self._name), False)
+
+    def _array_groups(self, targets, dependencies):
+        """Group `targets` that can be submitted as one job array.
+
+        Targets are grouped if they have the same options and either the
+        same dependencies, or depend on the tasks with the same index in the
+        same arrays. Yields tuples `(targets, indices, dependency_ids,
+        corresponding)`, where `corresponding` is true if each task depends on
+        the tasks with the same index in the arrays in `dependency_ids`. Tasks
+        are numbered consecutively if `indices` is `None`.
+        """
+        groups = collections.OrderedDict()
+        for target in targets:
+            dependency_ids = self._collect_dependency_ids(dependencies[target])
+            shape, index = self._dependency_shape(dependency_ids)
+            if target.option_set.is_hashable:
+                key = (target.option_set, shape)
+            else:
+                key = (id(target), shape)
+            groups.setdefault(key, []).append((target, index))
+
+        for (_, (corresponding, dependency_ids)), members in groups.items():
+            dependency_ids = sorted(dependency_ids)
+            if not corresponding:
+                yield [target for target, _ in members], None, dependency_ids, False
+                continue
+
+            # Two targets depending on the same tasks can not have the same
+            # index, so all but the first are submitted on their own.
+            by_index = collections.OrderedDict()
+            for target, index in sorted(members, key=lambda member: member[1]):
+                if index in by_index:
+                    yield [target], [None], dependency_ids, True
+                else:
+                    by_index[index] = target
+            yield list(by_index.values()), list(by_index), dependency_ids, True
+
+    def _dependency_shape(self, dependency_ids):
+        """Return the dependency shape of a target and its index.
+
+        The shape is a tuple `(corresponding, job_ids)`. If the target
+        depends on exactly one task in each of a set of arrays and all of
+        these tasks have the same index, the target can be submitted as the
+        task with that index in an array depending on the corresponding
+        tasks of the arrays. Otherwise, the index is `None`.
+        """
+        if self.supports_corresponding_dependencies and dependency_ids:
+            arrays = {}
+            for job_id in dependency_ids:
+                array_id, sep, index = job_id.partition(self.array_task_separator)
+                if not sep or array_id in arrays:
+                    break
+                arrays[array_id] = index
+            else:
+                indices = set(arrays.values())
+                if len(indices) == 1:
+                    return (True, frozenset(arrays)), int(indices.pop())
+        return (False, frozenset(self._hold_ids(dependency_ids))), None
+
+    def _hold_ids(self, dependency_ids):
+        """Return the job ids that jobs with `dependency_ids` must wait for."""
+        return dependency_ids
+
+    def _submit_array(self, targets, indices, dependency_ids, corresponding):
+        script = self.compile_array_script(targets, indices)
+        try:
+            stdout = self.call_array_submit_command(
+                script, dependency_ids, indices, corresponding
+            )
+        except retry.RetryError as exc:
+            raise BackendError("Could not submit targets") from exc
+        else:
+            array_id = stdout.strip().split(self.array_task_separator)[0]
+            for target, index in zip(targets, indices):
+                job_id = "{}{}{}".format(array_id, self.array_task_separator, index)
+                self._add_job(target, job_id)
+
+    def _compile_array_tasks(self, targets, indices, task_var, job_id, redirect):
+        """Return script lines running the target selected by `task_var`.
+
+        :param str job_id: Shell expression for the job id of a task.
+        :param redirect:
+            A function returning the output redirection for a target, or
+            `None` if the output of the target should not be redirected.
+        """
+        out = []
+        out.append('case "${}" in'.format(task_var))
+        for target, index in zip(targets, indices):
+            out.append("{})".format(index))
+            # Log paths are relative to the directory the job was submitted
+            # from, so output is redirected before changing directory.
+            redirection = redirect(target)
+            if redirection is not None:
+                out.append("    exec {}".format(redirection))
+            out.append("    cd {}".format(target.working_dir))
+            out.append("    export GWF_JOBID={}".format(job_id))
+            out.append('    export GWF_TARGET_NAME="{}"'.format(target.name))
+            # The spec is passed on its own file descriptor so that commands
+            # reading standard input do not consume the rest of the spec.
+            out.append("    exec /bin/bash -e /dev/fd/3 3<<'GWF_SPEC_EOF'")
+            out.append(ensure_trailing_newline(target.spec) + "GWF_SPEC_EOF")
+            out.append("    ;;")
+        out.append("esac")
+        out.append("")
+        return out
+
+    def _compile_packed_slots(self, slots, job_id, redirect):
+        """Return script lines running the targets in `slots`.
+
+        The slots run in parallel and the targets in a slot run one after
+        another. The exit status of each target is written to its standard
+        error log and the script fails if any target failed.
+
+        :param str job_id: Shell expression for the job id.
+        :param redirect:
+            A function returning the output redirection for a target, or
+            `None` if the output of the target should not be redirected.
+        """
+        out = []
+        out.append("gwf_failed=0")
+        out.append('gwf_pids=""')
+        for slot in slots:
+            out.append("(")
+            out.append("    gwf_failed=0")
+            for target in slot:
+                out.append("    {")
+                out.append("        (")
+                out.append("            cd {} || exit 1".format(target.working_dir))
+                out.append("            export GWF_JOBID={}".format(job_id))
+                out.append(
+                    '            export GWF_TARGET_NAME="{}"'.format(target.name)
+                )
+                # See `_compile_array_tasks` for why the spec is not passed
+                # on standard input.
+                out.append("            exec /bin/bash -e /dev/fd/3 3<<'GWF_SPEC_EOF'")
+                out.append(ensure_trailing_newline(target.spec) + "GWF_SPEC_EOF")
+                out.append("        )")
+                out.append("        gwf_status=$?")
+                out.append(
+                    '        echo "gwf: target {} exited with status '
+                    '$gwf_status" >&2'.format(target.name)
+                )
+                redirection = redirect(target)
+                if redirection is None:
+                    out.append("    }")
+                else:
+                    out.append("    }} {}".format(redirection))
+                out.append('    [ "$gwf_status" -eq 0 ] || gwf_failed=1')
+            out.append('    exit "$gwf_failed"')
+            out.append(") &")
+            out.append('gwf_pids="$gwf_pids $!"')
+        out.append("for gwf_pid in $gwf_pids; do")
+        out.append('    wait "$gwf_pid" || gwf_failed=1')
+        out.append("done")
+        out.append('exit "$gwf_failed"')
+        out.append("")
+        return out
+
     def cancel(self, target):
         try:
             job_id = self.get_job_id(target)
@@ -224,11 +832,14 @@ class PbsLikeBackendBase(Backend):
 
     def close(self):
         self._tracked.persist()
+        if rate_controller.calls:
+            logger.debug(rate_controller.summary())
 
     def forget_job(self, target):
         """Force the backend to forget the job associated with `target`."""
         job_id = self.get_job_id(target)
-        del self._status[job_id]
+        # Packed targets share a job, which may have been forgotten already.
+        self._status.pop(job_id, None)
         del self._tracked[target.name]
 
     def get_job_id(self, target):
@@ -17,6 +17,31 @@ class TargetError(BackendError):
     pass
 
 
+class SubmitError(BackendError):
+    """Raised when some targets could not be submitted.
+
+    :ivar failed:
+        A list of `(target, exception)` tuples for the targets which could not
+        be submitted.
+    :ivar skipped:
+        A list of the targets which were not submitted because they depend on
+        a target which could not be submitted.
+    """
+
+    def __init__(self, failed, skipped=()):
+        self.failed = list(failed)
+        self.skipped = list(skipped)
+        lines = ["Could not submit {} target(s):".format(len(self.failed))]
+        lines.extend("  {}: {}".format(target.name, exc) for target, exc in self.failed)
+        if self.skipped:
+            lines.append(
+                "{} target(s) depending on them were not submitted.".format(
+                    len(self.skipped)
+                )
+            )
+        super().__init__("\n".join(lines))
+
+
 class LogError(BackendError):
     def __init__(self):
         super().__init__("Log not found.")
@@ -12,6 +12,7 @@ from multiprocessing.connection import Listener
 from multiprocessing.pool import Pool
 
 from . import Backend, Status
+from ..checksums import hash_file
 from ..conf import config
 from ..utils import PersistableDict
 from .exceptions import BackendError, DependencyError, UnsupportedOperationError
@@ -132,6 +133,20 @@ class LocalBackend(Backend):
 
     * **local.host (str):** Set the host that the workers are running on (default: localhost).
     * **local.port (int):** Set the port used to connect to the workers (default: 12345).
+    * **local.early_cutoff (bool):** Let the workers skip targets whose inputs
+      were rewritten with identical contents (default: false). See below.
+
+    **Early cutoff:**
+
+    When a target runs again but writes outputs identical to those of its
+    previous run, all of its dependents would normally run again since their
+    inputs are now newer than their outputs. If the workers are started with
+    ``--early-cutoff``, the outputs of each target are compared with the
+    outputs of the previous run before and after running it. If they are
+    identical, dependents which are only out of date because of these outputs
+    are not run. Instead, their outputs are touched such that they are up to
+    date. Comparing the outputs requires reading them twice, so this is only
+    worth it for targets that take longer to run than to read their outputs.
 
     **Target options:**
 
@@ -206,12 +221,17 @@ class LocalBackend(Backend):
 
 
 class Worker:
-    def __init__(self, status, queue, waiting, lock):
+    def __init__(self, status, queue, waiting, lock, unchanged=None):
         self.status = status
         self.queue = queue
         self.waiting = waiting
         self.lock = lock
 
+        # Maps the id of each completed task whose outputs were unchanged to a
+        # dictionary mapping the paths of these outputs to their modification
+        # times before the task ran. `None` if early cutoff is disabled.
+        self.unchanged = unchanged
+
         self.run()
 
     @catch_keyboard_interrupt
@@ -231,9 +251,20 @@ class Worker:
             self.handle_task(task_id, request)
 
     def handle_task(self, task_id, request):
+        if self.unchanged is not None and self.can_skip(request):
+            self.skip_task(task_id, request)
+            self.requeue_dependents(task_id)
+            return
+
         logger.debug("Task %s started target %r", task_id, request.target)
         self.status[task_id] = LocalStatus.RUNNING
 
+        fingerprint = mtimes = None
+        if self.unchanged is not None:
+            fingerprint = self.fingerprint_outputs(request.target)
+            if fingerprint is not None:
+                mtimes = {path: os.stat(path).st_mtime for path in fingerprint}
+
         try:
             self.execute_target(
                 request.target,
@@ -244,11 +275,87 @@ class Worker:
             self.status[task_id] = LocalStatus.FAILED
             logger.error("Task %s failed", task_id, exc_info=True)
         else:
+            if fingerprint is not None and fingerprint == self.fingerprint_outputs(
+                request.target
+            ):
+                logger.info(
+                    "Task %s produced the same outputs as the previous run of %r",
+                    task_id,
+                    request.target,
+                )
+                self.unchanged[task_id] = mtimes
             self.status[task_id] = LocalStatus.COMPLETED
             logger.debug("Task %s completed target %r", task_id, request.target)
         finally:
             self.requeue_dependents(task_id)
 
+    def fingerprint_outputs(self, target):
+        """Return the checksums of the outputs of `target`.
+
+        :return:
+            A dictionary mapping output paths to checksums, or `None` if the
+            target has no outputs or some of them do not exist.
+        """
+        outputs = target.flattened_outputs()
+        if not outputs:
+            return None
+        try:
+            return {path: hash_file(path) for path in outputs}
+        except FileNotFoundError:
+            return None
+
+    def can_skip(self, request):
+        """Check whether a task can be skipped because of early cutoff.
+
+        A task can be skipped if all of its dependencies produced unchanged
+        outputs and all of its outputs exist and are newer than its inputs. The
+        unchanged outputs of dependencies are compared using their
+        modification times from before the dependencies ran, such that a task
+        which was already out of date is not skipped.
+
+        :return: `True` if the task can be skipped, `False` if not."""
+        if not request.deps:
+            return False
+
+        unchanged_mtimes = {}
+        for dep_id in request.deps:
+            mtimes = self.unchanged.get(dep_id)
+            if mtimes is None:
+                return False
+            unchanged_mtimes.update(mtimes)
+
+        target = request.target
+        outputs = target.flattened_outputs()
+        if not outputs:
+            return False
+        try:
+            oldest_output = min(os.stat(path).st_mtime for path in outputs)
+            for path in target.flattened_inputs():
+                mtime = unchanged_mtimes.get(path)
+                if mtime is None:
+                    mtime = os.stat(path).st_mtime
+                if mtime > oldest_output:
+                    return False
+        except FileNotFoundError:
+            return False
+        return True
+
+    def skip_task(self, task_id, request):
+        """Skip a task whose inputs are unchanged.
+
+        The outputs of the target are touched such that the target is up to
+        date and the target is marked as completed with unchanged outputs."""
+        target = request.target
+        logger.info(
+            "Task %s skipped target %r since its inputs are unchanged", task_id, target
+        )
+        mtimes = {}
+        for path in target.flattened_outputs():
+            mtimes[path] = os.stat(path).st_mtime
+            os.utime(path)
+        self.unchanged[task_id] = mtimes
+        self.status[task_id] = LocalStatus.COMPLETED
+
     def check_dependencies(self, task_id, request):
         """Check dependencies before running a task.
 
@@ -322,7 +429,7 @@ class Worker:
 
 
 class Server:
-    def __init__(self, hostname="", port=0, num_workers=None):
+    def __init__(self, hostname="", port=0, num_workers=None, early_cutoff=False):
         self.hostname = hostname
         self.port = port
         self.num_workers = num_workers
@@ -332,6 +439,7 @@ class Server:
         self.queue = self.manager.Queue()
         self.waiting = self.manager.dict()
         self.lock = self.manager.Lock()
+        self.unchanged = self.manager.dict() if early_cutoff else None
 
     def handle_request(self, request):
         try:
@@ -368,7 +476,13 @@ class Server:
             workers = Pool(
                 processes=self.num_workers,
                 initializer=Worker,
-                initargs=(self.status, self.queue, self.waiting, self.lock),
+                initargs=(
+                    self.status,
+                    self.queue,
+                    self.waiting,
+                    self.lock,
+                    self.unchanged,
+                ),
             )
 
             logging.info(
@@ -1,15 +1,25 @@
+import fractions
 import logging
-import re
 from xml.etree import ElementTree
 
 from ..utils import ensure_trailing_newline, retry
-from .base import PbsLikeBackendBase, Status
+from .base import PbsLikeBackendBase, Status, _common_name, _scale_memory
 from .exceptions import BackendError
-from .utils import call
+from .utils import OverloadError, call
 
 logger = logging.getLogger(__name__)
 
 
+def _expand_tasks(tasks):
+    """Expand array task ranges as listed by qstat, e.g. ``1-5:2,8``."""
+    indices = []
+    for part in tasks.split(","):
+        first, _, rest = part.partition("-")
+        last, _, step = rest.partition(":")
+        indices.extend(range(int(first), int(last or first) + 1, int(step or 1)))
+    return indices
+
+
 class SGEBackend(PbsLikeBackendBase):
     """Backend for Sun Grid Engine (SGE).
 
@@ -20,7 +30,22 @@ class SGEBackend(PbsLikeBackendBase):
 
     **Backend options:**
 
-    None.
+    * **backend.sge.job_arrays (bool):** If true, targets with the same
+      options that are submitted together are submitted as job arrays. Tasks
+      of an array wait for all tasks of the arrays they depend on.
+      (default: false).
+    * **backend.sge.max_array_size (int):** Maximum number of tasks in a job
+      array. Must not exceed ``max_aj_tasks`` of the SGE configuration
+      (default: 75000).
+    * **backend.sge.pack_walltime (str):** If set to a walltime of the form
+      ``[D-]HH:MM:SS``, targets with a walltime of at most this budget are
+      packed into jobs which run several of them within the budget. Only
+      targets with the same options apart from their walltime are packed
+      together. Each target writes to its own log files and its exit status
+      is appended to its standard error log. (default: not set).
+    * **backend.sge.pack_parallelism (int):** Number of packed targets run at
+      the same time in a job. The cores and memory requested for the job are
+      multiplied accordingly (default: 1).
 
     **Target options:**
 
@@ -54,25 +79,45 @@ class SGEBackend(PbsLikeBackendBase):
         "account": "-P ",
     }
 
-    @retry(on_exc=BackendError)
+    array_task_separator = "."
+    array_first_index = 1
+    max_array_size = 75000
+
+    @retry(on_exc=BackendError, ignore=OverloadError)
     def call_queue_command(self,):
         return call("qstat", "-f", "-xml")
 
-    @retry(on_exc=BackendError)
+    @retry(on_exc=BackendError, ignore=OverloadError)
     def call_cancel_command(self, job_id):
         # The --verbose flag here is necessary, otherwise we're not able to tell
         # whether the command failed. See the comment in call() if you
         # want to know more.
+        job_id, _, task = job_id.partition(".")
+        if task:
+            return call("qdel", job_id, "-t", task)
         return call("qdel", job_id)
 
-    @retry(on_exc=BackendError)
+    @retry(on_exc=BackendError, ignore=OverloadError)
     def call_submit_command(self, script, dependencies):
         args = ["-terse"]
+        if dependencies:
+            args.append("-hold_jid")
+            args.append(",".join(self._hold_ids(dependencies)))
+        return call("qsub", *args, input=script)
+
+    @retry(on_exc=BackendError, ignore=OverloadError)
+    def call_array_submit_command(self, script, dependencies, indices, corresponding):
+        args = ["-terse", "-t", "{}-{}".format(indices[0], indices[-1])]
         if dependencies:
             args.append("-hold_jid")
             args.append(",".join(dependencies))
         return call("qsub", *args, input=script)
 
+    def _hold_ids(self, dependency_ids):
+        # SGE can not hold a job until a single task of an array has
+        # completed, so jobs wait for the whole array.
+        return sorted(set(job_id.split(".")[0] for job_id in dependency_ids))
+
     def parse_queue_output(self, stdout):
         job_states = {}
         root = ElementTree.fromstring(stdout)
@@ -88,9 +133,28 @@ class SGEBackend(PbsLikeBackendBase):
                 job_state = Status.RUNNING
             else:
                 job_state = Status.SUBMITTED
-            job_states[job_id] = job_state
+
+            tasks = job.find("tasks")
+            if tasks is None:
+                job_states[job_id] = job_state
+            else:
+                for index in _expand_tasks(tasks.text):
+                    job_states["{}.{}".format(job_id, index)] = job_state
         return job_states
 
+    def _compile_options(self, options):
+        option_str = "#$ {0}{1}"
+        out = []
+        for option_name, option_value in options.items():
+            # SGE wants per-core memory, but gwf wants total memory.
+            if option_name == "memory":
+                option_value = (
+                    _scale_memory(option_value, fractions.Fraction(1, options["cores"]))
+                    or option_value
+                )
+            out.append(option_str.format(self.option_flags[option_name], option_value))
+        return out
+
     def compile_script(self, target):
         option_str = "#$ {0}{1}"
 
@@ -103,14 +167,7 @@ class SGEBackend(PbsLikeBackendBase):
         out.append("#$ -w v")
         out.append("#$ -cwd")
 
-        for option_name, option_value in target.options.items():
-            # SGE wants per-core memory, but gwf wants total memory.
-            if option_name == "memory":
-                number = int(re.sub(r"[^0-9]+", "", option_value))
-                unit = re.sub(r"[0-9]+", "", option_value)
-                cores = target.options["cores"]
-                option_value = "{}{}".format(number // cores, unit)
-            out.append(option_str.format(self.option_flags[option_name], option_value))
+        out.extend(self._compile_options(target.options))
 
         out.append(option_str.format("-o ", self.log_manager.stdout_path(target)))
         out.append(option_str.format("-e ", self.log_manager.stderr_path(target)))
@@ -123,3 +180,62 @@ class SGEBackend(PbsLikeBackendBase):
         out.append("")
         out.append(ensure_trailing_newline(target.spec))
         return "\n".join(out)
+
+    def compile_array_script(self, targets, indices):
+        out = []
+        out.append("#!/bin/bash")
+        out.append("# Generated by: gwf")
+
+        out.append("#$ -N {}".format(_common_name(targets)))
+        out.append("#$ -V")
+        out.append("#$ -w v")
+        out.append("#$ -cwd")
+
+        out.extend(self._compile_options(targets[0].options))
+
+        # Each task redirects its output to the log files of its target.
+        out.append("#$ -o /dev/null")
+        out.append("#$ -e /dev/null")
+        out.append("")
+
+        out.extend(
+            self._compile_array_tasks(
+                targets,
+                indices,
+                task_var="SGE_TASK_ID",
+                job_id="${JOB_ID}.${SGE_TASK_ID}",
+                redirect=self._log_redirect,
+            )
+        )
+        return "\n".join(out)
+
+    def compile_packed_script(self, slots, options):
+        targets = [target for slot in slots for target in slot]
+
+        out = []
+        out.append("#!/bin/bash")
+        out.append("# Generated by: gwf")
+
+        out.append("#$ -N {}".format(_common_name(targets)))
+        out.append("#$ -V")
+        out.append("#$ -w v")
+        out.append("#$ -cwd")
+
+        out.extend(self._compile_options(options))
+
+        # Each target redirects its output to its own log files.
+        out.append("#$ -o /dev/null")
+        out.append("#$ -e /dev/null")
+        out.append("")
+
+        out.extend(
+            self._compile_packed_slots(
+                slots, job_id="$JOB_ID", redirect=self._log_redirect
+            )
+        )
+        return "\n".join(out)
+
+    def _log_redirect(self, target):
+        return ">{} 2>{}".format(
+            self.log_manager.stdout_path(target), self.log_manager.stderr_path(target)
+        )
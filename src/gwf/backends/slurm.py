@@ -3,9 +3,9 @@ from collections import defaultdict
 
 from ..conf import config
 from ..utils import ensure_trailing_newline, retry
-from .base import PbsLikeBackendBase, Status
+from .base import PbsLikeBackendBase, Status, _common_name
 from .exceptions import BackendError
-from .utils import call
+from .utils import OverloadError, call
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +23,36 @@ SLURM_JOB_STATES = defaultdict(
 )
 
 
+def _expand_job_ids(job_id):
+    """Expand a job id with a range of array tasks, e.g. ``123_[1-3,7]``."""
+    array_id, sep, tasks = job_id.partition("_[")
+    if not sep:
+        return [job_id]
+    # Strip the closing bracket and the limit on running tasks, e.g. "%4".
+    tasks = tasks.rstrip("]").split("%")[0]
+    job_ids = []
+    for part in tasks.split(","):
+        first, _, rest = part.partition("-")
+        last, _, step = rest.partition(":")
+        for index in range(int(first), int(last or first) + 1, int(step or 1)):
+            job_ids.append("{}_{}".format(array_id, index))
+    return job_ids
+
+
+def _format_indices(indices):
+    """Format array task indices as ranges, e.g. ``0-3,7``."""
+    ranges = []
+    for index in indices:
+        if ranges and ranges[-1][1] == index - 1:
+            ranges[-1][1] = index
+        else:
+            ranges.append([index, index])
+    return ",".join(
+        str(first) if first == last else "{}-{}".format(first, last)
+        for first, last in ranges
+    )
+
+
 class SlurmBackend(PbsLikeBackendBase):
     """Backend for the Slurm workload manager.
 
@@ -35,6 +65,23 @@ class SlurmBackend(PbsLikeBackendBase):
       standard output and one for standard error. If `merged`, only one log
       file will be written containing the combined streams. If `none`, no logs
       will be stored. (default: `full`).
+    * **backend.slurm.job_arrays (bool):** If true, targets with the same
+      options that are submitted together are submitted as job arrays. A
+      target depending on the task with the same index in other arrays is
+      submitted as a task of an array with an ``aftercorr`` dependency on
+      those arrays. (default: false).
+    * **backend.slurm.max_array_size (int):** Maximum number of tasks in a job
+      array. Must not exceed the ``MaxArraySize`` of the Slurm configuration
+      (default: 1000).
+    * **backend.slurm.pack_walltime (str):** If set to a walltime of the form
+      ``[D-]HH:MM:SS``, targets with a walltime of at most this budget are
+      packed into jobs which run several of them within the budget. Only
+      targets with the same options apart from their walltime are packed
+      together. Each target writes to its own log files and its exit status
+      is appended to its standard error log. (default: not set).
+    * **backend.slurm.pack_parallelism (int):** Number of packed targets run
+      at the same time in a job. The cores and memory requested for the job
+      are multiplied accordingly (default: 1).
 
     **Target options:**
 
@@ -95,29 +142,44 @@ class SlurmBackend(PbsLikeBackendBase):
 
     option_str = "#SBATCH {0}{1}"
 
-    @retry(on_exc=BackendError)
+    array_task_separator = "_"
+    supports_corresponding_dependencies = True
+
+    @retry(on_exc=BackendError, ignore=OverloadError)
     def call_queue_command(self):
-        return call("squeue", "--noheader", "--format=%i;%t", "--all")
+        return call("squeue", "--noheader", "--format=%i;%t", "--all", "--array")
 
-    @retry(on_exc=BackendError)
+    @retry(on_exc=BackendError, ignore=OverloadError)
     def call_cancel_command(self, job_id):
         # The --verbose flag here is necessary, otherwise we're not able to tell
         # whether the command failed. See the comment in call() if you
         # want to know more.
         return call("scancel", "--verbose", job_id)
 
-    @retry(on_exc=BackendError)
+    @retry(on_exc=BackendError, ignore=OverloadError)
     def call_submit_command(self, script, dependencies):
         args = ["--parsable"]
         if dependencies:
             args.append("--dependency=afterok:{}".format(":".join(dependencies)))
         return call("sbatch", *args, input=script)
 
+    @retry(on_exc=BackendError, ignore=OverloadError)
+    def call_array_submit_command(self, script, dependencies, indices, corresponding):
+        args = ["--parsable", "--array={}".format(_format_indices(indices))]
+        if dependencies:
+            args.append(
+                "--dependency={}:{}".format(
+                    "aftercorr" if corresponding else "afterok", ":".join(dependencies)
+                )
+            )
+        return call("sbatch", *args, input=script)
+
     def parse_queue_output(self, stdout):
         job_states = {}
         for line in stdout.splitlines():
             job_id, state = line.split(";")
-            job_states[job_id] = SLURM_JOB_STATES[state]
+            for task_id in _expand_job_ids(job_id):
+                job_states[task_id] = SLURM_JOB_STATES[state]
         return job_states
 
     def compile_script(self, target):
@@ -159,3 +221,66 @@ class SlurmBackend(PbsLikeBackendBase):
         out.append("")
         out.append(ensure_trailing_newline(target.spec))
         return "\n".join(out)
+
+    def compile_array_script(self, targets, indices):
+        out = []
+        out.append("#!/bin/bash")
+        out.append("# Generated by: gwf")
+
+        out.append(self.option_str.format("--job-name=", _common_name(targets)))
+
+        for option_name, option_value in targets[0].options.items():
+            out.append(
+                self.option_str.format(self.option_flags[option_name], option_value)
+            )
+
+        # Each task redirects its output to the log files of its target.
+        out.append(self.option_str.format("--output=", "/dev/null"))
+        out.append("")
+
+        out.extend(
+            self._compile_array_tasks(
+                targets,
+                indices,
+                task_var="SLURM_ARRAY_TASK_ID",
+                job_id="${SLURM_ARRAY_JOB_ID}_${SLURM_ARRAY_TASK_ID}",
+                redirect=self._log_redirect,
+            )
+        )
+        return "\n".join(out)
+
+    def compile_packed_script(self, slots, options):
+        targets = [target for slot in slots for target in slot]
+
+        out = []
+        out.append("#!/bin/bash")
+        out.append("# Generated by: gwf")
+
+        out.append(self.option_str.format("--job-name=", _common_name(targets)))
+
+        for option_name, option_value in options.items():
+            out.append(
+                self.option_str.format(self.option_flags[option_name], option_value)
+            )
+
+        # Each target redirects its output to its own log files.
+        out.append(self.option_str.format("--output=", "/dev/null"))
+        out.append("")
+
+        out.extend(
+            self._compile_packed_slots(
+                slots, job_id="$SLURM_JOBID", redirect=self._log_redirect
+            )
+        )
+        return "\n".join(out)
+
+    def _log_redirect(self, target):
+        log_mode = config.get("backend.slurm.log_mode", "full")
+        if log_mode == "full":
+            return ">{} 2>{}".format(
+                self.log_manager.stdout_path(target),
+                self.log_manager.stderr_path(target),
+            )
+        elif log_mode == "merged":
+            return ">{} 2>&1".format(self.log_manager.stdout_path(target))
+        return None
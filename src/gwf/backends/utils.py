@@ -1,8 +1,29 @@
+import itertools
+import logging
 import subprocess
+import threading
+import time
 from distutils.spawn import find_executable
 
 from .exceptions import BackendError
 
+logger = logging.getLogger(__name__)
+
+# Errors printed by Slurm and SGE commands when the controller is overloaded.
+# Calls failing with one of these errors are retried at a lower rate.
+OVERLOAD_ERRORS = (
+    "Socket timed out",
+    "Resource temporarily unavailable",
+    "Unable to contact slurm controller",
+    "Connection refused",
+    "failed receiving gdi request",
+    "unable to contact qmaster",
+)
+
+
+class OverloadError(BackendError):
+    pass
+
 
 def _find_exe(name):
     exe = find_executable(name)
@@ -15,21 +36,166 @@ def _find_exe(name):
     return exe
 
 
-def call(executable_name, *args, input=None):
+class RateController:
+    """Adaptive limit on the rate of calls to the workload manager.
+
+    Calls are spaced such that at most `rate` calls start per second. The
+    rate is adjusted with additive increase and multiplicative decrease
+    (AIMD): each successful call increases the rate by `increase / rate`,
+    i.e. by about `increase` per second, while each call failing because the
+    workload manager is overloaded or taking longer than `target_latency`
+    seconds multiplies the rate by `decrease`. Calls started before the last
+    decrease do not decrease the rate again, such that a burst of concurrent
+    failures only counts once.
+
+    :param float rate: Initial number of calls per second.
+    :param int max_retries:
+        Number of times a call failing because the workload manager is
+        overloaded is retried before giving up.
+    """
+
+    def __init__(
+        self,
+        rate=5.0,
+        min_rate=0.05,
+        max_rate=50.0,
+        increase=1.0,
+        decrease=0.5,
+        target_latency=5.0,
+        max_retries=20,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.calls = 0
+        self.overloads = 0
+        self.latency = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = None
+        self._first = None
+        self._last_decrease = None
+
+    def acquire(self):
+        """Wait until the next call may start and return its start time."""
+        with self._lock:
+            now = self._clock()
+            if self._first is None:
+                self._first = now
+            start = now if self._next is None else max(now, self._next)
+            self._next = start + 1.0 / self.rate
+        if start > now:
+            self._sleep(start - now)
+        return start
+
+    def record(self, started, latency, overloaded=False):
+        """Record a call started at `started` which took `latency` seconds."""
+        with self._lock:
+            self.calls += 1
+            if self.calls == 1:
+                self.latency = latency
+            else:
+                self.latency = 0.8 * self.latency + 0.2 * latency
+            if overloaded:
+                self.overloads += 1
+
+            if overloaded or latency > self.target_latency:
+                if self._last_decrease is not None and started <= self._last_decrease:
+                    return
+                self._last_decrease = self._clock()
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                logger.debug(
+                    "Workload manager is %s, reducing rate to %.2f call(s)/s "
+                    "(latency %.3fs)",
+                    "overloaded" if overloaded else "slow",
+                    self.rate,
+                    latency,
+                )
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+            if self.calls % 100 == 0:
+                logger.debug(self.summary())
+
+    @property
+    def observed_rate(self):
+        """The average number of calls per second since the first call."""
+        if self._first is None:
+            return 0.0
+        elapsed = self._clock() - self._first
+        return self.calls / elapsed if elapsed > 0 else float(self.calls)
+
+    def summary(self):
+        return (
+            "Made {} call(s) to the workload manager at {:.2f} call(s)/s with a "
+            "mean latency of {:.3f}s, {} overloaded, current rate limit {:.2f} "
+            "call(s)/s".format(
+                self.calls,
+                self.observed_rate,
+                self.latency,
+                self.overloads,
+                self.rate,
+            )
+        )
+
+
+#: The rate controller shared by all calls to the workload manager.
+rate_controller = RateController()
+
+
+def _is_overloaded(stderr):
+    return any(error in stderr for error in OVERLOAD_ERRORS)
+
+
+def call(executable_name, *args, input=None, controller=None):
+    """Call the workload manager command `executable_name` with `args`.
+
+    Calls are paced by `controller`, which defaults to
+    :data:`rate_controller`. Calls failing because the workload manager is
+    overloaded are retried at a lower rate.
+
+    :raises OverloadError:
+        If the workload manager is still overloaded after the maximum number
+        of retries.
+    :raises BackendError: If the command fails for another reason.
+    """
+    if controller is None:
+        controller = rate_controller
     executable_path = _find_exe(executable_name)
-    proc = subprocess.Popen(
-        [executable_path] + list(args),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        stdin=subprocess.PIPE,
-        universal_newlines=True,
-    )
-    stdout, stderr = proc.communicate(input)
-
-    # Some commands, like scancel, do not return a non-zero exit code if they
-    # fail. The only way to check if they failed is by checking whether an
-    # error message occurred in standard error, so we check both the return
-    # code and stderr.
-    if proc.returncode != 0 or "error:" in stderr:
-        raise BackendError(stderr)
-    return stdout
+    for attempt in itertools.count():
+        started = controller.acquire()
+        begin = time.monotonic()
+        proc = subprocess.Popen(
+            [executable_path] + list(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        stdout, stderr = proc.communicate(input)
+        latency = time.monotonic() - begin
+
+        # Some commands, like scancel, do not return a non-zero exit code if
+        # they fail. The only way to check if they failed is by checking
+        # whether an error message occurred in standard error, so we check
+        # both the return code and stderr.
+        failed = proc.returncode != 0 or "error:" in stderr
+        overloaded = failed and _is_overloaded(stderr)
+        controller.record(started, latency, overloaded=overloaded)
+        if not failed:
+            return stdout
+        if not overloaded:
+            raise BackendError(stderr)
+        if attempt >= controller.max_retries:
+            raise OverloadError(stderr)
+        logger.debug(
+            "%s failed since the workload manager is overloaded, retrying",
+            executable_name,
+        )
@@ -0,0 +1,156 @@
+"""Content checksums for deciding whether targets are up to date.
+
+By default, a target is scheduled if one of its input files is newer than one
+of its output files. Copying files with e.g. ``rsync`` or restoring them from
+a backup may update the timestamps of files without changing their contents,
+which causes the targets using them and everything downstream to be run again.
+
+In checksum mode, *gwf* records the checksums of the input and output files
+of each target found to be up to date. If the timestamps of a target later
+disagree, the target is still considered up to date if the checksums of its
+files are unchanged.
+
+Computing checksums is expensive, so they are computed in a pool of processes
+and cached together with the size, modification time and inode of each file.
+A file is only hashed again if one of these changes.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import os.path
+from concurrent.futures import ProcessPoolExecutor
+
+from .utils import timer
+
+logger = logging.getLogger(__name__)
+
+CHECKSUMS_PATH = os.path.join(".gwf", "checksums.json")
+
+#: Version of the checksum store format. Bump this whenever the format changes.
+FORMAT_VERSION = 1
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Hashing fewer files than this is not worth starting a process pool for.
+_MIN_FILES_FOR_POOL = 4
+
+
+def hash_file(path):
+    """Return the SHA-256 checksum of the file `path` as a hex string."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fileobj:
+        size = os.fstat(fileobj.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            for offset in range(0, size, _CHUNK_SIZE):
+                digest.update(buf[offset : offset + _CHUNK_SIZE])
+    return digest.hexdigest()
+
+
+class ChecksumStore:
+    """A persistent store of file checksums and target checksum records.
+
+    :param str path: Path of the file in which the store is persisted.
+    :param int max_workers:
+        Number of processes used to hash files. Defaults to the number of
+        processors.
+    """
+
+    def __init__(self, path=CHECKSUMS_PATH, max_workers=None):
+        self.path = path
+        self.max_workers = max_workers
+        self._files = {}
+        self._targets = {}
+        self._changed = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as fileobj:
+                data = json.load(fileobj)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.debug("Checksum store %s is unreadable", self.path, exc_info=True)
+            return
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            logger.debug("Checksum store %s has an unknown format", self.path)
+            return
+        self._files = data["files"]
+        self._targets = data["targets"]
+
+    def _cached(self, path, stat):
+        entry = self._files.get(path)
+        if entry is not None and entry[:3] == [stat.size, stat.mtime_ns, stat.inode]:
+            return entry[3]
+        return None
+
+    def checksums(self, stats):
+        """Return a dictionary of checksums of the files in `stats`.
+
+        `stats` maps paths of existing files to their
+        :class:`~gwf.statcache.FileStat`. Files whose size, modification time
+        and inode are unchanged since they were last hashed are not hashed
+        again. All other files are hashed in parallel.
+        """
+        result = {}
+        to_hash = []
+        for path, stat in stats.items():
+            checksum = self._cached(path, stat)
+            if checksum is None:
+                to_hash.append(path)
+            else:
+                result[path] = checksum
+        if not to_hash:
+            return result
+
+        msg = "Computed checksums of {} file(s) in %.3fms".format(len(to_hash))
+        with timer(msg, logger=logger):
+            if len(to_hash) < _MIN_FILES_FOR_POOL or self.max_workers == 1:
+                checksums = [hash_file(path) for path in to_hash]
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    checksums = list(executor.map(hash_file, to_hash))
+
+        for path, checksum in zip(to_hash, checksums):
+            stat = stats[path]
+            self._files[path] = [stat.size, stat.mtime_ns, stat.inode, checksum]
+            result[path] = checksum
+        self._changed = True
+        return result
+
+    def recorded(self, target_name):
+        """Return the checksums recorded for a target or `None`."""
+        return self._targets.get(target_name)
+
+    def record(self, target_name, checksums):
+        """Record the checksums of the files of an up-to-date target."""
+        if self._targets.get(target_name) != checksums:
+            self._targets[target_name] = checksums
+            self._changed = True
+
+    def save(self):
+        """Write the store to disk if it was changed."""
+        if not self._changed:
+            return
+        tmp_path = self.path + ".new"
+        try:
+            with timer("Stored checksums in %.3fms", logger=logger):
+                with open(tmp_path, "w") as fileobj:
+                    json.dump(
+                        {
+                            "version": FORMAT_VERSION,
+                            "files": self._files,
+                            "targets": self._targets,
+                        },
+                        fileobj,
+                    )
+                os.replace(tmp_path, self.path)
+        except OSError:
+            logger.warning("Could not store checksums", exc_info=True)
+            return
+        self._changed = False
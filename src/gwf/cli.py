@@ -8,6 +8,7 @@ from click_plugins import with_plugins
 from . import __version__
 from .backends import Backend
 from .conf import config
+from .core import SCHEDULERS, CachedFilesystem
 from .exceptions import ConfigurationError
 from .utils import ColorFormatter, ensure_dir, get_latest_version
 
@@ -75,6 +76,71 @@ def validate_check_updates(value):
     return _validate_bool("check_updates", value)
 
 
+@config.validator("graph_cache")
+def validate_graph_cache(value):
+    return _validate_bool("graph_cache", value)
+
+
+def _validate_positive_int(key, value):
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        msg = 'Invalid value "{}" for key "{}", must be a positive integer.'
+        raise ConfigurationError(msg.format(value, key))
+
+
+@config.validator("stat_workers")
+def validate_stat_workers(value):
+    return _validate_positive_int("stat_workers", value)
+
+
+@config.validator("stat_mode")
+def validate_stat_mode(value):
+    return _validate_choice("stat_mode", value, CachedFilesystem.STAT_MODES)
+
+
+@config.validator("stat_cache")
+def validate_stat_cache(value):
+    return _validate_bool("stat_cache", value)
+
+
+@config.validator("staleness")
+def validate_staleness(value):
+    return _validate_choice("staleness", value, ("timestamp", "checksum"))
+
+
+@config.validator("completion_manifest")
+def validate_completion_manifest(value):
+    return _validate_bool("completion_manifest", value)
+
+
+@config.validator("completion_manifest_sample")
+def validate_completion_manifest_sample(value):
+    if (
+        not isinstance(value, (int, float))
+        or isinstance(value, bool)
+        or not 0 <= value <= 1
+    ):
+        msg = (
+            'Invalid value "{}" for key "completion_manifest_sample", must be a '
+            "number between 0 and 1."
+        )
+        raise ConfigurationError(msg.format(value))
+
+
+@config.validator("scheduler")
+def validate_scheduler(value):
+    return _validate_choice("scheduler", value, tuple(SCHEDULERS))
+
+
+@config.validator("submit_workers")
+def validate_submit_workers(value):
+    return _validate_positive_int("submit_workers", value)
+
+
+@config.validator("poll_interval")
+def validate_poll_interval(value):
+    return _validate_positive_int("poll_interval", value)
+
+
 @with_plugins(iter_entry_points("gwf.plugins"))
 @click.group(context_settings={"obj": {}})
 @click.version_option(version=__version__)
@@ -96,8 +162,14 @@ def validate_check_updates(value):
 @click.option(
     "--no-color/--use-color", default=None, help="Enable or disable output colors."
 )
+@click.option(
+    "--rebuild-cache",
+    is_flag=True,
+    default=False,
+    help="Load the workflow and rebuild the cached dependency graph.",
+)
 @click.pass_context
-def main(ctx, file, backend, verbose, no_color):
+def main(ctx, file, backend, verbose, no_color, rebuild_cache):
     """A flexible, pragmatic workflow tool.
 
     See help for each command using the `--help` flag for that command:
@@ -137,4 +209,18 @@ def main(ctx, file, backend, verbose, no_color):
                 msg.format(current_version=__version__, latest_version=latest_version)
             )
 
-    ctx.obj = {"file": file, "backend": backend}
+    ctx.obj = {
+        "file": file,
+        "backend": backend,
+        "graph_cache": config["graph_cache"],
+        "rebuild_cache": rebuild_cache,
+        "stat_workers": config["stat_workers"],
+        "stat_mode": config["stat_mode"],
+        "stat_cache": config["stat_cache"],
+        "staleness": config["staleness"],
+        "completion_manifest": config["completion_manifest"],
+        "completion_manifest_sample": config["completion_manifest_sample"],
+        "scheduler": config["scheduler"],
+        "submit_workers": config["submit_workers"],
+        "poll_interval": config["poll_interval"],
+    }
@@ -1,8 +1,24 @@
 import json
 from collections import ChainMap
 
-
-CONFIG_DEFAULTS = {"verbose": "info", "backend": "local", "check_updates": True}
+from .manifest import DEFAULT_SAMPLE_RATE
+
+
+CONFIG_DEFAULTS = {
+    "verbose": "info",
+    "backend": "local",
+    "check_updates": True,
+    "graph_cache": False,
+    "stat_workers": 16,
+    "stat_mode": "auto",
+    "stat_cache": False,
+    "staleness": "timestamp",
+    "completion_manifest": False,
+    "completion_manifest_sample": DEFAULT_SAMPLE_RATE,
+    "scheduler": "depth-first",
+    "submit_workers": 1,
+    "poll_interval": 60,
+}
 
 
 class FileConfig:
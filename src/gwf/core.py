@@ -1,18 +1,31 @@
 import collections
+import itertools
 import logging
 import os
 import os.path
 import unicodedata
-from collections import defaultdict
-from enum import Enum
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum, IntEnum
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from .backends import Status
 from .compat import fspath
 from .exceptions import NameError, WorkflowError
-from .utils import cache, is_valid_name, timer
+from .checksums import ChecksumStore
+from .manifest import DEFAULT_SAMPLE_RATE, CompletionManifest
+from .statcache import StatCache, file_stat
+from .utils import OptionSet, is_valid_name, memoized_method, timer
 
 logger = logging.getLogger(__name__)
 
+# Type code used for arrays of target and path identifiers.
+_INDEX_TYPECODE = "i"
+
 
 def _flatten(t):
     res = []
@@ -81,6 +94,53 @@ class TargetStatus(Enum):
     COMPLETED = 3  #: The target has completed and should not run.
 
 
+class SpecTemplate:
+    """A spec that is rendered when it is needed.
+
+    Rendering a full spec string for each target with :meth:`str.format`
+    keeps a string per target in memory, even though the spec is only needed
+    when the target is submitted or inspected. Instead, a template can return
+    a spec template holding a format string and its arguments::
+
+        def bwa_index(ref_genome):
+            spec = SpecTemplate(
+                "bwa index -p {ref_genome} -a bwtsw {ref_genome}.fa",
+                ref_genome=ref_genome,
+            )
+            return AnonymousTarget(inputs=..., outputs=..., options={}, spec=spec)
+
+    The format string is shared by all targets created by the template. The
+    spec is rendered with ``template.format(*args, **kwargs)`` each time the
+    :attr:`~AnonymousTarget.spec` of the target is accessed.
+    """
+
+    __slots__ = ("template", "args", "kwargs")
+
+    def __init__(self, template, *args, **kwargs):
+        if not isinstance(template, str):
+            raise TypeError(
+                "Spec template must be a string, not {}.".format(type(template))
+            )
+        self.template = template
+        self.args = args
+        self.kwargs = kwargs
+
+    def render(self):
+        """Return the rendered spec."""
+        return self.template.format(*self.args, **self.kwargs)
+
+    def __getstate__(self):
+        return (self.template, self.args, self.kwargs)
+
+    def __setstate__(self, state):
+        self.template, self.args, self.kwargs = state
+
+    def __repr__(self):
+        return "{}({!r}, args={!r}, kwargs={!r})".format(
+            self.__class__.__name__, self.template, self.args, self.kwargs
+        )
+
+
 class AnonymousTarget:
     """Represents an unnamed target.
 
@@ -92,9 +152,11 @@ class AnonymousTarget:
         A string, list or dictionary containing inputs to the target.
     :ivar list outputs:
         A string, list or dictionary containing outputs to the target.
-    :ivar dict options:
+    :ivar options:
         Options such as number of cores, memory requirements etc. Options are
-        backend-dependent. Backends will ignore unsupported options.
+        backend-dependent. Backends will ignore unsupported options. Options
+        are stored as an :class:`~gwf.utils.OptionSet` shared between targets
+        with the same options.
     :ivar str working_dir:
         Working directory of this target.
     :ivar str spec:
@@ -104,6 +166,19 @@ class AnonymousTarget:
         cleaning, even if this target is not an endpoint.
     """
 
+    __slots__ = (
+        "_option_set",
+        "order",
+        "protected",
+        "_spec",
+        "_inputs",
+        "_outputs",
+        "_working_dir",
+        "_flattened_inputs",
+        "_flattened_outputs",
+        "__weakref__",
+    )
+
     _creation_order = 0
 
     def __init__(
@@ -123,13 +198,92 @@ class AnonymousTarget:
         else:
             self.protected = set(protect)
 
+    @property
+    def options(self):
+        """The options of the target as a mutable mapping.
+
+        The options are stored as a shared :class:`~gwf.utils.OptionSet`.
+        Modifying the options replaces the option set of this target only.
+        """
+        return _TargetOptions(self)
+
+    @options.setter
+    def options(self, value):
+        if isinstance(value, _TargetOptions):
+            value = value._target.option_set
+        self._option_set = OptionSet.intern(value)
+
+    @property
+    def option_set(self):
+        """The options of the target as an immutable, shared option set."""
+        return self._option_set
+
+    @option_set.setter
+    def option_set(self, value):
+        self._option_set = OptionSet.intern(value)
+
+    # The normalized paths are computed on first use and cached until the
+    # inputs, outputs or working directory are reassigned. Modifying the
+    # inputs or outputs in-place does not invalidate the cache.
+
+    @property
+    def inputs(self):
+        return self._inputs
+
+    @inputs.setter
+    def inputs(self, value):
+        self._inputs = value
+        self._flattened_inputs = None
+
+    @property
+    def outputs(self):
+        return self._outputs
+
+    @outputs.setter
+    def outputs(self, value):
+        self._outputs = value
+        self._flattened_outputs = None
+
+    @property
+    def working_dir(self):
+        return self._working_dir
+
+    @working_dir.setter
+    def working_dir(self, value):
+        self._working_dir = value
+        self._flattened_inputs = None
+        self._flattened_outputs = None
+
+    def flattened_inputs(self):
+        """Return a tuple of the normalized input paths of this target."""
+        if self._flattened_inputs is None:
+            self._flattened_inputs = tuple(
+                _norm_paths(self.working_dir, _flatten(self.inputs))
+            )
+        return self._flattened_inputs
+
+    def flattened_outputs(self):
+        """Return a tuple of the normalized output paths of this target."""
+        if self._flattened_outputs is None:
+            self._flattened_outputs = tuple(
+                _norm_paths(self.working_dir, _flatten(self.outputs))
+            )
+        return self._flattened_outputs
+
     @property
     def spec(self):
+        """The spec of the target.
+
+        If the spec was given as a :class:`SpecTemplate`, it is rendered every
+        time it is accessed.
+        """
+        if isinstance(self._spec, SpecTemplate):
+            return self._spec.render()
         return self._spec
 
     @spec.setter
     def spec(self, value):
-        if not isinstance(value, str):
+        if not isinstance(value, (str, SpecTemplate)):
             msg = (
                 "Target spec must be a string, not {}. Did you attempt to "
                 "assign a template to this target? This is no is not allowed "
@@ -140,6 +294,11 @@ class AnonymousTarget:
 
         self._spec = value
 
+    @property
+    def raw_spec(self):
+        """The spec as given, i.e. a string or an unrendered :class:`SpecTemplate`."""
+        return self._spec
+
     @property
     def is_source(self):
         """Return whether this target is a source.
@@ -157,9 +316,9 @@ class AnonymousTarget:
         return not self.outputs
 
     def inherit_options(self, super_options):
-        options = super_options.copy()
-        options.update(self.options)
-        self.options = options
+        if isinstance(super_options, _TargetOptions):
+            super_options = super_options._target.option_set
+        self._option_set = OptionSet.intern(super_options).merge(self._option_set)
 
     def __lshift__(self, spec):
         self.spec = spec
@@ -172,13 +331,49 @@ class AnonymousTarget:
             self.outputs,
             self.options,
             self.working_dir,
-            self.spec,
+            self._spec,
         )
 
     def __str__(self):
         return "{}_{}".format(self.__class__.__name__, id(self))
 
 
+class _TargetOptions(collections.abc.MutableMapping):
+    """Mutable view of the option set of a target.
+
+    Modifying the view replaces the option set of the target with a modified
+    copy, leaving the option set shared with other targets untouched.
+    """
+
+    __slots__ = ("_target",)
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getitem__(self, name):
+        return self._target.option_set[name]
+
+    def __setitem__(self, name, value):
+        target = self._target
+        target.option_set = target.option_set.set(name, value)
+
+    def __delitem__(self, name):
+        target = self._target
+        target.option_set = target.option_set.remove(name)
+
+    def __iter__(self):
+        return iter(self._target.option_set)
+
+    def __len__(self):
+        return len(self._target.option_set)
+
+    def copy(self):
+        return self._target.option_set.copy()
+
+    def __repr__(self):
+        return repr(self.copy())
+
+
 class Target(AnonymousTarget):
     """Represents a target.
 
@@ -232,6 +427,8 @@ class Target(AnonymousTarget):
         and *outputs* to be lists.
     """
 
+    __slots__ = ("name",)
+
     def __init__(
         self, name, inputs, outputs, options, working_dir=None, spec="", protect=None
     ):
@@ -254,11 +451,25 @@ class Target(AnonymousTarget):
             protect=protect,
         )
 
-    def flattened_inputs(self):
-        return _norm_paths(self.working_dir, _flatten(self.inputs))
+    @classmethod
+    def _from_normalized(
+        cls, name, inputs, outputs, options, working_dir, spec, protect, order
+    ):
+        """Return a target without validating its name and paths.
 
-    def flattened_outputs(self):
-        return _norm_paths(self.working_dir, _flatten(self.outputs))
+        This is used to restore targets that were validated when they were
+        first created, e.g. when loading a compiled plan.
+        """
+        target = cls.__new__(cls)
+        target.name = name
+        target.inputs = inputs
+        target.outputs = outputs
+        target.options = options
+        target.working_dir = working_dir
+        target._spec = spec
+        target.protected = set(protect)
+        target.order = order
+        return target
 
     @classmethod
     def empty(cls, name):
@@ -282,6 +493,374 @@ class Target(AnonymousTarget):
         return self.name
 
 
+class PathTable(collections.abc.Sequence):
+    """Table of interned paths.
+
+    Each distinct path is stored once and identified by an integer. A path is
+    split into its directory and file name. Directories are stored as a trie
+    in which each directory is its parent directory plus a single path
+    component, and all components are interned. Thus, a long prefix shared by
+    many paths, or a file name used in many directories, is only stored once.
+
+    The table is a sequence mapping identifiers to paths. Paths are joined
+    when accessed. Use :meth:`get_id` to map a path to its identifier.
+    """
+
+    def __init__(self, paths=()):
+        self._components = []
+        self._dir_parents = array(_INDEX_TYPECODE)
+        self._dir_names = array(_INDEX_TYPECODE)
+        self._path_dirs = array(_INDEX_TYPECODE)
+        self._path_names = array(_INDEX_TYPECODE)
+        self._init_indexes()
+
+        for path in paths:
+            self.intern(path)
+
+    def _init_indexes(self):
+        self._component_ids = {
+            component: idx for idx, component in enumerate(self._components)
+        }
+        self._dir_ids = {
+            self._key(parent, name): idx
+            for idx, (parent, name) in enumerate(
+                zip(self._dir_parents, self._dir_names)
+            )
+        }
+        self._dir_strings = [None] * len(self._dir_parents)
+        self._dirname_ids = {}
+        self._path_ids = None
+
+    def __getstate__(self):
+        return (
+            self._components,
+            self._dir_parents,
+            self._dir_names,
+            self._path_dirs,
+            self._path_names,
+        )
+
+    def __setstate__(self, state):
+        (
+            self._components,
+            self._dir_parents,
+            self._dir_names,
+            self._path_dirs,
+            self._path_names,
+        ) = state
+        self._init_indexes()
+
+    @staticmethod
+    def _key(parent, name):
+        # A directory or path is identified by its parent directory (-1 if it
+        # has none) and the identifier of its last component.
+        return (parent + 1) << 32 | name
+
+    def _component_id(self, component, create):
+        component_id = self._component_ids.get(component)
+        if component_id is None and create:
+            component_id = self._component_ids[component] = len(self._components)
+            self._components.append(component)
+        return component_id
+
+    def _dir_id(self, dirname, create):
+        dir_id = self._dirname_ids.get(dirname)
+        if dir_id is not None:
+            return dir_id
+
+        parent = -1
+        for component in dirname.split("/"):
+            name = self._component_id(component, create)
+            if name is None:
+                return None
+            key = self._key(parent, name)
+            dir_id = self._dir_ids.get(key)
+            if dir_id is None:
+                if not create:
+                    return None
+                dir_id = self._dir_ids[key] = len(self._dir_parents)
+                self._dir_parents.append(parent)
+                self._dir_names.append(name)
+                self._dir_strings.append(None)
+            parent = dir_id
+        self._dirname_ids[dirname] = parent
+        return parent
+
+    def _dir_string(self, dir_id):
+        chain = []
+        while dir_id >= 0 and self._dir_strings[dir_id] is None:
+            chain.append(dir_id)
+            dir_id = self._dir_parents[dir_id]
+        prefix = None if dir_id < 0 else self._dir_strings[dir_id]
+        for dir_id in reversed(chain):
+            name = self._components[self._dir_names[dir_id]]
+            prefix = name if prefix is None else prefix + "/" + name
+            self._dir_strings[dir_id] = prefix
+        return prefix
+
+    def _lookup_table(self):
+        # The index from paths to identifiers is only needed while interning
+        # and for the occasional lookup, so it can be dropped and is rebuilt
+        # when needed.
+        if self._path_ids is None:
+            self._path_ids = {
+                self._key(dir_id, name): idx
+                for idx, (dir_id, name) in enumerate(
+                    zip(self._path_dirs, self._path_names)
+                )
+            }
+        return self._path_ids
+
+    def _path_key(self, path, create):
+        head, sep, tail = path.rpartition("/")
+        dir_id = self._dir_id(head, create) if sep else -1
+        if dir_id is None:
+            return None
+        name = self._component_id(tail, create)
+        if name is None:
+            return None
+        return dir_id, name
+
+    def intern(self, path):
+        """Add `path` to the table if it is not there and return its identifier."""
+        dir_id, name = self._path_key(path, create=True)
+        path_ids = self._lookup_table()
+        key = self._key(dir_id, name)
+        path_id = path_ids.get(key)
+        if path_id is None:
+            path_id = path_ids[key] = len(self._path_dirs)
+            self._path_dirs.append(dir_id)
+            self._path_names.append(name)
+        return path_id
+
+    def get_id(self, path):
+        """Return the identifier of `path` or `None` if it is not in the table."""
+        key = self._path_key(path, create=False)
+        if key is None:
+            return None
+        return self._lookup_table().get(self._key(*key))
+
+    def drop_lookup_table(self):
+        """Free the indexes from paths to identifiers until they are needed."""
+        self._dirname_ids = {}
+        self._path_ids = None
+
+    def __getitem__(self, path_id):
+        if path_id < 0:
+            raise IndexError(path_id)
+        dir_id = self._path_dirs[path_id]
+        name = self._components[self._path_names[path_id]]
+        if dir_id < 0:
+            return name
+        prefix = self._dir_strings[dir_id]
+        if prefix is None:
+            prefix = self._dir_string(dir_id)
+        return prefix + "/" + name
+
+    def __iter__(self):
+        return (self[path_id] for path_id in range(len(self._path_dirs)))
+
+    def __contains__(self, path):
+        return self.get_id(path) is not None
+
+    def __len__(self):
+        return len(self._path_dirs)
+
+
+class _CSR:
+    """Adjacency lists stored in compressed sparse row form.
+
+    The neighbours of node `i` are stored in
+    ``indices[offsets[i]:offsets[i + 1]]``. Both arrays hold plain machine
+    integers, so a graph with millions of edges costs a few bytes per edge
+    instead of a Python set entry per edge.
+    """
+
+    __slots__ = ("offsets", "indices")
+
+    def __init__(self, offsets, indices):
+        self.offsets = offsets
+        self.indices = indices
+
+    def __getstate__(self):
+        return (self.offsets, self.indices)
+
+    def __setstate__(self, state):
+        self.offsets, self.indices = state
+
+    @classmethod
+    def from_lists(cls, lists):
+        offsets = array(_INDEX_TYPECODE, [0])
+        indices = array(_INDEX_TYPECODE)
+        for lst in lists:
+            indices.extend(lst)
+            offsets.append(len(indices))
+        return cls(offsets, indices)
+
+    def transpose(self, num_columns):
+        """Return the transposed adjacency, i.e. with all edges reversed."""
+        counts = [0] * (num_columns + 1)
+        for j in self.indices:
+            counts[j + 1] += 1
+        for j in range(num_columns):
+            counts[j + 1] += counts[j]
+        offsets = array(_INDEX_TYPECODE, counts)
+        indices = array(_INDEX_TYPECODE, bytes(len(self.indices) * offsets.itemsize))
+        fill = counts[:-1]
+        for i in range(len(self)):
+            for j in self[i]:
+                indices[fill[j]] = i
+                fill[j] += 1
+        return _CSR(offsets, indices)
+
+    def degree(self, i):
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def __getitem__(self, i):
+        return self.indices[self.offsets[i] : self.offsets[i + 1]]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class _MaskedCSR:
+    """Adjacency lists of `csr` restricted to the nodes in `mask`."""
+
+    __slots__ = ("csr", "mask")
+
+    def __init__(self, csr, mask):
+        self.csr = csr
+        self.mask = mask
+
+    def __getstate__(self):
+        return (self.csr, self.mask)
+
+    def __setstate__(self, state):
+        self.csr, self.mask = state
+
+    def degree(self, i):
+        mask = self.mask
+        return sum(1 for j in self.csr[i] if mask[j])
+
+    def __getitem__(self, i):
+        mask = self.mask
+        return [j for j in self.csr[i] if mask[j]]
+
+    def __len__(self):
+        return len(self.csr)
+
+
+class _AdjacencyView(collections.abc.Mapping):
+    """Read-only mapping from a target to the set of its neighbours.
+
+    Like the `defaultdict` it replaces, looking up a target without any
+    neighbours returns an empty set, but only targets with at least one
+    neighbour are iterated over.
+    """
+
+    def __init__(self, graph, adjacency):
+        self._graph = graph
+        self._adjacency = adjacency
+
+    def __getitem__(self, target):
+        idx = self._graph._lookup(target)
+        if idx is None:
+            return frozenset()
+        nodes = self._graph._nodes
+        return frozenset(nodes[j] for j in self._adjacency[idx])
+
+    def __contains__(self, target):
+        idx = self._graph._lookup(target)
+        return idx is not None and self._adjacency.degree(idx) > 0
+
+    def __iter__(self):
+        nodes = self._graph._nodes
+        return (
+            nodes[idx]
+            for idx in self._graph._node_ids()
+            if self._adjacency.degree(idx)
+        )
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class _ProvidesView(collections.abc.Mapping):
+    """Read-only mapping from a file path to the target providing it."""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, path):
+        graph = self._graph
+        path_id = graph._paths.get_id(path)
+        if path_id is None:
+            raise KeyError(path)
+        target_idx = graph._providers[path_id]
+        if target_idx < 0 or (graph._mask is not None and not graph._mask[target_idx]):
+            raise KeyError(path)
+        return graph._nodes[target_idx]
+
+    def __iter__(self):
+        graph = self._graph
+        outputs = graph._outputs
+        return (
+            graph._paths[path_id]
+            for idx in graph._node_ids()
+            for path_id in outputs[idx]
+        )
+
+    def __len__(self):
+        outputs = self._graph._outputs
+        return sum(outputs.degree(idx) for idx in self._graph._node_ids())
+
+
+class _ConsumersView(collections.abc.Mapping):
+    """Read-only mapping from a file path to the set of targets using it."""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, path):
+        graph = self._graph
+        path_id = graph._paths.get_id(path)
+        if path_id is None or not graph._consumers.degree(path_id):
+            raise KeyError(path)
+        nodes = graph._nodes
+        return set(nodes[idx] for idx in graph._consumers[path_id])
+
+    def __iter__(self):
+        graph = self._graph
+        consumers, paths = graph._consumers, graph._paths
+        return (
+            paths[path_id]
+            for path_id in range(len(consumers))
+            if consumers.degree(path_id)
+        )
+
+    def __len__(self):
+        consumers = self._graph._consumers
+        return sum(1 for path_id in range(len(consumers)) if consumers.degree(path_id))
+
+
+class _UnresolvedView(collections.abc.Set):
+    """Read-only set of the paths that are not provided by any target."""
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __contains__(self, path):
+        path_id = self._graph._paths.get_id(path)
+        return path_id is not None and path_id in self._graph._unresolved_ids()
+
+    def __iter__(self):
+        paths = self._graph._paths
+        return (paths[path_id] for path_id in self._graph._unresolved_ids())
+
+    def __len__(self):
+        return len(self._graph._unresolved_ids())
+
+
 class Graph:
     """Represents a dependency graph for a set of targets.
 
@@ -309,28 +888,114 @@ class Graph:
         A dictionary mapping target names to instances of :class:`gwf.Target`.
     :ivar dict provides:
         A dictionary mapping a file path to the target that provides that path.
+    :ivar dict consumers:
+        A dictionary mapping a file path to the set of targets that use the
+        file as input.
     :ivar dict dependents:
         A dictionary mapping a target to a set of all targets which depend on
         the target.
 
-    The graph can be manipulated in arbitrary, diabolic ways after it has been
-    constructed. Checks are only performed at construction-time, thus
-    introducing e.g. a circular dependency by manipulating *dependencies* will
-    not raise an exception.
+    Internally, targets and normalized paths are assigned integer identifiers
+    and all relations are stored as compressed integer arrays. Paths are
+    interned in a :class:`PathTable`. The *dependencies*, *dependents*,
+    *provides*, *consumers* and *unresolved* attributes are
+    read-only views on top of these arrays. Thus, the graph can not be
+    manipulated after it has been constructed.
 
     :raises gwf.exceptions.WorkflowError:
         Raised if the workflow contains a circular dependency.
     """
 
-    def __init__(self, targets, provides, dependencies, dependents, unresolved):
-        self.targets = targets
-        self.provides = provides
-        self.dependencies = dependencies
-        self.dependents = dependents
-        self.unresolved = unresolved
+    def __init__(self, nodes, paths, providers, inputs, outputs, dependencies):
+        self._nodes = nodes
+        self._paths = paths
+        self._providers = providers
+        self._inputs = inputs
+        self._outputs = outputs
+        self._dependencies = dependencies
+        self._dependents = dependencies.transpose(len(nodes))
+        self._consumers = inputs.transpose(len(paths))
+        self._init_views()
 
         self._check_for_circular_dependencies()
 
+    def _init_views(self):
+        self._index = {target: idx for idx, target in enumerate(self._nodes)}
+        self._init_targets()
+
+    def _init_targets(self):
+        self._unresolved_ids_cache = None
+
+        nodes = self._nodes
+        self.targets = {nodes[idx].name: nodes[idx] for idx in self._node_ids()}
+        self.provides = _ProvidesView(self)
+        self.consumers = _ConsumersView(self)
+        self.dependencies = _AdjacencyView(self, self._dependencies)
+        self.dependents = _AdjacencyView(self, self._dependents)
+        self.unresolved = _UnresolvedView(self)
+
+    # A graph created by subset() shares its arrays with the graph it was
+    # created from. It only includes the targets whose indices are set in the
+    # `_mask` byte array, which are also listed in increasing order in
+    # `_members`. For all other graphs, both are `None`.
+    _mask = None
+    _members = None
+
+    def _node_ids(self):
+        """Return the indices of all targets included in the graph."""
+        if self._members is None:
+            return range(len(self._nodes))
+        return self._members
+
+    def _lookup(self, target):
+        """Return the index of `target` or `None` if it is not in the graph."""
+        idx = self._index.get(target)
+        if idx is not None and self._mask is not None and not self._mask[idx]:
+            return None
+        return idx
+
+    def _unresolved_ids(self):
+        if self._unresolved_ids_cache is None:
+            inputs, providers = self._inputs, self._providers
+            if self._mask is None:
+                unresolved = (
+                    path_id
+                    for path_id, target_idx in enumerate(providers)
+                    if target_idx < 0
+                )
+            else:
+                unresolved = (
+                    path_id
+                    for idx in self._members
+                    for path_id in inputs[idx]
+                    if providers[path_id] < 0
+                )
+            self._unresolved_ids_cache = frozenset(unresolved)
+        return self._unresolved_ids_cache
+
+    _STATE_ATTRS = (
+        "_nodes",
+        "_paths",
+        "_providers",
+        "_inputs",
+        "_outputs",
+        "_dependencies",
+        "_dependents",
+        "_consumers",
+        "_topological_order",
+        "_mask",
+        "_members",
+    )
+
+    def __getstate__(self):
+        # Only the arrays are pickled. Indexes and views are rebuilt when the
+        # graph is unpickled, but the graph is not checked for cycles again.
+        return {attr: getattr(self, attr) for attr in self._STATE_ATTRS}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_views()
+
     @classmethod
     def from_targets(cls, targets):
         """Construct a dependency graph from a set of targets.
@@ -348,104 +1013,272 @@ class Graph:
         :raises gwf.exceptions.WorkflowError:
             Raised if the workflow contains a circular dependency.
         """
-        provides = {}
-        unresolved = set()
-        dependencies = defaultdict(set)
-        dependents = defaultdict(set)
-
-        logger.debug("Building dependency graph from %d targets", len(targets))
-
         if isinstance(targets, dict):
             targets = targets.values()
+        nodes = list(targets)
 
+        logger.debug("Building dependency graph from %d targets", len(nodes))
+
+        paths = PathTable()
+        providers = array(_INDEX_TYPECODE)
+
+        def intern(path):
+            path_id = paths.intern(path)
+            if path_id == len(providers):
+                providers.append(-1)
+            return path_id
+
+        # The normalized paths are not cached on the targets since the path
+        # table already stores them much more compactly.
         with timer("Built dependency graph in %.3fms", logger=logger):
-            for target in targets:
-                for path in target.flattened_outputs():
-                    if path in provides:
+            outputs = []
+            for idx, target in enumerate(nodes):
+                output_ids = []
+                for path in _norm_paths(target.working_dir, _flatten(target.outputs)):
+                    path_id = intern(path)
+                    if providers[path_id] >= 0:
                         msg = 'File "{}" provided by targets "{}" and "{}".'.format(
-                            path, provides[path].name, target
+                            path, nodes[providers[path_id]].name, target
                         )
                         raise WorkflowError(msg)
-                    provides[path] = target
-
-        for target in targets:
-            for path in target.flattened_inputs():
-                if path in provides:
-                    dependencies[target].add(provides[path])
-                else:
-                    unresolved.add(path)
-
-        for target, deps in dependencies.items():
-            for dep in deps:
-                dependents[dep].add(target)
+                    providers[path_id] = idx
+                    output_ids.append(path_id)
+                outputs.append(output_ids)
+
+            inputs = []
+            dependencies = []
+            for target in nodes:
+                input_ids = [
+                    intern(path)
+                    for path in _norm_paths(target.working_dir, _flatten(target.inputs))
+                ]
+                inputs.append(input_ids)
+                dependencies.append(
+                    sorted(
+                        set(
+                            providers[path_id]
+                            for path_id in input_ids
+                            if providers[path_id] >= 0
+                        )
+                    )
+                )
+            paths.drop_lookup_table()
 
         return cls(
-            targets={target.name: target for target in targets},
-            provides=provides,
-            dependencies=dependencies,
-            dependents=dependents,
-            unresolved=unresolved,
+            nodes=nodes,
+            paths=paths,
+            providers=providers,
+            inputs=_CSR.from_lists(inputs),
+            outputs=_CSR.from_lists(outputs),
+            dependencies=_CSR.from_lists(dependencies),
         )
 
+    def input_paths(self, target):
+        """Return the normalized input paths of `target`."""
+        paths = self._paths
+        return [paths[path_id] for path_id in self._inputs[self._index[target]]]
+
+    def output_paths(self, target):
+        """Return the normalized output paths of `target`."""
+        paths = self._paths
+        return [paths[path_id] for path_id in self._outputs[self._index[target]]]
+
     @timer("Checked for circular dependencies in %.3fms", logger=logger)
     def _check_for_circular_dependencies(self):
         """Check for circular dependencies in the graph.
 
+        The targets are ordered topologically using Kahn's algorithm. If some
+        targets could not be ordered, they are part of or depend on a cycle.
+        The cycle is then found by repeatedly following an unordered
+        dependency until a target is visited twice.
+
         Raises :class:`WorkflowError` if a circular dependency is found.
         """
         logger.debug("Checking for circular dependencies")
 
-        fresh, started, done = 0, 1, 2
-
-        nodes = self.targets.values()
-        state = dict((n, fresh) for n in nodes)
+        dependencies, dependents = self._dependencies, self._dependents
+        num_nodes = len(self._nodes)
 
-        def visitor(node):
-            state[node] = started
-            for dep in self.dependencies[node]:
-                if state[dep] == started:
-                    raise WorkflowError("Target {} depends on itself.".format(node))
-                elif state[dep] == fresh:
-                    visitor(dep)
-            state[node] = done
-
-        for node in nodes:
-            if state[node] == fresh:
-                visitor(node)
+        remaining = [dependencies.degree(idx) for idx in range(num_nodes)]
+        order = array(
+            _INDEX_TYPECODE, (idx for idx in range(num_nodes) if not remaining[idx])
+        )
+        pos = 0
+        while pos < len(order):
+            for dependent_idx in dependents[order[pos]]:
+                remaining[dependent_idx] -= 1
+                if not remaining[dependent_idx]:
+                    order.append(dependent_idx)
+            pos += 1
+
+        if len(order) == num_nodes:
+            self._topological_order = order
+            return
+
+        idx = next(i for i in range(num_nodes) if remaining[i])
+        seen = {}
+        path = []
+        while idx not in seen:
+            seen[idx] = len(path)
+            path.append(idx)
+            idx = next(dep for dep in dependencies[idx] if remaining[dep])
+        cycle = path[seen[idx] :] + [idx]
+        raise WorkflowError(
+            "Target {} depends on itself: {}.".format(
+                self._nodes[idx],
+                " -> ".join(str(self._nodes[i]) for i in cycle),
+            )
+        )
 
     def endpoints(self):
         """Return a set of all targets that are not depended on by other targets."""
-        return set(self.targets.values()) - set(self.dependents.keys())
+        dependents = self._dependents
+        return set(
+            self._nodes[idx]
+            for idx in self._node_ids()
+            if not dependents.degree(idx)
+        )
 
-    @cache
-    def dfs(self, root):
-        """Return the depth-first traversal path through a graph from `root`."""
-        visited = set()
-        path = []
+    def _postorder(self, roots, visited):
+        """Yield indices of targets reachable from `roots` in depth-first postorder.
 
-        def dfs_inner(node):
-            if node in visited:
-                return
+        All dependencies of a target are yielded before the target itself.
+        Targets whose index is in `visited` are skipped, and `visited` is
+        updated in place. The traversal uses an explicit stack and thus works
+        for arbitrarily deep graphs.
+        """
+        dependencies = self._dependencies
+        for root in roots:
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(dependencies[root]))]
+            while stack:
+                idx, deps = stack[-1]
+                for dep in deps:
+                    if dep not in visited:
+                        visited.add(dep)
+                        stack.append((dep, iter(dependencies[dep])))
+                        break
+                else:
+                    stack.pop()
+                    yield idx
 
-            visited.add(node)
-            for dep in self.dependencies[node]:
-                dfs_inner(dep)
-            path.append(node)
+    def _downstream(self, roots):
+        """Return indices of `roots` and all targets depending on them.
 
-        dfs_inner(root)
-        return path
+        The indices are returned in topological order, such that all
+        dependencies of a target come before the target itself.
+        """
+        dependents, dependencies = self._dependents, self._dependencies
+        cone = set(roots)
+        stack = list(cone)
+        while stack:
+            for dep in dependents[stack.pop()]:
+                if dep not in cone:
+                    cone.add(dep)
+                    stack.append(dep)
+
+        num_deps = {
+            idx: sum(1 for dep in dependencies[idx] if dep in cone) for idx in cone
+        }
+        queue = collections.deque(sorted(idx for idx in cone if not num_deps[idx]))
+        order = []
+        while queue:
+            idx = queue.popleft()
+            order.append(idx)
+            for dep in dependents[idx]:
+                num_deps[dep] -= 1
+                if not num_deps[dep]:
+                    queue.append(dep)
+        return order
+
+    def _roots(self, targets, paths, providers):
+        roots = set()
+        for target in targets:
+            idx = self._lookup(target)
+            if idx is None:
+                raise KeyError(target)
+            roots.add(idx)
+        for path in paths:
+            path_id = self._paths.get_id(os.path.abspath(path))
+            if path_id is None:
+                continue
+            if providers:
+                idx = self._providers[path_id]
+                if idx >= 0 and (self._mask is None or self._mask[idx]):
+                    roots.add(idx)
+            else:
+                roots.update(self._consumers[path_id])
+        return roots
+
+    def downstream(self, targets=(), paths=()):
+        """Return all targets affected by changes to `targets` or `paths`.
+
+        The affected targets are the given targets, the targets using one of
+        the given paths as input, and all targets that depend on these,
+        directly or indirectly. They are returned in topological order.
+
+        The time taken is proportional to the number of affected targets.
+        """
+        roots = self._roots(targets, paths, providers=False)
+        nodes = self._nodes
+        return [nodes[idx] for idx in self._downstream(roots)]
+
+    def upstream(self, targets=(), paths=()):
+        """Return all targets that `targets` or `paths` depend on.
+
+        These are the given targets, the targets providing one of the given
+        paths, and all of their dependencies, directly or indirectly. They are
+        returned in topological order.
+
+        The time taken is proportional to the number of returned targets.
+        """
+        roots = self._roots(targets, paths, providers=True)
+        nodes = self._nodes
+        return [nodes[idx] for idx in self._postorder(sorted(roots), set())]
+
+    @memoized_method(maxsize=128)
+    def dfs(self, root):
+        """Return the depth-first traversal path through a graph from `root`."""
+        nodes = self._nodes
+        return [nodes[idx] for idx in self._postorder([self._index[root]], set())]
 
     def subset(self, endpoints):
         """Subset a graph given an iterable of endpoints.
 
         This will return a new, potentially disjoint graph with the given
         endpoints and all of their dependencies.
+
+        The new graph is a view on this graph. It shares all arrays and indexes
+        with this graph and only records which targets are included, so the
+        paths of the targets are not normalized and the graph is not checked
+        for circular dependencies again.
         """
-        targets = set()
-        for target in endpoints:
-            for dep in self.dfs(target):
-                targets.add(dep)
-        return Graph.from_targets(targets)
+        mask = bytearray(len(self._nodes))
+        order = array(_INDEX_TYPECODE)
+        roots = [self._index[target] for target in endpoints]
+        for idx in self._postorder(roots, set()):
+            mask[idx] = 1
+            order.append(idx)
+
+        # The subset includes all dependencies of its targets, so only the
+        # dependents and consumers must be restricted to the targets in the
+        # subset.
+        dependents, consumers = self._dependents, self._consumers
+        if isinstance(dependents, _MaskedCSR):
+            dependents, consumers = dependents.csr, consumers.csr
+
+        subgraph = Graph.__new__(Graph)
+        subgraph.__dict__.update(self.__getstate__())
+        subgraph._mask = mask
+        subgraph._members = array(_INDEX_TYPECODE, sorted(order))
+        subgraph._dependents = _MaskedCSR(dependents, mask)
+        subgraph._consumers = _MaskedCSR(consumers, mask)
+        subgraph._topological_order = order
+        subgraph._index = self._index
+        subgraph._init_targets()
+        return subgraph
 
     def __iter__(self):
         return iter(self.targets.values())
@@ -460,22 +1293,261 @@ class Graph:
         return target_name in self.targets
 
 
+def _ancestors(path):
+    """Yield the parent directories of `path`, nearest first."""
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return
+        yield parent
+        path = parent
+
+
 class CachedFilesystem:
-    """A cached file system abstraction."""
+    """A cached file system abstraction.
+
+    Files are stat'ed on first use. Use :meth:`prefetch` to stat many files
+    concurrently up front, which is much faster on network file systems where
+    each stat call has a high latency.
+
+    When prefetching, the paths are grouped by directory. A directory with at
+    least `scan_threshold` needed paths is listed once with
+    :func:`os.scandir` instead of stat'ing each path, such that paths not in
+    the listing are known to be missing without touching them. If a directory
+    does not exist, all paths below it are missing. The other paths are
+    stat'ed one by one.
+
+    :param int max_workers:
+        Number of threads used to stat files in :meth:`prefetch`.
+    :param str stat_mode:
+        Either ``"auto"`` to choose between listing directories and stat'ing
+        files as described above, ``"stat"`` to always stat files, or
+        ``"scandir"`` to always list directories.
+    :param int scan_threshold:
+        Minimum number of needed paths in a directory for the directory to be
+        listed in ``"auto"`` mode.
+    :param gwf.statcache.StatCache stat_cache:
+        If given, stats of source files are taken from and stored in this
+        persistent cache. The cache is saved when the file system is closed.
+    :param gwf.checksums.ChecksumStore checksums:
+        If given, the scheduler uses checksums of files in this store when
+        timestamps of files disagree. The store is saved when the file system
+        is closed.
+    :param gwf.manifest.CompletionManifest manifest:
+        If given, the scheduler trusts the recorded stats of the outputs of
+        completed targets in this manifest. New records are written when the
+        file system is closed.
+    """
+
+    STAT_MODES = ("auto", "stat", "scandir")
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers=1,
+        stat_mode="auto",
+        scan_threshold=16,
+        stat_cache=None,
+        checksums=None,
+        manifest=None,
+    ):
+        if stat_mode not in self.STAT_MODES:
+            raise ValueError("Invalid stat mode {!r}.".format(stat_mode))
         self._cache = {}
+        self.max_workers = max_workers
+        self.stat_mode = stat_mode
+        self.scan_threshold = scan_threshold
+        self.stat_cache = stat_cache
+        self.checksums = checksums
+        self.manifest = manifest
+        self.hits = 0
+        self.misses = 0
 
-    def _lookup_file(self, path):
-        if path not in self._cache:
+    @classmethod
+    def from_config(cls, config):
+        """Return a file system configured by `config`."""
+        stat_cache = None
+        if config.get("stat_cache", False):
+            stat_cache = StatCache()
+        checksums = None
+        if config.get("staleness", "timestamp") == "checksum":
+            checksums = ChecksumStore()
+        manifest = None
+        if config.get("completion_manifest", False):
+            manifest = CompletionManifest(
+                sample_rate=config.get(
+                    "completion_manifest_sample", DEFAULT_SAMPLE_RATE
+                )
+            )
+        return cls(
+            max_workers=config.get("stat_workers", 1),
+            stat_mode=config.get("stat_mode", "auto"),
+            stat_cache=stat_cache,
+            checksums=checksums,
+            manifest=manifest,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Save the persistent stat cache, checksum store and manifest, if any."""
+        if self.stat_cache is not None:
+            self.stat_cache.save()
+        if self.checksums is not None:
+            self.checksums.save()
+        if self.manifest is not None:
+            self.manifest.save()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return file_stat(st)
+
+    def _stat_files(self, paths):
+        return [(path, self._stat(path)) for path in paths]
+
+    def _scan_directory(self, dirname, paths):
+        """Return the timestamps of `paths` in `dirname` by listing it.
+
+        Returns `None` if the directory does not exist. If the directory can
+        not be listed, e.g. because it may be entered but not read, the paths
+        are stat'ed one by one instead.
+        """
+        wanted = collections.defaultdict(list)
+        for path in paths:
+            wanted[os.path.basename(path)].append(path)
+
+        results = dict.fromkeys(paths)
+        try:
+            entries = os.scandir(dirname)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        except OSError:
+            logger.debug("Could not list %s, stat'ing files", dirname, exc_info=True)
+            return self._stat_files(paths)
+        for entry in entries:
+            if entry.name not in wanted:
+                continue
             try:
-                st = os.stat(path)
+                stat = file_stat(entry.stat())
             except FileNotFoundError:
-                self._cache[path] = None
-            else:
-                self._cache[path] = st.st_mtime
+                # A dangling symlink.
+                continue
+            for path in wanted[entry.name]:
+                results[path] = stat
+        return list(results.items())
+
+    def _lookup_file(self, path):
+        if path in self._cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._cache[path] = self._stat(path)
         return self._cache[path]
 
+    def _plan_prefetch(self, paths):
+        """Split `paths` into directories to list and files to stat."""
+        if self.stat_mode == "stat":
+            return {}, paths
+
+        by_dir = collections.defaultdict(list)
+        files = []
+        for path in paths:
+            dirname, name = os.path.split(path)
+            if not dirname or name in ("", ".", ".."):
+                files.append(path)
+            else:
+                by_dir[dirname].append(path)
+
+        scans = {}
+        for dirname, dir_paths in by_dir.items():
+            if self.stat_mode == "scandir" or len(dir_paths) >= self.scan_threshold:
+                scans[dirname] = dir_paths
+            else:
+                files.extend(dir_paths)
+        return scans, files
+
+    def invalidate(self, paths):
+        """Forget the cached stats of `paths`."""
+        for path in paths:
+            self._cache.pop(path, None)
+
+    def assume(self, stats):
+        """Use `stats`, a mapping from paths to stats, instead of stat'ing."""
+        self._cache.update(stats)
+
+    def prefetch(self, paths, source_paths=None):
+        """Stat all of `paths` that are not already cached.
+
+        If a persistent stat cache is used, the stats of the paths in
+        `source_paths` are taken from the stat cache when valid, and stored in
+        the stat cache otherwise.
+        """
+        missing = [path for path in dict.fromkeys(paths) if path not in self._cache]
+
+        sources = []
+        if self.stat_cache is not None and source_paths is not None:
+            source_paths = set(source_paths)
+            sources = [path for path in missing if path in source_paths]
+            cached = self.stat_cache.lookup(sources)
+            self._cache.update(cached)
+            sources = [path for path in sources if path not in cached]
+            missing = [path for path in missing if path not in cached]
+
+        if missing:
+            self._prefetch(missing)
+        if sources:
+            self.stat_cache.update({path: self._cache[path] for path in sources})
+
+    def _prefetch(self, missing):
+        scans, files = self._plan_prefetch(missing)
+        chunk_size = max(1, len(files) // (self.max_workers * 4) + 1)
+        chunks = [files[i : i + chunk_size] for i in range(0, len(files), chunk_size)]
+        num_workers = min(self.max_workers, len(scans) + len(chunks))
+        msg = (
+            "Prefetched {} file(s) ({} directory listings, {} stat calls) using {} "
+            "thread(s) in %.3fms"
+        ).format(len(missing), len(scans), len(files), num_workers)
+
+        with timer(msg, logger=logger):
+            # Directories are listed from the top, such that paths below a
+            # missing directory are usually known to be missing without
+            # listing their directory.
+            missing_dirs = set()
+            scan_order = sorted(scans, key=lambda dirname: dirname.count(os.sep))
+
+            def scan(dirname):
+                dir_paths = scans[dirname]
+                if not any(ancestor in missing_dirs for ancestor in _ancestors(dirname)):
+                    results = self._scan_directory(dirname, dir_paths)
+                    if results is not None:
+                        return results
+                    missing_dirs.add(dirname)
+                return [(path, None) for path in dir_paths]
+
+            if num_workers > 1:
+                with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                    futures = [executor.submit(self._stat_files, c) for c in chunks]
+                    for results in executor.map(scan, scan_order):
+                        self._cache.update(results)
+                    for future in futures:
+                        self._cache.update(future.result())
+            else:
+                for dirname in scan_order:
+                    self._cache.update(scan(dirname))
+                for chunk in chunks:
+                    self._cache.update(self._stat_files(chunk))
+
+    def stat(self, path):
+        """Return the :class:`~gwf.statcache.FileStat` of `path` or `None`."""
+        return self._lookup_file(path)
+
     def exists(self, path):
         return self._lookup_file(path) is not None
 
@@ -483,22 +1555,39 @@ class CachedFilesystem:
         st = self._lookup_file(path)
         if st is None:
             raise FileNotFoundError(path)
-        return st
+        return st.mtime
 
 
 class Scheduler:
-    def __init__(self, filesystem=CachedFilesystem()):
+    def __init__(self, filesystem=None):
         """
-        :param gwf.Graph graph:
-            Graph of the workflow.
-        :param gwf.backends.Backend backend:
-            An instance of :class:`gwf.backends.Backend` to which targets will
-            be submitted.
+        :param gwf.core.CachedFilesystem filesystem:
+            Filesystem used to check for existence and timestamps of files.
+            If not given, a new :class:`CachedFilesystem` is created for this
+            scheduler.
         """
+        if filesystem is None:
+            filesystem = CachedFilesystem()
         self._filesystem = filesystem
         self._scheduled = {}
         self._reasons = {}
 
+        self._graph = None
+        self._visited = set()
+        self._flags = bytearray()
+        self._codes = bytearray()
+        self._reason_ids = array(_INDEX_TYPECODE)
+        self._up_to_date = []
+        self._completed = []
+
+    @property
+    def _checksums(self):
+        return getattr(self._filesystem, "checksums", None)
+
+    @property
+    def _manifest(self):
+        return getattr(self._filesystem, "manifest", None)
+
     def schedule(self, targets, graph):
         """Schedule multiple targets and their dependencies.
 
@@ -507,45 +1596,323 @@ class Scheduler:
         """
 
         logger.debug("Scheduling %d target(s)", len(targets))
+        self._prefetch(targets, graph)
+        if self._checksums is not None:
+            self._prefetch_checksums(targets, graph)
         with timer("Scheduled targets in %.3fms", logger=logger):
             for target in targets:
                 self._schedule_dependencies(target, graph)
+        self._finish(graph)
+        return self._scheduled, self._reasons
+
+    def reschedule(self, graph, changed_paths=(), completed=()):
+        """Update the decisions after files changed or targets completed.
+
+        Only targets using or producing one of `changed_paths`, the targets in
+        `completed`, and all targets depending on these are decided again.
+        Decisions for all other targets are kept. Targets that were not
+        scheduled before with :meth:`schedule` are ignored.
 
+        :param graph: The graph that targets were scheduled with.
+        :param changed_paths: Paths of files that were changed.
+        :param completed: Targets that have completed.
+
+        Returns a tuple `(scheduled, reasons)` like :meth:`schedule`.
+        """
+        if graph is not self._graph:
+            raise ValueError("Targets must be scheduled with this graph first.")
+
+        paths = set()
+        roots = set()
+        for path in changed_paths:
+            path = os.path.abspath(path)
+            paths.add(path)
+            path_id = graph._paths.get_id(path)
+            if path_id is None:
+                continue
+            roots.update(graph._consumers[path_id])
+            provider = graph._providers[path_id]
+            if provider >= 0 and graph._lookup(graph._nodes[provider]) is not None:
+                roots.add(provider)
+        for target in completed:
+            idx = graph._lookup(target)
+            if idx is not None:
+                roots.add(idx)
+                paths.update(graph.output_paths(target))
+
+        cone = [
+            idx
+            for idx in graph._downstream(roots & self._visited)
+            if idx in self._visited
+        ]
+        logger.debug("Rescheduling %d affected target(s)", len(cone))
+
+        if isinstance(self._filesystem, CachedFilesystem):
+            self._filesystem.invalidate(paths)
+            self._filesystem.prefetch(sorted(paths))
+        if self._manifest is not None:
+            for idx in cone:
+                self._manifest.trusted.discard(graph._nodes[idx].name)
+
+        with timer("Rescheduled targets in %.3fms", logger=logger):
+            self._decide_all(cone, graph)
+        self._finish(graph)
         return self._scheduled, self._reasons
 
-    @cache
-    def _schedule_dependencies(self, target, graph):
-        logger.debug("Scheduling target %s", target)
-        scheduled_deps = set(
-            dependency
-            for dependency in graph.dependencies[target]
-            if self._schedule_dependencies(dependency, graph)
+    def _finish(self, graph):
+        """Record the results of a scheduling pass."""
+        if self._checksums is not None:
+            self._record_checksums(graph)
+            self._up_to_date = []
+        if self._manifest is not None:
+            self._record_completions(graph)
+            self._completed = []
+
+        if isinstance(self._filesystem, CachedFilesystem):
+            hits, misses = self._filesystem.hits, self._filesystem.misses
+            logger.debug(
+                "File system cache had %d hit(s) and %d miss(es) (%.1f%% hit rate)",
+                hits,
+                misses,
+                100 * hits / max(hits + misses, 1),
+            )
+
+    def _prefetch(self, targets, graph):
+        """Stat all files needed to schedule `targets` before scheduling."""
+        if not isinstance(self._filesystem, CachedFilesystem):
+            return
+
+        path_ids = set()
+        roots = [graph._index[target] for target in targets]
+        cone = list(graph._postorder(roots, set()))
+        for idx in cone:
+            path_ids.update(graph._inputs[idx])
+            path_ids.update(graph._outputs[idx])
+        path_ids = sorted(path_ids)
+
+        if self._manifest is not None:
+            nodes = graph._nodes
+            self._filesystem.assume(
+                self._manifest.lookup(
+                    (nodes[idx] for idx in cone if nodes[idx].outputs),
+                    graph.output_paths,
+                )
+            )
+
+        paths, providers = graph._paths, graph._providers
+        self._filesystem.prefetch(
+            [paths[path_id] for path_id in path_ids],
+            source_paths=[
+                paths[path_id] for path_id in path_ids if providers[path_id] < 0
+            ],
         )
-        should_schedule, reason = self.should_schedule(target, graph)
-        is_scheduled = scheduled_deps or should_schedule
-        if is_scheduled:
-            self._scheduled[target] = scheduled_deps
-        self._reasons[target] = reason
-        return is_scheduled
-
-    @cache
+
+    def _stats(self, graph, idx):
+        paths = graph.input_paths(graph._nodes[idx]) + graph.output_paths(
+            graph._nodes[idx]
+        )
+        return {path: self._filesystem.stat(path) for path in paths}
+
+    def _prefetch_checksums(self, targets, graph):
+        """Compute the checksums needed to schedule `targets` in one batch.
+
+        Checksums are needed for targets with recorded checksums whose input
+        files are newer than their output files.
+        """
+        stats = {}
+        roots = [graph._index[target] for target in targets]
+        for idx in graph._postorder(roots, set()):
+            target = graph._nodes[idx]
+            if self._checksums.recorded(target.name) is None:
+                continue
+            target_stats = self._stats(graph, idx)
+            if None in target_stats.values():
+                continue
+            input_stats = [target_stats[p] for p in graph.input_paths(target)]
+            output_stats = [target_stats[p] for p in graph.output_paths(target)]
+            if not input_stats or not output_stats:
+                continue
+            if max(st.mtime for st in input_stats) > min(
+                st.mtime for st in output_stats
+            ):
+                stats.update(target_stats)
+        self._checksums.checksums(stats)
+
+    def _record_checksums(self, graph):
+        """Record the checksums of all targets found to be up to date."""
+        stats = {}
+        for idx in self._up_to_date:
+            stats.update(self._stats(graph, idx))
+        checksums = self._checksums.checksums(stats)
+        for idx in self._up_to_date:
+            self._checksums.record(
+                graph._nodes[idx].name,
+                {path: checksums[path] for path in self._stats(graph, idx)},
+            )
+
+    def _record_completions(self, graph):
+        """Record all targets found to be completed by checking their files."""
+        for idx in self._completed:
+            target = graph._nodes[idx]
+            if target.name in self._manifest.trusted:
+                continue
+            self._manifest.record(
+                target,
+                {
+                    path: self._filesystem.stat(path)
+                    for path in graph.output_paths(target)
+                },
+            )
+
+    def _has_unchanged_checksums(self, idx, graph):
+        """Return whether the files of a target have the recorded checksums."""
+        recorded = self._checksums.recorded(graph._nodes[idx].name)
+        if recorded is None:
+            return False
+        stats = self._stats(graph, idx)
+        if set(stats) != set(recorded):
+            return False
+        return self._checksums.checksums(stats) == recorded
+
+    def _reset(self, graph):
+        """Forget all decisions and prepare for scheduling targets in `graph`."""
+        num_nodes = len(graph._nodes)
+        self._graph = graph
+        self._visited = set()
+        self._flags = bytearray(num_nodes)
+        self._codes = bytearray(num_nodes)
+        self._reason_ids = array(_INDEX_TYPECODE, [-1]) * num_nodes
+        self._reasons = _Reasons(self, graph)
+
+    def _schedule_dependencies(self, target, graph):
+        """Decide whether `target` and its dependencies should be scheduled.
+
+        Targets are visited in depth-first postorder such that the decision for
+        a target is always made after the decisions for its dependencies.
+        Targets that have already been decided are not visited again.
+        """
+        if graph is not self._graph:
+            self._reset(graph)
+
+        try:
+            for idx in graph._postorder([graph._index[target]], self._visited):
+                self._decide(idx, graph)
+        except WorkflowError:
+            # Targets on the traversal stack were marked as visited, but were
+            # never decided. Start from scratch if we're called again.
+            self._graph = None
+            raise
+        return target in self._scheduled
+
+    def _distrust(self, idx, graph):
+        """Stop trusting the manifest record of the target with index `idx`.
+
+        The recorded stats of the outputs of a target are stale if it was
+        rerun and its outputs were rewritten in place. A target with a trusted
+        record found to be out of date is therefore decided again with the
+        actual stats of its outputs.
+
+        Returns `True` if the record of the target was trusted.
+        """
+        if self._manifest is None:
+            return False
+        target = graph._nodes[idx]
+        if target.name not in self._manifest.trusted:
+            return False
+        self._manifest.trusted.discard(target.name)
+        paths = graph.output_paths(target)
+        self._filesystem.invalidate(paths)
+        self._filesystem.prefetch(paths)
+        return True
+
+    def _decide_all(self, order, graph):
+        """Decide all targets in `order`, a topologically sorted index list."""
+        for idx in order:
+            self._decide(idx, graph)
+
+    def _decide(self, idx, graph):
+        """Decide whether the target with index `idx` should be scheduled.
+
+        All dependencies of the target must have been decided.
+        """
+        reason, reason_id = self._should_schedule(idx, graph)
+        self._codes[idx] = reason
+        self._reason_ids[idx] = reason_id
+
+        nodes, flags = graph._nodes, self._flags
+        node = nodes[idx]
+        if reason in _SCHEDULED_REASONS:
+            flags[idx] = 1
+            self._scheduled[node] = set(
+                nodes[dep_idx] for dep_idx in graph._dependencies[idx] if flags[dep_idx]
+            )
+        else:
+            flags[idx] = 0
+            self._scheduled.pop(node, None)
+
     def should_schedule(self, target, graph):
-        """Return whether a target should be run or not."""
-
-        for dep in graph.dependencies[target]:
-            should_run, _ = self.should_schedule(dep, graph)
-            if should_run:
-                return (
-                    True,
-                    "{} was scheduled because its dependency {} was scheduled".format(
-                        target, dep
-                    ),
-                )
+        """Return whether a target should be run or not.
+
+        Returns a tuple `(should_run, reason)`, where `reason` is a string.
+        """
+        self._schedule_dependencies(target, graph)
+        return target in self._scheduled, self._reasons[target]
+
+    def explain(self, target):
+        """Return the :class:`Decision` made for `target`.
+
+        :raises KeyError: If `target` has not been scheduled.
+        """
+        graph = self._graph
+        idx = None if graph is None else graph._lookup(target)
+        if idx is None or not self._codes[idx]:
+            raise KeyError(target)
+
+        reason = Reason(self._codes[idx])
+        reason_id = self._reason_ids[idx]
+        dependency = input_path = output_path = None
+        if reason == Reason.DEPENDENCY_SCHEDULED:
+            dependency = graph._nodes[reason_id]
+        elif reason == Reason.OUTPUT_MISSING:
+            output_path = graph._paths[reason_id]
+        elif reason in (Reason.INPUT_NEWER, Reason.CHECKSUMS_UNCHANGED):
+            changed_at = self._filesystem.changed_at
+            _, input_path = max(
+                (changed_at(path), path) for path in graph.input_paths(target)
+            )
+            _, output_path = min(
+                (changed_at(path), path) for path in graph.output_paths(target)
+            )
+        return Decision(
+            target=target,
+            scheduled=reason in _SCHEDULED_REASONS,
+            reason=reason,
+            dependency=dependency,
+            input_path=input_path,
+            output_path=output_path,
+        )
+
+    def _should_schedule(self, idx, graph):
+        """Return the reason for the decision for the target with index `idx`.
+
+        Returns a tuple `(reason, reason_id)` where `reason_id` is the index
+        of the scheduled dependency or the path id of the missing output file,
+        depending on the reason, and -1 otherwise.
+        """
+        target = graph._nodes[idx]
+
+        flags = self._flags
+        for dep_idx in graph._dependencies[idx]:
+            if flags[dep_idx]:
+                return Reason.DEPENDENCY_SCHEDULED, dep_idx
 
         # Check whether all input files actually exists are are being provided
         # by another target. If not, it's an error.
-        for path in target.flattened_inputs():
-            if path in graph.unresolved and not self._filesystem.exists(path):
+        for path_id in graph._inputs[idx]:
+            if graph._providers[path_id] >= 0:
+                continue
+            path = graph._paths[path_id]
+            if not self._filesystem.exists(path):
                 msg = (
                     'File "{}" is required by "{}", but does not exist and is not '
                     "provided by any target in the workflow."
@@ -553,56 +1920,461 @@ class Scheduler:
                 raise WorkflowError(msg)
 
         if target.is_sink:
-            return (True, "{} was scheduled because it is a sink".format(target))
+            return Reason.SINK, -1
 
-        for path in target.flattened_outputs():
-            if not self._filesystem.exists(path):
-                return (
-                    True,
-                    "{} was scheduled because its output file {} does not exist".format(
-                        target, path,
-                    ),
-                )
+        paths = graph._paths
+        for path_id in graph._outputs[idx]:
+            if not self._filesystem.exists(paths[path_id]):
+                return Reason.OUTPUT_MISSING, path_id
 
         if target.is_source:
-            return (
-                False,
-                "{} was not scheduled because it is a source".format(target),
-            )
+            if self._manifest is not None:
+                self._completed.append(idx)
+            return Reason.SOURCE, -1
+
+        changed_at = self._filesystem.changed_at
+        youngest_in_ts = max(map(changed_at, graph.input_paths(target)))
+        oldest_out_ts = min(map(changed_at, graph.output_paths(target)))
+        if youngest_in_ts > oldest_out_ts:
+            if self._distrust(idx, graph):
+                return self._should_schedule(idx, graph)
+            if self._checksums is not None and self._has_unchanged_checksums(
+                idx, graph
+            ):
+                return Reason.CHECKSUMS_UNCHANGED, -1
+            return Reason.INPUT_NEWER, -1
+        if self._checksums is not None:
+            self._up_to_date.append(idx)
+        if self._manifest is not None:
+            self._completed.append(idx)
+        return Reason.UP_TO_DATE, -1
+
+
+class Reason(IntEnum):
+    """The reason for a decision made by the scheduler."""
+
+    #: A dependency of the target was scheduled.
+    DEPENDENCY_SCHEDULED = 1
+    #: The target has no output files.
+    SINK = 2
+    #: An output file of the target does not exist.
+    OUTPUT_MISSING = 3
+    #: The target has no input files and all of its output files exist.
+    SOURCE = 4
+    #: An input file is newer than an output file.
+    INPUT_NEWER = 5
+    #: An input file is newer than an output file, but the checksums of the
+    #: files of the target are unchanged.
+    CHECKSUMS_UNCHANGED = 6
+    #: All output files are newer than all input files.
+    UP_TO_DATE = 7
+
+
+_SCHEDULED_REASONS = frozenset(
+    [
+        Reason.DEPENDENCY_SCHEDULED,
+        Reason.SINK,
+        Reason.OUTPUT_MISSING,
+        Reason.INPUT_NEWER,
+    ]
+)
+_SCHEDULED_REASON_CODES = sorted(_SCHEDULED_REASONS)
+
+_REASON_TEMPLATES = {
+    Reason.DEPENDENCY_SCHEDULED: (
+        "{target} was scheduled because its dependency {dependency} was scheduled"
+    ),
+    Reason.SINK: "{target} was scheduled because it is a sink",
+    Reason.OUTPUT_MISSING: (
+        "{target} was scheduled because its output file {output_path} does not exist"
+    ),
+    Reason.SOURCE: "{target} was not scheduled because it is a source",
+    Reason.INPUT_NEWER: (
+        "{target} was scheduled because input file {input_path} is newer than "
+        "output file {output_path}"
+    ),
+    Reason.CHECKSUMS_UNCHANGED: (
+        "{target} was not scheduled because input file {input_path} is newer "
+        "than output file {output_path}, but the checksums of its files are "
+        "unchanged"
+    ),
+    Reason.UP_TO_DATE: "{target} was not scheduled because it is up to date",
+}
+
+
+class Decision(
+    collections.namedtuple(
+        "Decision",
+        ["target", "scheduled", "reason", "dependency", "input_path", "output_path"],
+    )
+):
+    """A decision made by the scheduler for a target.
+
+    :ivar Target target: The target.
+    :ivar bool scheduled: Whether the target was scheduled.
+    :ivar Reason reason: The reason for the decision.
+    :ivar Target dependency:
+        The scheduled dependency if `reason` is
+        :attr:`Reason.DEPENDENCY_SCHEDULED`, otherwise `None`.
+    :ivar str input_path:
+        The youngest input file if an input file is newer than an output
+        file, otherwise `None`.
+    :ivar str output_path:
+        The missing output file, or the oldest output file if an input file
+        is newer than an output file, otherwise `None`.
+
+    Converting a decision to a string describes it in English.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        return _REASON_TEMPLATES[self.reason].format(**self._asdict())
+
+
+class _Reasons(collections.abc.Mapping):
+    """Read-only mapping from decided targets to their reasons as strings.
+
+    The reasons are formatted when they are looked up.
+    """
+
+    def __init__(self, scheduler, graph):
+        self._scheduler = scheduler
+        self._graph = graph
+
+    def __getitem__(self, target):
+        if self._scheduler._graph is not self._graph:
+            raise KeyError(target)
+        return str(self._scheduler.explain(target))
+
+    def __iter__(self):
+        codes, nodes = self._scheduler._codes, self._graph._nodes
+        return (nodes[idx] for idx in range(len(codes)) if codes[idx])
+
+    def __len__(self):
+        return len(self._scheduler._codes) - self._scheduler._codes.count(0)
+
+
+class LevelScheduler(Scheduler):
+    """A scheduler deciding all targets of a level of the graph at once.
+
+    This scheduler makes exactly the same decisions as :class:`Scheduler`, but
+    is faster for very large workflows. The existence and timestamps of all
+    files needed are loaded into NumPy arrays indexed by path id. For all
+    targets at once, missing files and the youngest input and oldest output
+    of each target are then found with vectorized reductions over the input
+    and output arrays of the graph. Finally, scheduled dependencies are
+    propagated level by level in topological order, where the level of a
+    target is one more than the highest level of its dependencies.
+
+    NumPy is an optional dependency of *gwf*. Without NumPy, and when
+    checksums are used, targets are scheduled one by one like
+    :class:`Scheduler` does.
+    """
+
+    def __init__(self, filesystem=None):
+        super().__init__(filesystem=filesystem)
+        self._exists = None
+        self._mtimes = None
+
+    @property
+    def _vectorized(self):
+        return numpy is not None and self._checksums is None
+
+    def _reset(self, graph):
+        super()._reset(graph)
+        if numpy is not None:
+            self._exists = numpy.zeros(len(graph._paths), dtype=bool)
+            self._mtimes = numpy.zeros(len(graph._paths))
 
-        youngest_in_ts, youngest_in_path = max(
-            (self._filesystem.changed_at(path), path)
-            for path in target.flattened_inputs()
+    def schedule(self, targets, graph):
+        if not self._vectorized:
+            logger.debug("NumPy is not available or checksums are used")
+            return super().schedule(targets, graph)
+
+        logger.debug("Scheduling %d target(s) level by level", len(targets))
+        if graph is not self._graph:
+            self._reset(graph)
+        self._prefetch(targets, graph)
+        roots = [graph._index[target] for target in targets]
+        order = list(graph._postorder(roots, self._visited))
+        with timer("Scheduled targets in %.3fms", logger=logger):
+            self._decide_all(order, graph)
+        self._finish(graph)
+        return self._scheduled, self._reasons
+
+    def should_schedule(self, target, graph):
+        self.schedule([target], graph)
+        return target in self._scheduled, self._reasons[target]
+
+    def _load_stats(self, path_ids, graph):
+        """Load existence and timestamps of the files in `path_ids`."""
+        paths, filesystem = graph._paths, self._filesystem
+        path_ids = path_ids.tolist()
+        exists = [False] * len(path_ids)
+        mtimes = [0.0] * len(path_ids)
+        if isinstance(filesystem, CachedFilesystem):
+            for pos, path_id in enumerate(path_ids):
+                st = filesystem.stat(paths[path_id])
+                if st is not None:
+                    exists[pos] = True
+                    mtimes[pos] = st.mtime
+        else:
+            for pos, path_id in enumerate(path_ids):
+                path = paths[path_id]
+                if filesystem.exists(path):
+                    exists[pos] = True
+                    mtimes[pos] = filesystem.changed_at(path)
+        self._exists[path_ids] = exists
+        self._mtimes[path_ids] = mtimes
+
+    def _decide_locally(self, targets, graph):
+        """Decide `targets` as if none of their dependencies were scheduled.
+
+        Returns arrays of the reasons and reason ids of the targets. The
+        reason is zero for targets which can not be decided, since scheduling
+        them one by one raises an error.
+        """
+        nodes = graph._nodes
+        num_targets = len(targets)
+        in_ids, in_segments, in_bounds = _gather(graph._inputs, targets)
+        out_ids, out_segments, out_bounds = _gather(graph._outputs, targets)
+        in_lengths = numpy.diff(in_bounds)
+        out_lengths = numpy.diff(out_bounds)
+
+        in_exists = self._exists[in_ids]
+        is_source_file = _as_numpy(graph._providers)[in_ids] < 0
+        missing_source = _any(~in_exists & is_source_file, in_segments, num_targets)
+        missing_input = _any(~in_exists, in_segments, num_targets)
+        missing_output = _first(~self._exists[out_ids], out_segments, num_targets)
+        youngest_input = _reduce(
+            numpy.maximum, self._mtimes[in_ids], in_bounds, -numpy.inf
         )
-        logger.debug(
-            "%s is the youngest input file of %s with timestamp %s",
-            youngest_in_path,
-            target,
-            youngest_in_ts,
+        oldest_output = _reduce(
+            numpy.minimum, self._mtimes[out_ids], out_bounds, numpy.inf
         )
 
-        oldest_out_ts, oldest_out_path = min(
-            (self._filesystem.changed_at(path), path)
-            for path in target.flattened_outputs()
+        # Only targets whose files flatten to nothing can be sinks or sources.
+        is_sink = numpy.zeros(num_targets, dtype=bool)
+        for pos in numpy.flatnonzero(out_lengths == 0).tolist():
+            is_sink[pos] = nodes[targets[pos]].is_sink
+        is_source = numpy.zeros(num_targets, dtype=bool)
+        for pos in numpy.flatnonzero(in_lengths == 0).tolist():
+            is_source[pos] = nodes[targets[pos]].is_source
+
+        # Reasons are assigned in reverse order of precedence, such that each
+        # check overrides the checks made after it when scheduling one by one.
+        reasons = numpy.full(num_targets, Reason.UP_TO_DATE, dtype=numpy.uint8)
+        reasons[youngest_input > oldest_output] = Reason.INPUT_NEWER
+        # Timestamps can not be compared if a provided input is missing or the
+        # files of the target flatten to nothing.
+        reasons[missing_input | (in_lengths == 0) | (out_lengths == 0)] = 0
+        reasons[is_source] = Reason.SOURCE
+        has_missing_output = missing_output >= 0
+        reasons[has_missing_output] = Reason.OUTPUT_MISSING
+        reasons[is_sink] = Reason.SINK
+        reasons[missing_source] = 0
+
+        reason_ids = numpy.full(num_targets, -1, dtype=_INDEX_TYPECODE)
+        reason_ids[has_missing_output] = out_ids[missing_output[has_missing_output]]
+        return reasons, reason_ids
+
+    def _decide_all(self, order, graph):
+        if not self._vectorized:
+            return super()._decide_all(order, graph)
+        if not order:
+            return
+
+        targets = numpy.array(order, dtype=numpy.intp)
+        num_targets = len(targets)
+        in_ids, _, _ = _gather(graph._inputs, targets)
+        out_ids, _, _ = _gather(graph._outputs, targets)
+        self._load_stats(numpy.union1d(in_ids, out_ids), graph)
+        reasons, reason_ids = self._decide_locally(targets, graph)
+
+        # Dependencies decided before are taken from the flags, while
+        # dependencies among the targets are decided level by level.
+        flags = numpy.frombuffer(self._flags, dtype=numpy.uint8)
+        position = numpy.full(len(graph._nodes), -1, dtype=numpy.intp)
+        position[targets] = numpy.arange(num_targets)
+        dep_ids, dep_segments, _ = _gather(graph._dependencies, targets)
+        dep_positions = position[dep_ids]
+        decided = dep_positions < 0
+        levels = _Levels(
+            dep_positions[~decided], dep_segments[~decided], num_targets
         )
-        logger.debug(
-            "%s is the oldest output file of %s with timestamp %s",
-            oldest_out_path,
-            target,
-            youngest_in_ts,
+        decided_scheduled = _any(
+            decided & (flags[dep_ids] != 0), dep_segments, num_targets
         )
 
-        if youngest_in_ts > oldest_out_ts:
-            return (
-                True,
-                "{} was scheduled because input file {} is newer than output file {}".format(
-                    target, youngest_in_path, oldest_out_path,
-                ),
+        while True:
+            local_scheduled = numpy.isin(reasons, _SCHEDULED_REASON_CODES)
+            dep_scheduled = levels.propagate(local_scheduled, decided_scheduled)
+            undecidable = numpy.flatnonzero((reasons == 0) & ~dep_scheduled)
+            first_error = undecidable[0] if len(undecidable) else num_targets
+
+            # Targets with trusted manifest records which are found to be out
+            # of date are decided again with the actual stats of their outputs.
+            redo = [
+                pos
+                for pos in numpy.flatnonzero(
+                    (reasons == Reason.INPUT_NEWER) & ~dep_scheduled
+                ).tolist()
+                if pos < first_error and self._distrust(int(targets[pos]), graph)
+            ]
+            if not redo:
+                break
+            redo = numpy.array(redo, dtype=numpy.intp)
+            redo_out_ids, _, _ = _gather(graph._outputs, targets[redo])
+            self._load_stats(redo_out_ids, graph)
+            reasons[redo], reason_ids[redo] = self._decide_locally(
+                targets[redo], graph
+            )
+
+        scheduled = local_scheduled | dep_scheduled
+        dep_flags = numpy.where(decided, flags[dep_ids] != 0, False)
+        dep_flags[~decided] = scheduled[dep_positions[~decided]]
+        first_dep = _first(dep_flags, dep_segments, num_targets)
+        reasons[dep_scheduled] = Reason.DEPENDENCY_SCHEDULED
+        reason_ids[dep_scheduled] = dep_ids[first_dep[dep_scheduled]]
+
+        flags[targets] = scheduled
+        numpy.frombuffer(self._codes, dtype=numpy.uint8)[targets] = reasons
+        numpy.frombuffer(self._reason_ids, dtype=_INDEX_TYPECODE)[targets] = (
+            reason_ids
+        )
+
+        if first_error < num_targets:
+            # Deciding the target that scheduling one by one would have reached
+            # first raises the same error. The traversal must be started over
+            # if we're called again.
+            self._graph = None
+            self._should_schedule(int(targets[first_error]), graph)
+
+        nodes, scheduled_deps = graph._nodes, self._scheduled
+        if scheduled_deps:
+            for idx in targets[~scheduled].tolist():
+                scheduled_deps.pop(nodes[idx], None)
+        dep_bounds = numpy.zeros(num_targets + 1, dtype=numpy.intp)
+        numpy.cumsum(
+            numpy.bincount(dep_segments[dep_flags], minlength=num_targets),
+            out=dep_bounds[1:],
+        )
+        dep_ids = dep_ids[dep_flags].tolist()
+        bounds = dep_bounds.tolist()
+        for pos in numpy.flatnonzero(scheduled).tolist():
+            scheduled_deps[nodes[targets[pos]]] = set(
+                nodes[dep] for dep in dep_ids[bounds[pos] : bounds[pos + 1]]
             )
-        return (False, "{} was not scheduled because it is up to date".format(target))
+        if self._manifest is not None:
+            completed = (reasons == Reason.SOURCE) | (reasons == Reason.UP_TO_DATE)
+            self._completed.extend(targets[completed].tolist())
 
 
-def schedule(targets, graph, filesystem=CachedFilesystem()):
+class _Levels:
+    """The levels of a set of targets in topological order.
+
+    The dependencies among the targets are given as edges from the position
+    of a dependency, `sources`, to the position of the target depending on
+    it, `sinks`.
+    """
+
+    def __init__(self, sources, sinks, num_targets):
+        self.num_targets = num_targets
+        self.num_deps = numpy.bincount(sinks, minlength=num_targets)
+        order = numpy.argsort(sources, kind="stable")
+        self.dependents = sinks[order]
+        self.bounds = numpy.zeros(num_targets + 1, dtype=numpy.intp)
+        numpy.cumsum(
+            numpy.bincount(sources, minlength=num_targets), out=self.bounds[1:]
+        )
+
+    def propagate(self, local, initial):
+        """Return for each target whether one of its dependencies is marked.
+
+        A target is marked if `local` is true for it or one of its
+        dependencies is marked. `initial` marks targets with a marked
+        dependency outside of the set of targets.
+        """
+        num_deps = self.num_deps.copy()
+        marked = initial.copy()
+        level = numpy.flatnonzero(num_deps == 0)
+        while len(level):
+            starts = self.bounds[level]
+            lengths = self.bounds[level + 1] - starts
+            segments = numpy.repeat(numpy.arange(len(level)), lengths)
+            offsets = numpy.arange(len(segments)) - numpy.repeat(
+                numpy.cumsum(lengths) - lengths, lengths
+            )
+            dependents = self.dependents[starts[segments] + offsets]
+            level_marked = local[level] | marked[level]
+            marked[dependents[level_marked[segments]]] = True
+            numpy.subtract.at(num_deps, dependents, 1)
+            level = numpy.unique(dependents[num_deps[dependents] == 0])
+        return marked
+
+
+def _as_numpy(buf):
+    """Return a NumPy view of `buf`, an array of indices, without copying it."""
+    if not len(buf):
+        return numpy.zeros(0, dtype=_INDEX_TYPECODE)
+    return numpy.frombuffer(buf, dtype=_INDEX_TYPECODE)
+
+
+def _gather(csr, rows):
+    """Return the concatenated rows `rows` of `csr`.
+
+    Returns a tuple `(ids, segments, bounds)`, where ``segments[i]`` is the
+    position in `rows` of the row containing ``ids[i]``, and row ``rows[j]``
+    is stored in ``ids[bounds[j]:bounds[j + 1]]``.
+    """
+    offsets, indices = _as_numpy(csr.offsets), _as_numpy(csr.indices)
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    bounds = numpy.zeros(len(rows) + 1, dtype=numpy.intp)
+    numpy.cumsum(lengths, out=bounds[1:])
+    segments = numpy.repeat(numpy.arange(len(rows)), lengths)
+    positions = numpy.arange(bounds[-1]) - bounds[segments] + starts[segments]
+    return indices[positions], segments, bounds
+
+
+def _any(mask, segments, num_segments):
+    """Return for each segment whether `mask` is true for any element of it."""
+    result = numpy.zeros(num_segments, dtype=bool)
+    result[segments[mask]] = True
+    return result
+
+
+def _first(mask, segments, num_segments):
+    """Return the position of the first element of each segment in `mask`.
+
+    The position is -1 for segments without any elements in `mask`.
+    """
+    positions = numpy.flatnonzero(mask)
+    found, first = numpy.unique(segments[positions], return_index=True)
+    result = numpy.full(num_segments, -1, dtype=numpy.intp)
+    result[found] = positions[first]
+    return result
+
+
+def _reduce(ufunc, values, bounds, empty):
+    """Reduce each segment of `values` with `ufunc`.
+
+    Segment ``i`` is ``values[bounds[i]:bounds[i + 1]]``. The result is
+    `empty` for empty segments.
+    """
+    result = numpy.full(len(bounds) - 1, empty)
+    nonempty = bounds[1:] > bounds[:-1]
+    if len(values):
+        result[nonempty] = ufunc.reduceat(values, bounds[:-1][nonempty])
+    return result
+
+
+#: Scheduler classes by the name used in the ``scheduler`` configuration key.
+SCHEDULERS = {"depth-first": Scheduler, "level": LevelScheduler}
+
+
+def schedule(targets, graph, filesystem=None, engine="depth-first"):
     """Schedule one or more targets.
 
     Scheduling a target will determine whether the target needs to run.
@@ -619,8 +2391,11 @@ def schedule(targets, graph, filesystem=CachedFilesystem()):
     Returns a tuple `(scheduled, reasons)` where `scheduled` is a map from
     a target to its scheduled direct dependencies, and `reasons` is a map from
     a target to a string describing why (or why not) the target was scheduled.
+
+    `engine` is the name of the scheduler class in :data:`SCHEDULERS` used to
+    schedule the targets. All schedulers make the same decisions.
     """
-    return Scheduler(filesystem=filesystem).schedule(targets, graph)
+    return SCHEDULERS[engine](filesystem=filesystem).schedule(targets, graph)
 
 
 def get_status(target, scheduled, backend):
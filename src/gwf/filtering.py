@@ -1,4 +1,8 @@
 import fnmatch
+import glob
+import os.path
+
+from .exceptions import GWFError
 
 
 class ApplyMixin:
@@ -125,3 +129,50 @@ def filter_names(targets, patterns):
     This function is a simple wrapper around :class:`NameFilter`.
     """
     return NameFilter(patterns=patterns).apply(targets)
+
+
+def _has_magic(pattern):
+    return any(char in pattern for char in "*?[")
+
+
+def match_targets_and_paths(graph, patterns):
+    """Return the targets and paths in `graph` matched by `patterns`.
+
+    Each pattern is first matched against the names of the targets in `graph`
+    like in :func:`filter_names`. If it does not match any target name, it is
+    treated as a path relative to the current working directory, or as a glob
+    pattern matching such paths. Only paths used as input or output by a
+    target in `graph` are returned.
+
+    Returns a tuple `(targets, paths)`.
+
+    :raises gwf.exceptions.GWFError:
+        If a pattern matches neither a target nor a path used in the workflow.
+    """
+    targets, paths = [], []
+    for pattern in patterns:
+        if pattern in graph.targets:
+            targets.append(graph.targets[pattern])
+            continue
+        if _has_magic(pattern):
+            names = fnmatch.filter(graph.targets, pattern)
+            if names:
+                targets.extend(graph.targets[name] for name in names)
+                continue
+            candidates = glob.glob(pattern, recursive=True)
+        else:
+            candidates = [pattern]
+
+        matched = [
+            path
+            for path in map(os.path.abspath, candidates)
+            if path in graph.consumers or path in graph.provides
+        ]
+        if not matched:
+            raise GWFError(
+                '"{}" does not match any target or file in the workflow.'.format(
+                    pattern
+                )
+            )
+        paths.extend(matched)
+    return targets, paths
@@ -0,0 +1,164 @@
+"""Persistent cache of dependency graphs.
+
+Loading a workflow means executing the workflow file and building the
+dependency graph from scratch, which is expensive for large workflows. The
+graph cache stores the graph in the `.gwf` directory together with a
+fingerprint of everything the workflow depended on when it was loaded:
+
+* the workflow file itself and any workflow files it included,
+* all modules imported while loading the workflow,
+* the results of all patterns expanded with :func:`gwf.Workflow.glob` and
+  :func:`gwf.Workflow.iglob`.
+
+The cached graph is used as long as the fingerprint is unchanged. Workflows
+that read other files (e.g. a sample sheet) with :func:`open` or use
+:func:`python:glob.glob` directly can not be tracked and the cache should be
+rebuilt manually when these files change.
+"""
+
+import hashlib
+import logging
+import os
+import os.path
+import pickle
+from glob import glob as _glob
+
+from . import __version__
+from .core import Graph
+from .plan import plan_path, read_plan
+from .utils import record_workflow_dependencies, timer
+from .workflow import Workflow
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = ".gwf"
+
+#: Version of the cache file format. Bump this whenever the format or the
+#: pickled representation of targets and graphs changes.
+CACHE_FORMAT_VERSION = 4
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _fingerprint(dependencies):
+    files = sorted((path, _file_stamp(path)) for path in dependencies.files)
+    globs = sorted(
+        (pattern, recursive, sorted(_glob(pattern, recursive=recursive)))
+        for pattern, recursive in dependencies.globs
+    )
+    return {"files": files, "globs": globs}
+
+
+def _is_fresh(fingerprint):
+    for path, stamp in fingerprint["files"]:
+        if _file_stamp(path) != stamp:
+            logger.debug("Graph cache is stale since %s changed", path)
+            return False
+    for pattern, recursive, matches in fingerprint["globs"]:
+        if sorted(_glob(pattern, recursive=recursive)) != matches:
+            logger.debug("Graph cache is stale since %s matches changed", pattern)
+            return False
+    return True
+
+
+class GraphCache:
+    """A graph cache for the workflow given by `workflow_path`.
+
+    Each workflow path (as given by the ``-f/--file`` flag) has its own cache
+    file in `cache_dir`.
+    """
+
+    def __init__(self, workflow_path, cache_dir=CACHE_DIR):
+        self.workflow_path = workflow_path
+        self.key = "{}:{}".format(os.getcwd(), workflow_path)
+        digest = hashlib.sha1(self.key.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, "graph-cache-{}.pickle".format(digest))
+
+    def _read_header(self, fileobj):
+        header = pickle.load(fileobj)
+        if (
+            header.get("format") != CACHE_FORMAT_VERSION
+            or header.get("gwf") != __version__
+            or header.get("key") != self.key
+        ):
+            logger.debug("Graph cache was written by another version of gwf")
+            return None
+        return header
+
+    def load(self):
+        """Return the cached graph or `None` if the cache is missing or stale."""
+        try:
+            with timer("Loaded cached graph in %.3fms", logger=logger):
+                with open(self.path, "rb") as fileobj:
+                    header = self._read_header(fileobj)
+                    if header is None or not _is_fresh(header["fingerprint"]):
+                        return None
+                    return pickle.load(fileobj)
+        except FileNotFoundError:
+            logger.debug("Graph cache %s does not exist", self.path)
+        except Exception:
+            logger.debug("Graph cache %s is unreadable", self.path, exc_info=True)
+        return None
+
+    def store(self, graph, dependencies):
+        """Store `graph` with a fingerprint of `dependencies`."""
+        header = {
+            "format": CACHE_FORMAT_VERSION,
+            "gwf": __version__,
+            "key": self.key,
+            "fingerprint": _fingerprint(dependencies),
+        }
+        tmp_path = self.path + ".new"
+        try:
+            with timer("Stored graph cache in %.3fms", logger=logger):
+                with open(tmp_path, "wb") as fileobj:
+                    pickle.dump(header, fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+                    pickle.dump(graph, fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.path)
+        except (OSError, pickle.PicklingError, AttributeError, TypeError):
+            # Targets may contain objects that can not be pickled. Then we
+            # just don't cache the graph.
+            logger.warning("Could not store graph cache", exc_info=True)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def load_graph(config, plan=False):
+    """Return the dependency graph of the workflow specified by `config`.
+
+    If `plan` is true, the graph is loaded from the plan compiled from the
+    workflow by ``gwf compile``.
+
+    If `config["graph_cache"]` is true, the graph is loaded from the graph
+    cache unless the cache is stale. If `config["rebuild_cache"]` is true,
+    the workflow is always loaded and the cache is rebuilt.
+    """
+    if plan:
+        return read_plan(plan_path(config["file"]))
+
+    use_cache = config.get("graph_cache", False)
+    rebuild = config.get("rebuild_cache", False)
+    if not (use_cache or rebuild):
+        workflow = Workflow.from_config(config)
+        return Graph.from_targets(workflow.targets)
+
+    cache = GraphCache(config["file"])
+    if not rebuild:
+        graph = cache.load()
+        if graph is not None:
+            logger.debug("Using cached graph from %s", cache.path)
+            return graph
+
+    with record_workflow_dependencies() as dependencies:
+        workflow = Workflow.from_config(config)
+    graph = Graph.from_targets(workflow.targets)
+    cache.store(graph, dependencies)
+    return graph
@@ -0,0 +1,230 @@
+"""Manifest of completed targets.
+
+To decide that a completed target is up to date, the scheduler must check the
+timestamps of all of its input and output files. On network file systems,
+checking the outputs of many targets is slow. The completion manifest is an
+append-only file in the `.gwf` directory with a record for each completed
+target, containing a fingerprint of its spec and the modification times, sizes
+and inodes of its outputs, as well as the modification times of the
+directories containing them.
+
+The scheduler trusts the record of a target if its spec is unchanged and the
+directories containing its outputs have not been modified since the record was
+written, which is checked with a single stat call per directory. Otherwise,
+and for a random sample of the remaining targets, the outputs are checked as
+usual. Outputs modified in place without creating a new file do not change
+the modification time of their directory and are thus only detected when the
+target is sampled, or when the target is found to be out of date according to
+its record, in which case its outputs are checked before it is scheduled.
+
+Records are written by the scheduler when it finds a target to be up to date
+by checking its files. Backends do not write records when a target completes,
+since the directories containing its outputs were then modified too recently
+for their modification times to be trusted. The target is recorded the next
+time the scheduler checks it instead.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+import os.path
+import random
+import re
+
+from .statcache import FileStat, trusted_dir_mtime_ns
+from .utils import timer
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = os.path.join(".gwf", "completed.jsonl")
+
+#: Version of the record format. Records with another version are ignored.
+FORMAT_VERSION = 1
+
+#: Default fraction of the targets with a trustworthy record checked anyway.
+DEFAULT_SAMPLE_RATE = 0.01
+
+# The manifest is compacted when it contains this many more lines than there
+# are targets with records.
+_COMPACT_SLACK = 1000
+
+# The default representation of objects contains their address.
+_ADDRESS_RE = re.compile(r" at 0x[0-9a-fA-F]+>")
+
+
+def spec_fingerprint(target):
+    """Return a fingerprint of the spec of `target`.
+
+    Spec templates are fingerprinted by their format string and arguments,
+    such that they do not have to be rendered. Templates with arguments whose
+    representation contains their address, which changes between runs, are
+    rendered instead.
+    """
+    spec = target.raw_spec
+    if not isinstance(spec, str):
+        key = repr((spec.template, spec.args, sorted(spec.kwargs.items())))
+        spec = spec.render() if _ADDRESS_RE.search(key) else key
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()
+
+
+class CompletionManifest:
+    """A manifest of completed targets stored in `path`.
+
+    :param str path: Path of the manifest file.
+    :param float sample_rate:
+        Fraction of the targets with a trustworthy record that are checked
+        anyway.
+    """
+
+    def __init__(self, path=MANIFEST_PATH, sample_rate=DEFAULT_SAMPLE_RATE):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.trusted = set()
+        self._records = None
+        self._num_lines = 0
+        self._pending = []
+        self._observed = {}
+
+    def _load(self):
+        self._records = {}
+        try:
+            with open(self.path) as fileobj:
+                for line in fileobj:
+                    self._num_lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A partially written record.
+                        continue
+                    if (
+                        not isinstance(record, dict)
+                        or record.get("version") != FORMAT_VERSION
+                    ):
+                        continue
+                    self._records[record["target"]] = record
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logger.debug("Manifest %s is unreadable", self.path, exc_info=True)
+
+    @property
+    def records(self):
+        """A dictionary mapping target names to their latest record."""
+        if self._records is None:
+            with timer("Loaded completion manifest in %.3fms", logger=logger):
+                self._load()
+        return self._records
+
+    def _dir_mtime_ns(self, dirname):
+        """Return the modification time of `dirname` if trustworthy."""
+        if dirname not in self._observed:
+            self._observed[dirname] = trusted_dir_mtime_ns(dirname)
+        return self._observed[dirname]
+
+    def _is_trusted(self, target, record, output_paths):
+        if record["spec"] != spec_fingerprint(target):
+            return False
+        recorded_paths = set(path for path, *_ in record["outputs"])
+        if recorded_paths != set(output_paths(target)):
+            return False
+        for dirname, mtime_ns in record["dirs"]:
+            if mtime_ns is None or self._dir_mtime_ns(dirname) != mtime_ns:
+                return False
+        return random.random() >= self.sample_rate
+
+    def lookup(self, targets, output_paths):
+        """Return the recorded stats of the outputs of trusted `targets`.
+
+        `output_paths(target)` must return the normalized output paths of a
+        target, e.g. :meth:`gwf.core.Graph.output_paths`. Returns a dictionary
+        mapping output paths to :class:`~gwf.statcache.FileStat`. The names of
+        the trusted targets are added to :attr:`trusted`.
+        """
+        found = {}
+        records = self.records
+        num_targets = 0
+        with timer("Checked completion manifest in %.3fms", logger=logger):
+            for target in targets:
+                num_targets += 1
+                record = records.get(target.name)
+                if record is None or not self._is_trusted(
+                    target, record, output_paths
+                ):
+                    continue
+                self.trusted.add(target.name)
+                for path, mtime_ns, size, inode in record["outputs"]:
+                    sec, nsec = divmod(mtime_ns, 10 ** 9)
+                    found[path] = FileStat(sec + nsec * 1e-9, mtime_ns, size, inode)
+        logger.debug(
+            "Completion manifest had trusted records for %d of %d target(s)",
+            len(self.trusted),
+            num_targets,
+        )
+        return found
+
+    def record(self, target, stats=None):
+        """Record that `target` completed.
+
+        `stats` maps each output path of the target to its
+        :class:`~gwf.statcache.FileStat`. If not given, the outputs are
+        stat'ed. Nothing is recorded if an output does not exist. The record
+        is written by :meth:`save`.
+        """
+        outputs = []
+        dirs = collections.OrderedDict()
+        for path in target.flattened_outputs() if stats is None else stats:
+            if stats is None:
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    return
+                mtime_ns, size, inode = st.st_mtime_ns, st.st_size, st.st_ino
+            else:
+                stat = stats.get(path)
+                if stat is None:
+                    return
+                mtime_ns, size, inode = stat.mtime_ns, stat.size, stat.inode
+            outputs.append([path, mtime_ns, size, inode])
+            dirs[os.path.dirname(path)] = None
+        self._pending.append(
+            {
+                "version": FORMAT_VERSION,
+                "target": target.name,
+                "spec": spec_fingerprint(target),
+                "outputs": outputs,
+                "dirs": [[d, self._dir_mtime_ns(d)] for d in dirs],
+            }
+        )
+
+    def save(self):
+        """Append pending records to the manifest, compacting it if needed."""
+        if not self._pending:
+            return
+        lines = "".join(json.dumps(record) + "\n" for record in self._pending)
+        try:
+            if (
+                self._records is not None
+                and self._num_lines > len(self._records) + _COMPACT_SLACK
+            ):
+                self._compact()
+            with open(self.path, "a") as fileobj:
+                fileobj.write(lines)
+        except OSError:
+            logger.warning("Could not write completion manifest", exc_info=True)
+            return
+        if self._records is not None:
+            for record in self._pending:
+                self._records[record["target"]] = record
+            self._num_lines += len(self._pending)
+        self._pending = []
+
+    def _compact(self):
+        tmp_path = self.path + ".new"
+        with timer("Compacted completion manifest in %.3fms", logger=logger):
+            with open(tmp_path, "w") as fileobj:
+                for record in self._records.values():
+                    fileobj.write(json.dumps(record) + "\n")
+            os.replace(tmp_path, self.path)
+        self._num_lines = len(self._records)
@@ -0,0 +1,318 @@
+"""Compiled execution plans.
+
+A plan is a compact, versioned binary file containing everything needed to
+schedule and submit the targets of a workflow: the targets, their normalized
+and flattened input and output paths, options and specs, and the dependency
+relations between targets.
+
+Plans are written by the ``gwf compile`` command and can be loaded by
+``gwf run``, ``gwf status`` and ``gwf info`` using the ``--plan`` flag. Loading
+a plan does not execute the workflow file or any other user code.
+
+The file starts with a header and a section table::
+
+    magic (8 bytes) | format version (u32) | number of sections (u32)
+    name (8 bytes) | offset (u64) | length (u64)    (one per section)
+
+All sections are aligned to 8 bytes. Integer sections are stored as native
+machine integers and are memory-mapped when the plan is loaded, so the
+dependency arrays of the graph are never copied or turned into Python objects.
+Strings are only decoded when they are used.
+"""
+
+import collections.abc
+import hashlib
+import json
+import logging
+import mmap
+import os
+import os.path
+import struct
+import sys
+from array import array
+
+from . import __version__
+from .core import _INDEX_TYPECODE, Graph, Target, _CSR
+from .exceptions import GWFError
+from .utils import OptionSet, timer
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GWFPLAN\0"
+
+#: Version of the plan file format. Bump this whenever the format changes.
+FORMAT_VERSION = 2
+
+PLAN_DIR = ".gwf"
+
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<8sQQ")
+_ALIGNMENT = 8
+
+_OFFSET_TYPECODE = "q"
+
+# Number of integers stored per target in the "targets" section: the string
+# identifiers of the name, working directory and spec, and the index of the
+# option set.
+_TARGET_FIELDS = 4
+
+
+def plan_path(workflow_path, plan_dir=PLAN_DIR):
+    """Return the path of the plan compiled from the workflow `workflow_path`."""
+    key = "{}:{}".format(os.getcwd(), workflow_path)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(plan_dir, "plan-{}.bin".format(digest))
+
+
+class _StringTableBuilder:
+    def __init__(self):
+        self._ids = {}
+        self.blob = bytearray()
+        self.offsets = array(_OFFSET_TYPECODE, [0])
+
+    def add(self, string):
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string_id = self._ids[string] = len(self.offsets) - 1
+            self.blob += string.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return string_id
+
+
+class _StringTable(collections.abc.Sequence):
+    """Sequence of strings decoded on demand from a memory-mapped blob."""
+
+    def __init__(self, blob, offsets, length):
+        self._blob = blob
+        self._offsets = offsets
+        self._length = length
+        self._ids = None
+
+    def get_id(self, string):
+        """Return the index of `string` or `None` if it is not in the table."""
+        if self._ids is None:
+            self._ids = {value: idx for idx, value in enumerate(self)}
+        return self._ids.get(string)
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self._length:
+            raise IndexError(idx)
+        return str(self._blob[self._offsets[idx] : self._offsets[idx + 1]], "utf-8")
+
+    def __len__(self):
+        return self._length
+
+
+def _to_json(obj, what, target):
+    try:
+        return json.dumps(obj, sort_keys=True)
+    except (TypeError, ValueError):
+        raise GWFError(
+            'The {} of target "{}" can not be stored in a plan since it '
+            "contains values that are not strings, numbers or booleans.".format(
+                what, target.name
+            )
+        )
+
+
+def write_plan(graph, path, workflow_path=None):
+    """Write a plan for all targets in `graph` to `path`."""
+    if array(_INDEX_TYPECODE).itemsize != 4:
+        raise GWFError("Plans are not supported on this platform.")
+
+    strings = _StringTableBuilder()
+    for path_str in graph._paths:
+        strings.add(path_str)
+
+    option_sets = {}
+    targets = array(_INDEX_TYPECODE)
+    protected = {}
+    for idx, target in enumerate(graph._nodes):
+        options_key = _to_json(target.option_set.copy(), "options", target)
+        options_idx = option_sets.setdefault(options_key, len(option_sets))
+        targets.extend(
+            (
+                strings.add(target.name),
+                strings.add(target.working_dir),
+                strings.add(target.spec),
+                options_idx,
+            )
+        )
+        if target.protected:
+            protected[idx] = sorted(target.protected)
+
+    meta = {
+        "gwf": __version__,
+        "workflow": workflow_path,
+        "byteorder": sys.byteorder,
+        "num_targets": len(graph._nodes),
+        "num_paths": len(graph._paths),
+        "options": [json.loads(key) for key in option_sets],
+        "protected": protected,
+    }
+
+    sections = [
+        (b"meta", json.dumps(meta).encode("utf-8")),
+        (b"strings", bytes(strings.blob)),
+        (b"stroffs", strings.offsets.tobytes()),
+        (b"targets", targets.tobytes()),
+        (b"provider", array(_INDEX_TYPECODE, graph._providers).tobytes()),
+        (b"toporder", array(_INDEX_TYPECODE, graph._topological_order).tobytes()),
+    ]
+    for name, csr in (
+        (b"in", graph._inputs),
+        (b"out", graph._outputs),
+        (b"dep", graph._dependencies),
+        (b"rdep", graph._dependents),
+        (b"use", graph._consumers),
+    ):
+        offsets = array(_INDEX_TYPECODE, csr.offsets)
+        indices = array(_INDEX_TYPECODE, csr.indices)
+        sections.append((name + b"off", offsets.tobytes()))
+        sections.append((name + b"idx", indices.tobytes()))
+
+    def align(offset):
+        return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+    offset = align(_HEADER.size + _SECTION.size * len(sections))
+    table = []
+    for name, data in sections:
+        table.append((name, offset, len(data)))
+        offset = align(offset + len(data))
+
+    tmp_path = path + ".new"
+    with timer("Wrote plan in %.3fms", logger=logger):
+        with open(tmp_path, "wb") as fileobj:
+            fileobj.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(sections)))
+            for name, offset, length in table:
+                fileobj.write(_SECTION.pack(name, offset, length))
+            for (name, data), (_, offset, _) in zip(sections, table):
+                fileobj.write(b"\0" * (offset - fileobj.tell()))
+                fileobj.write(data)
+        os.replace(tmp_path, path)
+
+
+def _incompatible(path, reason):
+    return GWFError(
+        'The plan "{}" can not be used since {}. Run "gwf compile" to compile '
+        "the workflow again.".format(path, reason)
+    )
+
+
+def read_plan(path):
+    """Return a :class:`gwf.core.Graph` loaded from the plan in `path`.
+
+    :raises gwf.exceptions.GWFError:
+        If the plan does not exist or was written by an incompatible version
+        of *gwf*.
+    """
+    try:
+        with open(path, "rb") as fileobj:
+            buf = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        raise GWFError(
+            'The plan "{}" does not exist. Run "gwf compile" to compile the '
+            "workflow.".format(path)
+        )
+
+    with timer("Loaded plan in %.3fms", logger=logger):
+        view = memoryview(buf)
+        if len(view) < _HEADER.size:
+            raise _incompatible(path, "it is not a plan file")
+        magic, version, num_sections = _HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise _incompatible(path, "it is not a plan file")
+        if version != FORMAT_VERSION:
+            raise _incompatible(
+                path,
+                "it has plan format version {}, expected {}".format(
+                    version, FORMAT_VERSION
+                ),
+            )
+
+        sections = {}
+        for num in range(num_sections):
+            name, offset, length = _SECTION.unpack_from(
+                view, _HEADER.size + num * _SECTION.size
+            )
+            sections[name.rstrip(b"\0").decode("ascii")] = view[
+                offset : offset + length
+            ]
+
+        meta = json.loads(str(sections["meta"], "utf-8"))
+        if meta["byteorder"] != sys.byteorder:
+            raise _incompatible(path, "it was compiled on another platform")
+
+        def ints(name, typecode=_INDEX_TYPECODE):
+            return sections[name].cast("B").cast(typecode)
+
+        def csr(name):
+            return _CSR(ints(name + "off"), ints(name + "idx"))
+
+        strings = sections["strings"]
+        offsets = ints("stroffs", _OFFSET_TYPECODE)
+        string_table = _StringTable(strings, offsets, len(offsets) - 1)
+
+        option_sets = [OptionSet.intern(options) for options in meta["options"]]
+        protected = meta["protected"]
+        target_fields = ints("targets")
+        inputs = csr("in")
+        outputs = csr("out")
+
+        nodes = []
+        for idx in range(meta["num_targets"]):
+            name_id, wd_id, spec_id, options_idx = target_fields[
+                idx * _TARGET_FIELDS : (idx + 1) * _TARGET_FIELDS
+            ]
+            nodes.append(
+                Target._from_normalized(
+                    name=string_table[name_id],
+                    inputs=_PathList(string_table, inputs, idx),
+                    outputs=_PathList(string_table, outputs, idx),
+                    options=option_sets[options_idx],
+                    working_dir=string_table[wd_id],
+                    spec=string_table[spec_id],
+                    protect=protected.get(str(idx), ()),
+                    order=idx,
+                )
+            )
+
+        graph = Graph.__new__(Graph)
+        graph.__setstate__(
+            {
+                "_nodes": nodes,
+                "_paths": _StringTable(strings, offsets, meta["num_paths"]),
+                "_providers": ints("provider"),
+                "_inputs": inputs,
+                "_outputs": outputs,
+                "_dependencies": csr("dep"),
+                "_dependents": csr("rdep"),
+                "_consumers": csr("use"),
+                "_topological_order": ints("toporder"),
+            }
+        )
+    return graph
+
+
+class _PathList(collections.abc.Sequence):
+    """The normalized input or output paths of a target loaded from a plan."""
+
+    def __init__(self, strings, csr, idx):
+        self._strings = strings
+        self._path_ids = csr[idx]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._strings[i] for i in self._path_ids[idx]]
+        return self._strings[self._path_ids[idx]]
+
+    def __len__(self):
+        return len(self._path_ids)
+
+    def __reduce__(self):
+        # The path list refers to the memory-mapped plan, so it is pickled as
+        # a plain list, e.g. when a target is sent to the local backend.
+        return (list, (list(self),))
+
+    def __repr__(self):
+        return repr(list(self))
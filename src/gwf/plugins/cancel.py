@@ -2,9 +2,8 @@ import click
 
 from ..backends import Backend, Status
 from ..backends.exceptions import UnsupportedOperationError
-from ..core import Graph
 from ..filtering import filter_names
-from ..workflow import Workflow
+from ..graphcache import load_graph
 
 
 def cancel_many(backend, targets):
@@ -32,8 +31,7 @@ def cancel(obj, targets, force):
             "This will cancel all targets! Do you want to continue?", abort=True
         )
 
-    workflow = Workflow.from_config(obj)
-    graph = Graph.from_targets(workflow.targets)
+    graph = load_graph(obj)
 
     if targets:
         targets = filter_names(graph, targets)
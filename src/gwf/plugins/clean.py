@@ -2,9 +2,8 @@ import logging
 import os
 import os.path
 
-from ..core import Graph
 from ..filtering import NameFilter, EndpointFilter, filter_generic
-from ..workflow import Workflow
+from ..graphcache import load_graph
 
 import click
 
@@ -43,8 +42,7 @@ def clean(obj, targets, all, force):
     deleted. If you want to clean up output files from endpoints too, use the
     ``--all`` flag.
     """
-    workflow = Workflow.from_config(obj)
-    graph = Graph.from_targets(workflow.targets)
+    graph = load_graph(obj)
 
     filters = []
     if targets:
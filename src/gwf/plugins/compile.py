@@ -0,0 +1,26 @@
+import logging
+
+import click
+
+from ..graphcache import load_graph
+from ..plan import plan_path, write_plan
+
+logger = logging.getLogger(__name__)
+
+
+@click.command()
+@click.pass_obj
+def compile(obj):
+    """Compile the workflow into a plan.
+
+    The plan contains all targets, their paths, options and specs, and the
+    dependencies between targets. It can be used by the `run`, `status` and
+    `info` commands by giving them the `--plan` flag, in which case the
+    workflow file is not loaded at all.
+
+    The plan must be compiled again when the workflow changes.
+    """
+    graph = load_graph(obj)
+    path = plan_path(obj["file"])
+    write_plan(graph, path, workflow_path=obj["file"])
+    logger.info("Compiled %d targets to %s", len(graph), path)
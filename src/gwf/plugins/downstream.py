@@ -0,0 +1,29 @@
+import click
+
+from ..filtering import match_targets_and_paths
+from ..graphcache import load_graph
+
+
+@click.command()
+@click.argument("patterns", nargs=-1, required=True)
+@click.option(
+    "--plan", is_flag=True, default=False, help="Use the compiled plan of the workflow."
+)
+@click.pass_obj
+def downstream(obj, patterns, plan):
+    """List targets affected by changes to targets or files.
+
+    Each pattern may be the name of a target, a path to a file used by the
+    workflow, or a glob pattern matching target names or paths. All targets
+    that would run again if the given targets ran again or the given files
+    changed are listed in the order they would run.
+
+    For example, to list all targets that would run again if a reference
+    genome was replaced::
+
+        gwf downstream data/reference.fa
+    """
+    graph = load_graph(obj, plan=plan)
+    targets, paths = match_targets_and_paths(graph, patterns)
+    for target in graph.downstream(targets=targets, paths=paths):
+        click.echo(target.name)
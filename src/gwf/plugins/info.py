@@ -4,18 +4,19 @@ import click
 
 from collections import OrderedDict
 
-from ..core import Graph
 from ..filtering import filter_names
-from ..workflow import Workflow
+from ..graphcache import load_graph
 
 
 @click.command()
 @click.argument("targets", nargs=-1)
+@click.option(
+    "--plan", is_flag=True, default=False, help="Use the compiled plan of the workflow."
+)
 @click.pass_obj
-def info(obj, targets):
+def info(obj, targets, plan):
     """Display information about a target."""
-    workflow = Workflow.from_config(obj)
-    graph = Graph.from_targets(workflow.targets)
+    graph = load_graph(obj, plan=plan)
 
     matches = iter(graph)
     if targets:
@@ -25,7 +26,7 @@ def info(obj, targets):
     for target in matches:
         obj[target.name] = OrderedDict(
             [
-                ("options", target.options),
+                ("options", target.option_set.copy()),
                 ("inputs", target.inputs),
                 ("outputs", target.outputs),
                 ("spec", target.spec),
@@ -37,4 +38,5 @@ def info(obj, targets):
             ]
         )
 
-    print(json.dumps(obj, indent=4))
+    # Inputs and outputs of targets loaded from a plan are sequences, not lists.
+    print(json.dumps(obj, indent=4, default=list))
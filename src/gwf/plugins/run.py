@@ -1,13 +1,15 @@
 import logging
+import os.path
+import time
 from contextlib import suppress
 
 import click
 
 from ..backends import Backend, Status
 from ..backends.exceptions import LogError
-from ..core import Graph, schedule
+from ..core import CachedFilesystem, schedule
 from ..filtering import filter_names
-from ..workflow import Workflow
+from ..graphcache import load_graph
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +26,21 @@ def clean_logs(graph, backend):
             backend.log_manager.remove_stderr(target_name)
 
 
-def submit(graph, scheduled, reasons, backend, dry_run):
+def submit(
+    graph,
+    scheduled,
+    reasons,
+    backend,
+    dry_run,
+    workers=1,
+    max_queued=None,
+    follow=False,
+    poll_interval=60,
+):
+    # Reasons are formatted when looked up, so only look them up if they are
+    # going to be logged.
+    log_reasons = logger.isEnabledFor(logging.DEBUG)
+    to_submit = []
     seen = set()
     for endpoint in graph.endpoints():
         for target in graph.dfs(endpoint):
@@ -33,29 +49,212 @@ def submit(graph, scheduled, reasons, backend, dry_run):
             seen.add(target)
 
             if target not in scheduled:
-                logger.debug(reasons[target])
+                if log_reasons:
+                    logger.debug(reasons[target])
                 continue
 
             if backend.status(target) != Status.UNKNOWN:
                 logger.debug("Target %s already submitted", target.name)
                 continue
 
-            logger.debug("Target %s", reasons[target])
+            if log_reasons:
+                logger.debug("Target %s", reasons[target])
             if dry_run:
                 logger.info("Would submit target %s", target.name)
             else:
+                to_submit.append(target)
+
+    if not to_submit:
+        return
+    if max_queued is None:
+        # Targets are submitted together, which allows the backend to submit
+        # similar targets as job arrays.
+        for target in to_submit:
+            logger.info("Submitting target %s", target.name)
+        backend.submit_full_many(to_submit, dependencies=scheduled, workers=workers)
+        return
+
+    pending = to_submit
+    dropped = {}
+    while True:
+        num_queued = sum(
+            1 for target in scheduled if backend.status(target) != Status.UNKNOWN
+        )
+        window, pending = _next_window(
+            graph, pending, scheduled, backend, max_queued - num_queued, dropped
+        )
+        if window:
+            for target in window:
                 logger.info("Submitting target %s", target.name)
-                backend.submit_full(target, dependencies=scheduled[target])
+            backend.submit_full_many(
+                window,
+                dependencies=_queued_dependencies(window, scheduled, backend),
+                workers=workers,
+            )
+
+        if not pending:
+            break
+        if not follow:
+            logger.info(
+                "Did not submit %d target(s) since at most %d target(s) may be "
+                "queued. Run gwf run again or use --follow to submit them.",
+                len(pending),
+                max_queued,
+            )
+            break
+        if not window and not num_queued:
+            # Nothing is queued that the pending targets could wait for.
+            logger.warning(
+                "Could not submit %d target(s) since none of their dependencies "
+                "are queued: %s",
+                len(pending),
+                _names(pending),
+            )
+            break
+
+        logger.debug(
+            "%d target(s) queued, %d target(s) waiting to be submitted",
+            num_queued + len(window),
+            len(pending),
+        )
+        time.sleep(poll_interval)
+        backend.refresh()
+
+    if dropped:
+        logger.warning(
+            "Did not submit %d target(s) since a dependency left the queue "
+            "without producing its outputs: %s",
+            len(dropped),
+            _names(dropped),
+        )
+
+
+def _names(targets):
+    return ", ".join(target.name for target in targets)
+
+
+def _next_window(graph, pending, scheduled, backend, size, dropped):
+    """Return the next `size` targets to submit and the remaining targets.
+
+    Targets are only submitted once their dependencies have been submitted
+    too. A target whose dependency left the queue without producing its
+    outputs is dropped, since the dependency probably failed, and so are the
+    targets depending on a dropped target. `dropped` maps each dropped target
+    to the dependency which probably failed and is updated in place.
+    """
+    window = []
+    in_window = set()
+    pending_set = set(pending)
+    remaining = []
+    for target in pending:
+        if len(window) >= size:
+            remaining.append(target)
+            continue
+
+        ready = True
+        for dep in scheduled[target]:
+            if dep in in_window:
+                continue
+            if dep in dropped:
+                logger.debug(
+                    "Not submitting target %s since it depends on %s, which "
+                    "left the queue without producing its outputs",
+                    target.name,
+                    dropped[dep].name,
+                )
+                dropped[target] = dropped[dep]
+                pending_set.discard(target)
+                ready = None
+                break
+            if dep in pending_set:
+                ready = False
+                break
+            if backend.status(dep) != Status.UNKNOWN:
+                continue
+            if not all(os.path.exists(path) for path in graph.output_paths(dep)):
+                logger.warning(
+                    "Not submitting target %s since its dependency %s left the "
+                    "queue without producing its outputs",
+                    target.name,
+                    dep.name,
+                )
+                dropped[target] = dep
+                pending_set.discard(target)
+                ready = None
+                break
+
+        if ready:
+            window.append(target)
+            in_window.add(target)
+        elif ready is not None:
+            remaining.append(target)
+    return window, remaining
+
+
+def _queued_dependencies(targets, scheduled, backend):
+    """Return the dependencies of `targets` which have not completed yet."""
+    submitting = set(targets)
+    return {
+        target: set(
+            dep
+            for dep in scheduled[target]
+            if dep in submitting or backend.status(dep) != Status.UNKNOWN
+        )
+        for target in targets
+    }
 
 
 @click.command()
 @click.argument("targets", nargs=-1)
 @click.option("-d", "--dry-run", is_flag=True, default=False)
+@click.option(
+    "--plan", is_flag=True, default=False, help="Use the compiled plan of the workflow."
+)
+@click.option(
+    "--submit-workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of threads submitting targets to the backend.",
+)
+@click.option(
+    "--max-queued",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Maximum number of targets queued in the backend at a time.",
+)
+@click.option(
+    "--follow",
+    is_flag=True,
+    default=False,
+    help="Keep submitting targets as queued targets finish.",
+)
+@click.option(
+    "--poll-interval",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Seconds between checks of the queue when following.",
+)
 @click.pass_obj
-def run(obj, targets, dry_run):
-    """Run the specified workflow."""
-    workflow = Workflow.from_config(obj)
-    graph = Graph.from_targets(workflow.targets)
+def run(obj, targets, dry_run, plan, submit_workers, max_queued, follow, poll_interval):
+    """Run the specified workflow.
+
+    Targets are submitted one at a time unless --submit-workers is given.
+    Then targets which do not depend on each other are submitted
+    concurrently. If some targets could not be submitted, all other targets
+    not depending on them are still submitted before the error is reported.
+
+    With --max-queued, at most the given number of targets are queued in the
+    backend at a time. The remaining targets are submitted by running the
+    command again, or by giving --follow, which waits for targets to leave
+    the queue and submits more targets until all targets have been
+    submitted. An interrupted run can be resumed by running it again.
+    """
+    if submit_workers is None:
+        submit_workers = obj.get("submit_workers", 1)
+    if poll_interval is None:
+        poll_interval = obj.get("poll_interval", 60)
+
+    graph = load_graph(obj, plan=plan)
     backend_cls = Backend.from_config(obj)
 
     with backend_cls() as backend:
@@ -66,5 +265,21 @@ def run(obj, targets, dry_run):
         matched_targets = filter_names(graph, targets) if targets else graph.endpoints()
         subgraph = graph.subset(matched_targets)
 
-        scheduled, reasons = schedule(matched_targets, subgraph)
-        submit(subgraph, scheduled, reasons, backend, dry_run=dry_run)
+        with CachedFilesystem.from_config(obj) as filesystem:
+            scheduled, reasons = schedule(
+                matched_targets,
+                subgraph,
+                filesystem=filesystem,
+                engine=obj.get("scheduler", "depth-first"),
+            )
+        submit(
+            subgraph,
+            scheduled,
+            reasons,
+            backend,
+            dry_run=dry_run,
+            workers=submit_workers,
+            max_queued=max_queued,
+            follow=follow,
+            poll_interval=poll_interval,
+        )
@@ -3,9 +3,9 @@ from collections import Counter
 import click
 
 from ..backends import Backend
-from ..core import Graph, TargetStatus, schedule, get_status
+from ..core import CachedFilesystem, TargetStatus, schedule, get_status
 from ..filtering import EndpointFilter, NameFilter, StatusFilter, filter_generic
-from ..workflow import Workflow
+from ..graphcache import load_graph
 
 STATUS_COLORS = {
     TargetStatus.SHOULDRUN: "magenta",
@@ -92,8 +92,11 @@ def print_summary(backend, graph, targets):
     type=click.Choice(["shouldrun", "submitted", "running", "completed"]),
     multiple=True,
 )
+@click.option(
+    "--plan", is_flag=True, default=False, help="Use the compiled plan of the workflow."
+)
 @click.pass_obj
-def status(obj, status, summary, endpoints, targets):
+def status(obj, status, summary, endpoints, targets, plan):
     """
     Show the status of targets.
 
@@ -111,11 +114,16 @@ def status(obj, status, summary, endpoints, targets):
 
     The targets are shown in creation-order.
     """
-    workflow = Workflow.from_config(obj)
-    graph = Graph.from_targets(workflow.targets)
+    graph = load_graph(obj, plan=plan)
     backend_cls = Backend.from_config(obj)
 
-    scheduled, _ = schedule(graph.endpoints(), graph=graph)
+    with CachedFilesystem.from_config(obj) as filesystem:
+        scheduled, _ = schedule(
+            graph.endpoints(),
+            graph=graph,
+            filesystem=filesystem,
+            engine=obj.get("scheduler", "depth-first"),
+        )
 
     def status_provider(target):
         return get_status(target, scheduled, backend)
@@ -1,7 +1,6 @@
 import click
-from ..core import Graph
+from ..graphcache import load_graph
 from ..utils import touchfile
-from ..workflow import Workflow
 
 
 @click.command()
@@ -16,8 +15,7 @@ def touch(obj):
     This is useful if one or more files were accidentially deleted, but you
     don't want to re-run the workflow to recreate them.
     """
-    workflow = Workflow.from_config(obj)
-    graph = Graph.from_targets(workflow.targets)
+    graph = load_graph(obj)
     visited = set()
     for endpoint in graph.endpoints():
         for target in graph.dfs(endpoint):
@@ -0,0 +1,24 @@
+import click
+
+from ..filtering import match_targets_and_paths
+from ..graphcache import load_graph
+
+
+@click.command()
+@click.argument("patterns", nargs=-1, required=True)
+@click.option(
+    "--plan", is_flag=True, default=False, help="Use the compiled plan of the workflow."
+)
+@click.pass_obj
+def upstream(obj, patterns, plan):
+    """List targets that targets or files depend on.
+
+    Each pattern may be the name of a target, a path to a file used by the
+    workflow, or a glob pattern matching target names or paths. The given
+    targets, the targets producing the given files, and all targets they
+    depend on are listed in the order they would run.
+    """
+    graph = load_graph(obj, plan=plan)
+    targets, paths = match_targets_and_paths(graph, patterns)
+    for target in graph.upstream(targets=targets, paths=paths):
+        click.echo(target.name)
@@ -0,0 +1,37 @@
+import click
+
+from ..core import SCHEDULERS, CachedFilesystem, Reason
+from ..exceptions import GWFError
+from ..graphcache import load_graph
+
+
+@click.command()
+@click.argument("target")
+@click.option(
+    "--plan", is_flag=True, default=False, help="Use the compiled plan of the workflow."
+)
+@click.pass_obj
+def why(obj, target, plan):
+    """Explain whether a target should run.
+
+    Shows why the target should run or not. If the target should run because
+    one of its dependencies should run, the reason for that dependency is
+    shown too, and so on until the original cause is found.
+    """
+    graph = load_graph(obj, plan=plan)
+    try:
+        target = graph.targets[target]
+    except KeyError:
+        raise GWFError('Target "{}" does not exist in the workflow.'.format(target))
+
+    subgraph = graph.subset([target])
+    scheduler_cls = SCHEDULERS[obj.get("scheduler", "depth-first")]
+    with CachedFilesystem.from_config(obj) as filesystem:
+        scheduler = scheduler_cls(filesystem=filesystem)
+        scheduler.schedule([target], subgraph)
+
+        decision = scheduler.explain(target)
+        click.echo(decision)
+        while decision.reason == Reason.DEPENDENCY_SCHEDULED:
+            decision = scheduler.explain(decision.dependency)
+            click.echo(decision)
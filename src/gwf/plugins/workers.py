@@ -27,7 +27,14 @@ from ..backends.local import Server
     default=config.get("local.host", "localhost"),
     help="Host that workers will bind to.",
 )
-def workers(host, port, num_workers):
+@click.option(
+    "--early-cutoff/--no-early-cutoff",
+    default=config.get("local.early_cutoff", False),
+    help="Skip targets whose inputs were rewritten with identical contents.",
+)
+def workers(host, port, num_workers, early_cutoff):
     """Start workers for the local backend."""
-    server = Server(hostname=host, port=port, num_workers=num_workers)
+    server = Server(
+        hostname=host, port=port, num_workers=num_workers, early_cutoff=early_cutoff
+    )
     server.start()
@@ -0,0 +1,170 @@
+"""Persistent cache of file stats.
+
+Workflows often read large input files that never change, e.g. reference
+genomes and raw sequencing data. Without a persistent cache, every invocation
+of *gwf* checks all of these files again. The stat cache stores the
+modification time, size and inode of each input file in the `.gwf` directory
+together with the modification time of the directory containing the file.
+
+A cached entry is only used if the modification time of its directory is
+unchanged, which is the case as long as no files are created, removed or
+renamed in the directory. If in doubt, e.g. if the directory was modified very
+recently, the files are checked again. Only files not produced by any target
+are cached, since outputs are frequently rewritten in place.
+
+Files modified in place without creating a new file, e.g. by appending to
+them, do not change the modification time of their directory and are thus not
+detected. The stat cache is therefore disabled by default.
+"""
+
+import collections
+import json
+import logging
+import os
+import os.path
+import time
+
+from .utils import timer
+
+logger = logging.getLogger(__name__)
+
+STAT_CACHE_PATH = os.path.join(".gwf", "stat-cache.json")
+
+#: Version of the stat cache format. Bump this whenever the format changes.
+FORMAT_VERSION = 1
+
+# Directories modified less than this number of nanoseconds before they were
+# checked are not trusted, since further changes within the timestamp
+# granularity of the file system would go unnoticed.
+_RACY_NS = 2 * 10 ** 9
+
+
+#: The stat information of a file. `mtime` is the modification time in
+#: seconds as given by :attr:`os.stat_result.st_mtime`.
+FileStat = collections.namedtuple("FileStat", ["mtime", "mtime_ns", "size", "inode"])
+
+
+def file_stat(st):
+    """Return a :class:`FileStat` from an :class:`os.stat_result`."""
+    return FileStat(st.st_mtime, st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _from_record(record):
+    if record is None:
+        return None
+    mtime_ns, size, inode = record
+    sec, nsec = divmod(mtime_ns, 10 ** 9)
+    return FileStat(sec + nsec * 1e-9, mtime_ns, size, inode)
+
+
+def _to_record(stat):
+    if stat is None:
+        return None
+    return [stat.mtime_ns, stat.size, stat.inode]
+
+
+def trusted_dir_mtime_ns(dirname):
+    """Return the modification time of `dirname` in nanoseconds.
+
+    Returns `None` if the directory does not exist or was modified too
+    recently for its modification time to be trusted.
+    """
+    try:
+        mtime_ns = os.stat(dirname).st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    if mtime_ns > time.time() * 1e9 - _RACY_NS:
+        return None
+    return mtime_ns
+
+
+class StatCache:
+    """A persistent cache of file stats stored in `path`."""
+
+    def __init__(self, path=STAT_CACHE_PATH):
+        self.path = path
+        self._dirs = {}
+        self._observed = {}
+        self._changed = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as fileobj:
+                data = json.load(fileobj)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.debug("Stat cache %s is unreadable", self.path, exc_info=True)
+            return
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            logger.debug("Stat cache %s has an unknown format", self.path)
+            return
+        self._dirs = data["dirs"]
+
+    def _observe(self, dirname):
+        """Return the current modification time of `dirname` if trustworthy."""
+        if dirname not in self._observed:
+            self._observed[dirname] = trusted_dir_mtime_ns(dirname)
+        return self._observed[dirname]
+
+    def lookup(self, paths):
+        """Return a dictionary of the cached stats of `paths` that are valid.
+
+        Paths not in the dictionary must be stat'ed and passed to
+        :meth:`update`. The value of a path is `None` if the file was missing.
+        """
+        by_dir = collections.defaultdict(list)
+        for path in paths:
+            by_dir[os.path.dirname(path)].append(path)
+
+        found = {}
+        msg = "Checked {} director(ies) in the stat cache in %.3fms".format(
+            len(by_dir)
+        )
+        with timer(msg, logger=logger):
+            for dirname, dir_paths in by_dir.items():
+                mtime_ns = self._observe(dirname)
+                entry = self._dirs.get(dirname)
+                if mtime_ns is None or entry is None or entry[0] != mtime_ns:
+                    continue
+                records = entry[1]
+                for path in dir_paths:
+                    name = os.path.basename(path)
+                    if name in records:
+                        found[path] = _from_record(records[name])
+        logger.debug("Stat cache had %d of %d file(s)", len(found), len(paths))
+        return found
+
+    def update(self, stats):
+        """Store `stats`, a mapping from paths to :class:`FileStat` or `None`.
+
+        The stats must have been obtained after the paths were looked up with
+        :meth:`lookup`, such that the directory modification times observed
+        then are not newer than the stats.
+        """
+        for path, stat in stats.items():
+            dirname = os.path.dirname(path)
+            mtime_ns = self._observed.get(dirname)
+            if mtime_ns is None:
+                continue
+            entry = self._dirs.get(dirname)
+            if entry is None or entry[0] != mtime_ns:
+                entry = self._dirs[dirname] = [mtime_ns, {}]
+            entry[1][os.path.basename(path)] = _to_record(stat)
+            self._changed = True
+
+    def save(self):
+        """Write the cache to disk if it was changed."""
+        if not self._changed:
+            return
+        tmp_path = self.path + ".new"
+        try:
+            with timer("Stored stat cache in %.3fms", logger=logger):
+                with open(tmp_path, "w") as fileobj:
+                    json.dump({"version": FORMAT_VERSION, "dirs": self._dirs}, fileobj)
+                os.replace(tmp_path, self.path)
+        except OSError:
+            logger.warning("Could not store stat cache", exc_info=True)
+            return
+        self._changed = False
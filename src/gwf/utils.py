@@ -1,3 +1,4 @@
+import collections.abc
 import copy
 import functools
 import importlib
@@ -10,8 +11,9 @@ import re
 import socket
 import sys
 import time
-from collections import UserDict
-from contextlib import ContextDecorator
+import weakref
+from collections import OrderedDict, UserDict
+from contextlib import ContextDecorator, contextmanager
 from functools import wraps
 from urllib.request import urlopen
 
@@ -32,16 +34,215 @@ def is_valid_name(candidate):
     return re.match(r"^[a-zA-Z_][a-zA-Z0-9._]*$", candidate) is not None
 
 
-def cache(obj):
-    _cache = obj._cache = {}
+class LRUCache(OrderedDict):
+    """A dictionary holding at most `maxsize` items.
+
+    When the cache is full, the least recently used item is discarded. If
+    `maxsize` is `None` the cache is unbounded.
+    """
+
+    def __init__(self, maxsize=128):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if self.maxsize is not None and len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+_KWARGS_MARK = object()
+
+
+class memoized_method:
+    """Memoize a method in a bounded cache owned by each instance.
+
+    The cache is stored on the instance, so it is discarded together with the
+    instance, and instances never share cached results. Each instance keeps
+    at most `maxsize` results::
+
+        class Graph:
+            @memoized_method(maxsize=128)
+            def dfs(self, root):
+                ...
+
+    The cache of an instance can be cleared explicitly with
+    ``graph.dfs.cache_clear()``.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+
+    def __call__(self, func):
+        self.func = func
+        self.attrname = "_{}_cache".format(func.__name__)
+        functools.update_wrapper(self, func)
+        return self
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return _BoundMemoizedMethod(self, instance)
+
+
+class _BoundMemoizedMethod:
+    __slots__ = ("_method", "_instance")
+
+    def __init__(self, method, instance):
+        self._method = method
+        self._instance = instance
+
+    def _get_cache(self):
+        cache = self._instance.__dict__.get(self._method.attrname)
+        if cache is None:
+            cache = LRUCache(maxsize=self._method.maxsize)
+            self._instance.__dict__[self._method.attrname] = cache
+        return cache
+
+    def __call__(self, *args, **kwargs):
+        key = args
+        if kwargs:
+            key += (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+        cache = self._get_cache()
+        try:
+            return cache[key]
+        except KeyError:
+            value = cache[key] = self._method.func(self._instance, *args, **kwargs)
+            return value
+
+    def cache_clear(self):
+        """Discard all cached results for this instance."""
+        self._instance.__dict__.pop(self._method.attrname, None)
+
+    def cache_size(self):
+        """Return the number of cached results for this instance."""
+        return len(self._get_cache())
+
+
+def _option_set_key(items):
+    # The type is part of the key since e.g. 1, 1.0 and True are equal and
+    # have the same hash, but are different option values.
+    return frozenset((name, type(value), value) for name, value in items.items())
 
-    @functools.wraps(obj)
-    def memoizer(*args, **kwargs):
-        if args not in _cache:
-            _cache[args] = obj(*args, **kwargs)
-        return _cache[args]
 
-    return memoizer
+class OptionSet(collections.abc.Mapping):
+    """An immutable set of target options.
+
+    Option sets are interned such that all equal option sets created through
+    :meth:`intern` are the same object. Thus, thousands of targets with the
+    same options share a single option set. Option sets are hashable if all
+    option values are hashable. Option sets with unhashable values work, but
+    are not shared.
+
+    Use :meth:`merge`, :meth:`set` and :meth:`remove` to obtain modified
+    option sets.
+    """
+
+    __slots__ = ("_items", "_hash", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()
+    _merged = LRUCache(maxsize=1024)
+
+    @classmethod
+    def intern(cls, options):
+        """Return the shared option set equal to the mapping `options`."""
+        if isinstance(options, cls):
+            return options
+        items = dict(options)
+        try:
+            key = _option_set_key(items)
+        except TypeError:
+            key = None
+
+        if key is not None:
+            option_set = cls._interned.get(key)
+            if option_set is not None:
+                return option_set
+
+        option_set = cls.__new__(cls)
+        option_set._items = items
+        option_set._hash = None
+        if key is not None:
+            option_set._hash = hash(key)
+            cls._interned[key] = option_set
+        return option_set
+
+    @property
+    def is_hashable(self):
+        return self._hash is not None
+
+    def merge(self, overrides):
+        """Return an option set with `overrides` applied to these options."""
+        overrides = OptionSet.intern(overrides)
+        if not overrides or overrides is self:
+            return self
+        if not (self.is_hashable and overrides.is_hashable):
+            return self._merge(overrides)
+
+        # Targets created from the same template merge the same option sets,
+        # so the merged set is only computed once.
+        key = (self, overrides)
+        merged = OptionSet._merged.get(key)
+        if merged is None:
+            merged = OptionSet._merged[key] = self._merge(overrides)
+        return merged
+
+    def _merge(self, overrides):
+        items = dict(self._items)
+        items.update(overrides._items)
+        return OptionSet.intern(items)
+
+    def set(self, name, value):
+        """Return an option set where option `name` is set to `value`."""
+        return self.merge({name: value})
+
+    def remove(self, name):
+        """Return an option set without option `name`."""
+        items = dict(self._items)
+        del items[name]
+        return OptionSet.intern(items)
+
+    def copy(self):
+        """Return the options as a new dictionary."""
+        return dict(self._items)
+
+    def __getitem__(self, name):
+        return self._items[name]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, collections.abc.Mapping):
+            return NotImplemented
+        # Compare values and their types like the hash does, such that e.g.
+        # options with the values 1 and True are not equal.
+        return len(self) == len(other) and all(
+            name in other and type(other[name]) is type(value) and other[name] == value
+            for name, value in self._items.items()
+        )
+
+    def __hash__(self):
+        if self._hash is None:
+            raise TypeError("Option set contains unhashable values.")
+        return self._hash
+
+    def __reduce__(self):
+        return (OptionSet.intern, (self._items,))
+
+    def __repr__(self):
+        return "{}({!r})".format(self.__class__.__name__, self._items)
 
 
 class timer(ContextDecorator):
@@ -78,6 +279,58 @@ def parse_path(path, default_obj="gwf", default_file="workflow.py"):
     return basedir, filename, obj
 
 
+class WorkflowDependencies:
+    """Files and glob patterns that a workflow depends on.
+
+    Instances are created by :func:`record_workflow_dependencies`.
+
+    :ivar set files:
+        Absolute paths of workflow files loaded and modules imported.
+    :ivar set globs:
+        Tuples of `(pattern, recursive)` for all patterns expanded through
+        :func:`gwf.Workflow.glob` and :func:`gwf.Workflow.iglob`.
+    """
+
+    def __init__(self):
+        self.files = set()
+        self.globs = set()
+
+
+_active_recorders = []
+
+
+@contextmanager
+def record_workflow_dependencies():
+    """Record the files and glob patterns used while loading a workflow.
+
+    Within the context, workflow files loaded with :func:`load_workflow`,
+    modules imported for the first time and patterns expanded through
+    :func:`gwf.Workflow.glob` are recorded in the yielded
+    :class:`WorkflowDependencies` instance.
+    """
+    recorder = WorkflowDependencies()
+    modules_before = set(sys.modules)
+    _active_recorders.append(recorder)
+    try:
+        yield recorder
+    finally:
+        _active_recorders.remove(recorder)
+        for name in set(sys.modules) - modules_before:
+            path = getattr(sys.modules[name], "__file__", None)
+            if path is not None:
+                recorder.files.add(os.path.abspath(path))
+
+
+def record_file(path):
+    for recorder in _active_recorders:
+        recorder.files.add(os.path.abspath(path))
+
+
+def record_glob(pattern, recursive=False):
+    for recorder in _active_recorders:
+        recorder.globs.add((pattern, recursive))
+
+
 def load_workflow(basedir, filename, objname):
     if not basedir:
         basedir = os.getcwd()
@@ -85,6 +338,7 @@ def load_workflow(basedir, filename, objname):
 
     if not os.path.exists(fullpath):
         raise GWFError('The file "{}" does not exist.'.format(fullpath))
+    record_file(fullpath)
 
     sys.path.insert(0, os.path.join(os.getcwd(), basedir))
     spec = importlib.util.spec_from_file_location(filename, fullpath)
@@ -213,12 +467,13 @@ class RetryError(Exception):
     """Raised when max_retries has been exceeded."""
 
 
-def retry(on_exc, max_retries=3, callback=None):
+def retry(on_exc, max_retries=3, callback=None, ignore=()):
     """Retry a function with exponentially increasing delay.
 
     This will retry the decorated function up to `max_retries` times. A retry
     will only be attempted if the exception raised by the wrapped function is
-    in `on_exc`.
+    in `on_exc` and not in `ignore`. Exceptions in `ignore` are raised
+    immediately.
 
     If `callback(retries, delay)` is given, it must be a callable the number of
     retries so far as the first argument and the current delay as the second
@@ -235,6 +490,8 @@ def retry(on_exc, max_retries=3, callback=None):
 
                 try:
                     return func(*args, **kwargs)
+                except ignore:
+                    raise
                 except on_exc as exc:
                     last_exc = exc
 
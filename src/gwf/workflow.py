@@ -11,7 +11,7 @@ from glob import iglob as _iglob
 
 from .core import AnonymousTarget, Target
 from .exceptions import WorkflowError, NameError, TypeError
-from .utils import parse_path, load_workflow, is_valid_name
+from .utils import parse_path, load_workflow, is_valid_name, record_glob
 
 
 def select(lst, fields):
@@ -274,7 +274,7 @@ class Workflow(object):
                 outputs=template.outputs,
                 options=options,
                 working_dir=template.working_dir or self.working_dir,
-                spec=template.spec,
+                spec=template.raw_spec,
             )
 
             new_target.inherit_options(template.options)
@@ -535,6 +535,7 @@ class Workflow(object):
         """
         if not os.path.isabs(pathname):
             pathname = os.path.join(self.working_dir, pathname)
+        record_glob(pathname, recursive=kwargs.get("recursive", False))
         return _glob(pathname, *args, **kwargs)
 
     def iglob(self, pathname, *args, **kwargs):
@@ -546,6 +547,7 @@ class Workflow(object):
         """
         if not os.path.isabs(pathname):
             pathname = os.path.join(self.working_dir, pathname)
+        record_glob(pathname, recursive=kwargs.get("recursive", False))
         return _iglob(pathname, *args, **kwargs)
 
     def shell(self, *args, **kwargs):
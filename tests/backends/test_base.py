@@ -62,6 +62,49 @@ def test_backend_submit_full_removes_options_with_none_value(backend):
     assert target.options == {"memory": "1g"}
 
 
+def test_backend_submit_full_resolves_each_option_set_once(backend, caplog):
+    targets = [
+        Target(
+            "TestTarget{}".format(idx),
+            inputs=[],
+            outputs=[],
+            options={"cores": 4, "foo": "bar"},
+            working_dir="/some/dir",
+        )
+        for idx in range(3)
+    ]
+    for target in targets:
+        backend.submit_full(target, set())
+
+    assert backend._resolve_options_cached.cache_size() == 1
+    assert all(target.options == {"cores": 4, "memory": "1g"} for target in targets)
+    assert targets[0].option_set is targets[2].option_set
+    assert len(caplog.records) == 3
+
+
+def test_backend_submit_full_many_prepares_and_submits_each_target(backend):
+    targets = [
+        Target(
+            "TestTarget{}".format(idx),
+            inputs=[],
+            outputs=[],
+            options={"foo": "bar"},
+            working_dir="/some/dir",
+        )
+        for idx in range(3)
+    ]
+    dependencies = {targets[0]: set(), targets[1]: set(), targets[2]: {targets[0]}}
+    with patch.object(backend, "submit") as submit:
+        backend.submit_full_many(targets, dependencies)
+
+    assert [call[0] for call in submit.call_args_list] == [
+        (targets[0], set()),
+        (targets[1], set()),
+        (targets[2], {targets[0]}),
+    ]
+    assert all(target.options == {"cores": 1, "memory": "1g"} for target in targets)
+
+
 def test_backend_logs():
     target = Target(
         "TestTarget", inputs=[], outputs=[], options={}, working_dir="/some/dir"
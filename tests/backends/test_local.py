@@ -0,0 +1,135 @@
+import os
+import queue
+import threading
+import time
+
+import pytest
+
+from gwf import Target
+from gwf.backends.local import LocalStatus, SubmitRequest, Worker
+
+
+def _set_mtime(path, seconds_ago):
+    timestamp = time.time() - seconds_ago
+    os.utime(str(path), (timestamp, timestamp))
+
+
+@pytest.fixture
+def make_worker(monkeypatch):
+    monkeypatch.setattr(Worker, "run", lambda self: None)
+
+    def make_worker(early_cutoff=True):
+        return Worker(
+            status={},
+            queue=queue.Queue(),
+            waiting={},
+            lock=threading.Lock(),
+            unchanged={} if early_cutoff else None,
+        )
+
+    return make_worker
+
+
+@pytest.fixture
+def pipeline(tmpdir):
+    """A pipeline where `Upstream` rewrites its output with the same contents."""
+    tmpdir.join("input.txt").write("input")
+    tmpdir.join("a.txt").write("a")
+    tmpdir.join("b.txt").write("b")
+    _set_mtime(tmpdir.join("input.txt"), 300)
+    _set_mtime(tmpdir.join("a.txt"), 200)
+    _set_mtime(tmpdir.join("b.txt"), 100)
+
+    upstream = Target(
+        "Upstream",
+        inputs=["input.txt"],
+        outputs=["a.txt"],
+        options={},
+        working_dir=str(tmpdir),
+        spec="echo -n a > a.txt",
+    )
+    downstream = Target(
+        "Downstream",
+        inputs=["a.txt"],
+        outputs=["b.txt"],
+        options={},
+        working_dir=str(tmpdir),
+        spec="echo -n changed > b.txt",
+    )
+    return tmpdir, upstream, downstream
+
+
+def _run(worker, tmpdir, task_id, target, deps=()):
+    request = SubmitRequest(
+        target,
+        list(deps),
+        stdout_path=str(tmpdir.join(target.name + ".stdout")),
+        stderr_path=str(tmpdir.join(target.name + ".stderr")),
+    )
+    worker.status[task_id] = LocalStatus.SUBMITTED
+    worker.handle_task(task_id, request)
+    assert worker.status[task_id] == LocalStatus.COMPLETED
+
+
+def test_worker_skips_dependents_of_target_with_unchanged_outputs(
+    make_worker, pipeline
+):
+    tmpdir, upstream, downstream = pipeline
+    worker = make_worker()
+
+    _run(worker, tmpdir, "1", upstream)
+    assert "1" in worker.unchanged
+    _run(worker, tmpdir, "2", downstream, deps=["1"])
+
+    assert tmpdir.join("b.txt").read() == "b"
+    assert os.path.getmtime(str(tmpdir.join("b.txt"))) >= os.path.getmtime(
+        str(tmpdir.join("a.txt"))
+    )
+    assert "2" in worker.unchanged
+
+
+def test_worker_runs_dependents_which_were_already_out_of_date(make_worker, pipeline):
+    tmpdir, upstream, downstream = pipeline
+    _set_mtime(tmpdir.join("a.txt"), 50)
+    worker = make_worker()
+
+    _run(worker, tmpdir, "1", upstream)
+    assert "1" in worker.unchanged
+    _run(worker, tmpdir, "2", downstream, deps=["1"])
+
+    assert tmpdir.join("b.txt").read() == "changed"
+    assert "2" not in worker.unchanged
+
+
+def test_worker_runs_dependents_of_target_with_changed_outputs(make_worker, pipeline):
+    tmpdir, upstream, downstream = pipeline
+    tmpdir.join("a.txt").write("old")
+    worker = make_worker()
+
+    _run(worker, tmpdir, "1", upstream)
+    assert "1" not in worker.unchanged
+    _run(worker, tmpdir, "2", downstream, deps=["1"])
+
+    assert tmpdir.join("b.txt").read() == "changed"
+
+
+def test_worker_runs_dependents_with_other_changed_inputs(make_worker, pipeline):
+    tmpdir, upstream, downstream = pipeline
+    tmpdir.join("other.txt").write("other")
+    downstream.inputs = ["a.txt", "other.txt"]
+    worker = make_worker()
+
+    _run(worker, tmpdir, "1", upstream)
+    _run(worker, tmpdir, "2", downstream, deps=["1"])
+
+    assert tmpdir.join("b.txt").read() == "changed"
+
+
+def test_worker_without_early_cutoff_runs_dependents(make_worker, pipeline):
+    tmpdir, upstream, downstream = pipeline
+    worker = make_worker(early_cutoff=False)
+
+    _run(worker, tmpdir, "1", upstream)
+    _run(worker, tmpdir, "2", downstream, deps=["1"])
+
+    assert tmpdir.join("b.txt").read() == "changed"
@@ -0,0 +1,166 @@
+import pytest
+
+from gwf import Target
+from gwf.backends import Status
+from gwf.backends.sge import SGEBackend
+from gwf.conf import config
+
+QUEUE_XML = """<?xml version='1.0'?>
+<job_info>
+  <queue_info>
+    <Queue-List>
+      <job_list state="running">
+        <JB_job_number>12</JB_job_number>
+        <state>r</state>
+      </job_list>
+      <job_list state="running">
+        <JB_job_number>13</JB_job_number>
+        <state>r</state>
+        <tasks>2</tasks>
+      </job_list>
+    </Queue-List>
+  </queue_info>
+  <job_info>
+    <job_list state="pending">
+      <JB_job_number>13</JB_job_number>
+      <state>qw</state>
+      <tasks>3-7:2,9</tasks>
+    </job_list>
+  </job_info>
+</job_info>
+"""
+
+
+class FakeSGE:
+    """Records calls to SGE commands and returns consecutive job ids."""
+
+    def __init__(self):
+        self.calls = []
+        self.next_job_id = 100
+
+    def __call__(self, executable_name, *args, input=None):
+        self.calls.append((executable_name, args, input))
+        if executable_name == "qstat":
+            return "<job_info></job_info>"
+        if executable_name == "qsub":
+            self.next_job_id += 1
+            if "-t" in args:
+                return "{}.{}:1\n".format(self.next_job_id, args[args.index("-t") + 1])
+            return "{}\n".format(self.next_job_id)
+        return ""
+
+
+@pytest.fixture
+def fake_sge(monkeypatch, tmpdir):
+    fake = FakeSGE()
+    monkeypatch.setattr("gwf.backends.sge.call", fake)
+    tmpdir.mkdir(".gwf")
+    monkeypatch.setitem(config, "backend.sge.job_arrays", True)
+    with tmpdir.as_cwd():
+        yield fake
+
+
+def _mapped(name, count, upstream=None):
+    return [
+        Target(
+            "{}_{}".format(name, i),
+            inputs=[] if upstream is None else upstream[i].outputs,
+            outputs=["{}_{}.txt".format(name, i)],
+            options={"memory": "4g"},
+            working_dir="/some/dir",
+            spec="echo {} {}".format(name, i),
+        )
+        for i in range(count)
+    ]
+
+
+def test_parse_queue_output_expands_array_tasks(fake_sge):
+    backend = SGEBackend()
+    assert backend.parse_queue_output(QUEUE_XML) == {
+        "12": Status.RUNNING,
+        "13.2": Status.RUNNING,
+        "13.3": Status.SUBMITTED,
+        "13.5": Status.SUBMITTED,
+        "13.7": Status.SUBMITTED,
+        "13.9": Status.SUBMITTED,
+    }
+
+
+def test_submit_many_submits_job_arrays_holding_on_whole_arrays(fake_sge):
+    first = _mapped("A", 3)
+    second = _mapped("B", 3, upstream=first)
+    dependencies = {t: set() for t in first}
+    dependencies.update({t: {first[i]} for i, t in enumerate(second)})
+
+    backend = SGEBackend()
+    backend.submit_full_many(first + second, dependencies)
+
+    submissions = [
+        (args, script) for name, args, script in fake_sge.calls if name == "qsub"
+    ]
+    assert [args for args, _ in submissions] == [
+        ("-terse", "-t", "1-3"),
+        ("-terse", "-t", "1-3", "-hold_jid", "101"),
+    ]
+    assert "#$ -l h_vmem=4g" in submissions[0][1]
+    assert 'case "$SGE_TASK_ID" in' in submissions[0][1]
+    assert [backend.get_job_id(t) for t in second] == ["102.1", "102.2", "102.3"]
+
+
+def test_cancel_array_task(fake_sge):
+    targets = _mapped("A", 2)
+    backend = SGEBackend()
+    backend.submit_full_many(targets, {t: set() for t in targets})
+    backend.cancel(targets[1])
+    assert fake_sge.calls[-1] == ("qdel", ("101", "-t", "2"), None)
+
+
+def _tiny(count, memory):
+    return [
+        Target(
+            "QC_{}".format(i),
+            inputs=[],
+            outputs=["qc_{}.txt".format(i)],
+            options={"walltime": "00:00:10", "memory": memory},
+            working_dir="/some/dir",
+            spec="echo QC {}".format(i),
+        )
+        for i in range(count)
+    ]
+
+
+def _packed_script(fake_sge, monkeypatch, targets, parallelism):
+    monkeypatch.setitem(config, "backend.sge.job_arrays", False)
+    monkeypatch.setitem(config, "backend.sge.pack_walltime", "00:00:20")
+    monkeypatch.setitem(config, "backend.sge.pack_parallelism", parallelism)
+    SGEBackend().submit_full_many(targets, {t: set() for t in targets})
+    [script] = [script for name, _, script in fake_sge.calls if name == "qsub"]
+    return script
+
+
+def test_packed_job_memory_of_many_parallel_slots_has_no_exponent(
+    fake_sge, monkeypatch
+):
+    targets = _tiny(16, "250000")
+    script = _packed_script(fake_sge, monkeypatch, targets, 16)
+    assert "#$ -pe smp 16" in script
+    assert "#$ -l h_vmem=250000" in script
+
+
+def test_packed_job_memory_is_given_per_core_in_smaller_unit(fake_sge, monkeypatch):
+    targets = _tiny(2, "4.5g")
+    script = _packed_script(fake_sge, monkeypatch, targets, 2)
+    assert "#$ -l h_vmem=4608m" in script
+
+
+def test_per_core_memory_is_given_in_smaller_unit_when_not_whole(fake_sge):
+    target = Target(
+        "A",
+        inputs=[],
+        outputs=[],
+        options={"cores": 2, "memory": "3g"},
+        working_dir="/some/dir",
+        spec="echo A",
+    )
+    script = SGEBackend().compile_script(target)
+    assert "#$ -l h_vmem=1536m" in script
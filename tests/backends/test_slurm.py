@@ -0,0 +1,391 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from gwf import Target
+from gwf.backends import Status
+from gwf.backends.exceptions import BackendError, SubmitError
+from gwf.backends.slurm import SlurmBackend
+from gwf.backends.utils import OverloadError
+from gwf.conf import config
+
+
+class FakeSlurm:
+    """Records calls to Slurm commands and returns consecutive job ids."""
+
+    def __init__(self, queue=""):
+        self.queue = queue
+        self.calls = []
+        self.next_job_id = 100
+        self.failing = set()
+        self.lock = threading.Lock()
+
+    def __call__(self, executable_name, *args, input=None):
+        with self.lock:
+            self.calls.append((executable_name, args, input))
+            if executable_name == "squeue":
+                return self.queue
+            if executable_name == "sbatch":
+                for name in self.failing:
+                    if "--job-name={}\n".format(name) in input:
+                        raise BackendError("sbatch: error: Batch job submission failed")
+                self.next_job_id += 1
+                return "{}\n".format(self.next_job_id)
+            return ""
+
+    def submissions(self):
+        return [(args, script) for name, args, script in self.calls if name == "sbatch"]
+
+
+@pytest.fixture
+def fake_slurm(monkeypatch, tmpdir):
+    fake = FakeSlurm()
+    monkeypatch.setattr("gwf.backends.slurm.call", fake)
+    tmpdir.mkdir(".gwf")
+    with tmpdir.as_cwd():
+        yield fake
+
+
+@pytest.fixture
+def job_arrays(monkeypatch):
+    monkeypatch.setitem(config, "backend.slurm.job_arrays", True)
+
+
+def _mapped(name, count, upstream=None):
+    return [
+        Target(
+            "{}_{}".format(name, i),
+            inputs=[] if upstream is None else upstream[i].outputs,
+            outputs=["{}_{}.txt".format(name, i)],
+            options={},
+            working_dir="/some/dir",
+            spec="echo {} {}".format(name, i),
+        )
+        for i in range(count)
+    ]
+
+
+def _submit(backend, targets, dependencies):
+    backend.submit_full_many(targets, dependencies)
+    return backend
+
+
+def _submit_concurrently(backend, targets, dependencies):
+    backend.submit_full_many(targets, dependencies, workers=4)
+    return backend
+
+
+def test_parse_queue_output_expands_array_tasks(fake_slurm):
+    backend = SlurmBackend()
+    assert backend.parse_queue_output(
+        "12;R\n13_2;R\n13_[3-5,8];PD\n14_[1-5:2%2];PD\n"
+    ) == {
+        "12": Status.RUNNING,
+        "13_2": Status.RUNNING,
+        "13_3": Status.SUBMITTED,
+        "13_4": Status.SUBMITTED,
+        "13_5": Status.SUBMITTED,
+        "13_8": Status.SUBMITTED,
+        "14_1": Status.SUBMITTED,
+        "14_3": Status.SUBMITTED,
+        "14_5": Status.SUBMITTED,
+    }
+
+
+def test_submit_many_submits_one_job_per_target_by_default(fake_slurm):
+    targets = _mapped("A", 3)
+    backend = _submit(SlurmBackend(), targets, {t: set() for t in targets})
+    assert len(fake_slurm.submissions()) == 3
+    assert [backend.get_job_id(t) for t in targets] == ["101", "102", "103"]
+
+
+def test_submit_many_submits_similar_targets_as_job_array(fake_slurm, job_arrays):
+    targets = _mapped("A", 3)
+    backend = _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    [(args, script)] = fake_slurm.submissions()
+    assert args == ("--parsable", "--array=0-2")
+    assert "#SBATCH --job-name=A" in script
+    assert 'case "$SLURM_ARRAY_TASK_ID" in' in script
+    assert "echo A 2\nGWF_SPEC_EOF" in script
+    assert [backend.get_job_id(t) for t in targets] == ["101_0", "101_1", "101_2"]
+    assert all(backend.status(t) == Status.SUBMITTED for t in targets)
+
+
+def _reading_stdin(name, working_dir):
+    return Target(
+        name,
+        inputs=[],
+        outputs=[],
+        options={},
+        working_dir=working_dir,
+        spec='{} -c "import sys; sys.stdin.read()"\necho {} finished\n'.format(
+            sys.executable, name
+        ),
+    )
+
+
+def _run_script(script, **env):
+    os.makedirs(".gwf/logs", exist_ok=True)
+    return subprocess.run(
+        ["/bin/bash", "-c", script],
+        stdin=subprocess.DEVNULL,
+        env=dict(os.environ, **env),
+    ).returncode
+
+
+def test_array_task_runs_whole_spec_when_spec_reads_stdin(fake_slurm, job_arrays):
+    targets = [_reading_stdin("A_{}".format(i), os.getcwd()) for i in range(2)]
+    _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    [(_, script)] = fake_slurm.submissions()
+    status = _run_script(script, SLURM_ARRAY_JOB_ID="101", SLURM_ARRAY_TASK_ID="1")
+    assert status == 0
+    with open(".gwf/logs/A_1.stdout") as fileobj:
+        assert fileobj.read() == "A_1 finished\n"
+
+
+def test_submit_many_uses_corresponding_dependencies_for_mapped_targets(
+    fake_slurm, job_arrays
+):
+    first = _mapped("A", 3)
+    second = _mapped("B", 3, upstream=first)
+    dependencies = {t: set() for t in first}
+    dependencies.update({t: {first[i]} for i, t in enumerate(second)})
+
+    # Targets are interleaved like they are when submitted by `gwf run`.
+    targets = [t for pair in zip(first, second) for t in pair]
+    backend = _submit(SlurmBackend(), targets, dependencies)
+
+    submissions = fake_slurm.submissions()
+    assert [args for args, _ in submissions] == [
+        ("--parsable", "--array=0-2"),
+        ("--parsable", "--array=0-2", "--dependency=aftercorr:101"),
+    ]
+    assert [backend.get_job_id(t) for t in second] == ["102_0", "102_1", "102_2"]
+
+
+def test_submit_many_groups_targets_with_different_options_separately(
+    fake_slurm, job_arrays
+):
+    targets = _mapped("A", 4)
+    for target in targets[2:]:
+        target.options = {"cores": 4}
+    _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    submissions = fake_slurm.submissions()
+    assert len(submissions) == 2
+    assert "#SBATCH -c 4" in submissions[1][1]
+
+
+def test_submit_many_splits_arrays_larger_than_max_array_size(
+    fake_slurm, job_arrays, monkeypatch
+):
+    monkeypatch.setitem(config, "backend.slurm.max_array_size", 2)
+    targets = _mapped("A", 5)
+    backend = _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    assert [args for args, _ in fake_slurm.submissions()] == [
+        ("--parsable", "--array=0-1"),
+        ("--parsable", "--array=0-1"),
+        ("--parsable",),
+    ]
+    assert backend.get_job_id(targets[4]) == "103"
+
+
+def _tiny(count, walltime="00:00:10"):
+    return [
+        Target(
+            "QC_{}".format(i),
+            inputs=[],
+            outputs=["qc_{}.txt".format(i)],
+            options={"walltime": walltime, "memory": "2g"},
+            working_dir="/some/dir",
+            spec="echo QC {}".format(i),
+        )
+        for i in range(count)
+    ]
+
+
+def test_submit_many_packs_tiny_targets_within_walltime_budget(fake_slurm, monkeypatch):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "00:00:30")
+    targets = _tiny(7)
+    backend = _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    submissions = fake_slurm.submissions()
+    assert len(submissions) == 3
+    assert "#SBATCH -t 00:00:30" in submissions[0][1]
+    assert "#SBATCH -t 00:00:30" in submissions[1][1]
+    assert "#SBATCH -t 00:00:10" in submissions[2][1]
+    assert 'echo "gwf: target QC_0 exited with status $gwf_status" >&2' in (
+        submissions[0][1]
+    )
+    assert "} >.gwf/logs/QC_0.stdout 2>.gwf/logs/QC_0.stderr" in submissions[0][1]
+    assert [backend.get_job_id(t) for t in targets] == [
+        "101",
+        "101",
+        "101",
+        "102",
+        "102",
+        "102",
+        "103",
+    ]
+
+
+def test_submit_many_packs_targets_in_parallel_slots(fake_slurm, monkeypatch):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "00:00:20")
+    monkeypatch.setitem(config, "backend.slurm.pack_parallelism", 2)
+    targets = _tiny(4)
+    _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    [(args, script)] = fake_slurm.submissions()
+    assert "#SBATCH -t 00:00:20" in script
+    assert "#SBATCH -c 2" in script
+    assert "#SBATCH --mem=4g" in script
+    assert script.count(") &") == 2
+
+
+def test_submit_many_scales_decimal_memory_of_parallel_slots(fake_slurm, monkeypatch):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "00:00:20")
+    monkeypatch.setitem(config, "backend.slurm.pack_parallelism", 4)
+    targets = _tiny(4)
+    for target in targets:
+        target.options["memory"] = "4.5g"
+    _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    [(_, script)] = fake_slurm.submissions()
+    assert "#SBATCH --mem=18g" in script
+
+
+def test_submit_many_scales_memory_of_many_parallel_slots_without_exponent(
+    fake_slurm, monkeypatch
+):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "00:00:20")
+    monkeypatch.setitem(config, "backend.slurm.pack_parallelism", 16)
+    targets = _tiny(16)
+    for target in targets:
+        target.options["memory"] = "64000M"
+    _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    [(_, script)] = fake_slurm.submissions()
+    assert "#SBATCH --mem=1024000M" in script
+
+
+def test_submit_many_scales_fractional_memory_to_smaller_unit(fake_slurm, monkeypatch):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "00:00:20")
+    monkeypatch.setitem(config, "backend.slurm.pack_parallelism", 3)
+    targets = _tiny(3)
+    for target in targets:
+        target.options["memory"] = "1.5g"
+    _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    [(_, script)] = fake_slurm.submissions()
+    assert "#SBATCH --mem=4608m" in script
+
+
+def test_submit_many_does_not_pack_targets_with_unknown_memory_in_parallel(
+    fake_slurm, monkeypatch
+):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "00:00:20")
+    monkeypatch.setitem(config, "backend.slurm.pack_parallelism", 2)
+    targets = _tiny(2)
+    for target in targets:
+        target.options["memory"] = "lots"
+    backend = _submit(SlurmBackend(), targets, {t: set() for t in targets})
+    assert [backend.get_job_id(t) for t in targets] == ["101", "102"]
+
+
+def test_submit_many_packed_job_waits_for_dependencies_of_all_targets(
+    fake_slurm, monkeypatch
+):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "02:00:00")
+    upstream = _mapped("A", 2)
+    targets = _tiny(2)
+    dependencies = {upstream[0]: set(), upstream[1]: set()}
+    dependencies.update({t: {upstream[i]} for i, t in enumerate(targets)})
+    _submit(SlurmBackend(), upstream + targets, dependencies)
+
+    # The upstream targets have the default walltime of one hour and are
+    # packed too.
+    assert [args for args, _ in fake_slurm.submissions()] == [
+        ("--parsable",),
+        ("--parsable", "--dependency=afterok:101"),
+    ]
+
+
+def test_packed_job_runs_whole_spec_when_spec_reads_stdin(fake_slurm, monkeypatch):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "02:00:00")
+    targets = [_reading_stdin("QC_{}".format(i), os.getcwd()) for i in range(2)]
+    _submit(SlurmBackend(), targets, {t: set() for t in targets})
+
+    [(_, script)] = fake_slurm.submissions()
+    assert _run_script(script, SLURM_JOBID="101") == 0
+    for target in targets:
+        with open(".gwf/logs/{}.stdout".format(target.name)) as fileobj:
+            assert fileobj.read() == "{} finished\n".format(target.name)
+        with open(".gwf/logs/{}.stderr".format(target.name)) as fileobj:
+            assert "exited with status 0" in fileobj.read()
+
+
+def test_submit_many_does_not_pack_targets_exceeding_budget(fake_slurm, monkeypatch):
+    monkeypatch.setitem(config, "backend.slurm.pack_walltime", "00:00:05")
+    targets = _tiny(3)
+    backend = _submit(SlurmBackend(), targets, {t: set() for t in targets})
+    assert [backend.get_job_id(t) for t in targets] == ["101", "102", "103"]
+
+
+def test_submit_many_submits_levels_concurrently(fake_slurm):
+    first = _mapped("A", 4)
+    second = _mapped("B", 4, upstream=first)
+    dependencies = {t: set() for t in first}
+    dependencies.update({t: {first[i]} for i, t in enumerate(second)})
+
+    backend = _submit_concurrently(SlurmBackend(), first + second, dependencies)
+
+    job_ids = {t: backend.get_job_id(t) for t in first + second}
+    assert sorted(job_ids.values()) == [str(job_id) for job_id in range(101, 109)]
+    assert all(int(job_ids[t]) <= 104 for t in first)
+    for args, script in fake_slurm.submissions():
+        for i, target in enumerate(second):
+            if "--job-name={}\n".format(target.name) in script:
+                assert args == (
+                    "--parsable",
+                    "--dependency=afterok:{}".format(job_ids[first[i]]),
+                )
+
+
+def test_submit_many_reports_failed_and_skipped_targets(fake_slurm, monkeypatch):
+    monkeypatch.setattr("gwf.utils.time.sleep", lambda seconds: None)
+    fake_slurm.failing.add("A_0")
+    first = _mapped("A", 2)
+    second = _mapped("B", 2, upstream=first)
+    dependencies = {t: set() for t in first}
+    dependencies.update({t: {first[i]} for i, t in enumerate(second)})
+
+    backend = SlurmBackend()
+    with pytest.raises(SubmitError) as excinfo:
+        _submit_concurrently(backend, first + second, dependencies)
+
+    assert [target for target, _ in excinfo.value.failed] == [first[0]]
+    assert excinfo.value.skipped == [second[0]]
+    assert "A_0: Could not submit target" in str(excinfo.value)
+    assert backend.status(first[0]) == Status.UNKNOWN
+    assert backend.status(second[0]) == Status.UNKNOWN
+    assert backend.status(first[1]) == Status.SUBMITTED
+    assert backend.status(second[1]) == Status.SUBMITTED
+
+
+def test_overloaded_submission_is_not_retried_again(fake_slurm, monkeypatch):
+    def overloaded(executable_name, *args, input=None):
+        fake_slurm.calls.append((executable_name, args, input))
+        raise OverloadError("sbatch: error: Socket timed out")
+
+    backend = SlurmBackend()
+    monkeypatch.setattr("gwf.backends.slurm.call", overloaded)
+    [target] = _mapped("A", 1)
+    with pytest.raises(OverloadError):
+        backend.submit_full(target, set())
+    assert len(fake_slurm.submissions()) == 1
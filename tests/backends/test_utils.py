@@ -0,0 +1,151 @@
+import logging
+import os
+import stat
+
+import pytest
+
+from gwf.backends.exceptions import BackendError
+from gwf.backends.utils import OverloadError, RateController, call
+
+FAKE_SBATCH = """#!/bin/sh
+# Fails with an overload error the first $FAKE_SBATCH_FAILURES times.
+count_file="$(dirname "$0")/count"
+count=$(cat "$count_file" 2>/dev/null || echo 0)
+count=$((count + 1))
+echo "$count" > "$count_file"
+cat > /dev/null
+if [ "$count" -le "$FAKE_SBATCH_FAILURES" ]; then
+    echo "sbatch: error: $FAKE_SBATCH_ERROR" >&2
+    exit 1
+fi
+echo 1234
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_sbatch(tmpdir, monkeypatch):
+    """Install a fake sbatch which simulates an overloaded controller."""
+    path = tmpdir.join("sbatch")
+    path.write(FAKE_SBATCH)
+    os.chmod(str(path), stat.S_IRWXU)
+    monkeypatch.setenv("PATH", "{}{}{}".format(tmpdir, os.pathsep, os.environ["PATH"]))
+    monkeypatch.setenv(
+        "FAKE_SBATCH_ERROR",
+        "Batch job submission failed: Socket timed out on send/recv operation",
+    )
+
+    def configure(failures):
+        monkeypatch.setenv("FAKE_SBATCH_FAILURES", str(failures))
+        return lambda: int(tmpdir.join("count").read())
+
+    return configure
+
+
+def test_rate_controller_spaces_calls_by_rate(clock):
+    controller = RateController(rate=2.0, clock=clock, sleep=clock.sleep)
+    assert [controller.acquire() for _ in range(3)] == [0.0, 0.5, 1.0]
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_rate_controller_increases_rate_additively(clock):
+    controller = RateController(rate=2.0, increase=1.0, clock=clock)
+    controller.record(controller.acquire(), latency=0.1)
+    assert controller.rate == 2.5
+
+
+def test_rate_controller_decreases_rate_multiplicatively_on_overload(clock):
+    controller = RateController(rate=4.0, decrease=0.5, clock=clock)
+    controller.record(controller.acquire(), latency=0.1, overloaded=True)
+    assert controller.rate == 2.0
+    assert controller.overloads == 1
+
+
+def test_rate_controller_decreases_rate_when_calls_are_slow(clock):
+    controller = RateController(rate=4.0, target_latency=1.0, clock=clock)
+    controller.record(controller.acquire(), latency=2.0)
+    assert controller.rate == 2.0
+
+
+def test_rate_controller_decreases_once_for_concurrent_failures(clock):
+    controller = RateController(rate=8.0, clock=clock, sleep=clock.sleep)
+    started = [controller.acquire() for _ in range(3)]
+    for start in started:
+        controller.record(start, latency=0.1, overloaded=True)
+    assert controller.rate == 4.0
+    assert controller.overloads == 3
+
+
+def test_rate_controller_respects_bounds(clock):
+    controller = RateController(rate=1.0, min_rate=0.5, max_rate=1.5, clock=clock)
+    for _ in range(3):
+        clock.now += 1
+        controller.record(clock.now, latency=0.1, overloaded=True)
+    assert controller.rate == 0.5
+    for _ in range(10):
+        controller.record(clock.now, latency=0.1)
+    assert controller.rate == 1.5
+
+
+def test_rate_controller_logs_rate_and_latency(clock, caplog):
+    caplog.set_level(logging.DEBUG, logger="gwf.backends.utils")
+    controller = RateController(rate=4.0, clock=clock)
+    controller.record(controller.acquire(), latency=0.25, overloaded=True)
+    assert "reducing rate to 2.00 call(s)/s (latency 0.250s)" in caplog.text
+    clock.now = 2.0
+    assert controller.summary() == (
+        "Made 1 call(s) to the workload manager at 0.50 call(s)/s with a mean "
+        "latency of 0.250s, 1 overloaded, current rate limit 2.00 call(s)/s"
+    )
+
+
+def test_call_retries_overloaded_sbatch_at_decreasing_rate(fake_sbatch, clock):
+    num_calls = fake_sbatch(failures=3)
+    controller = RateController(rate=4.0, clock=clock, sleep=clock.sleep)
+
+    assert call("sbatch", "--parsable", input="script", controller=controller) == (
+        "1234\n"
+    )
+    assert num_calls() == 4
+    assert controller.overloads == 3
+    # The rate was halved three times and increased by the successful call.
+    assert controller.rate == 2.5
+    assert clock.sleeps == [0.25, 0.5, 1.0]
+
+
+def test_call_gives_up_when_sbatch_stays_overloaded(fake_sbatch, clock):
+    num_calls = fake_sbatch(failures=100)
+    controller = RateController(max_retries=2, clock=clock, sleep=clock.sleep)
+
+    with pytest.raises(OverloadError):
+        call("sbatch", input="script", controller=controller)
+    assert num_calls() == 3
+
+
+def test_call_does_not_retry_other_errors(fake_sbatch, clock, monkeypatch):
+    monkeypatch.setenv("FAKE_SBATCH_ERROR", "Invalid account or account/partition")
+    num_calls = fake_sbatch(failures=1)
+    controller = RateController(clock=clock, sleep=clock.sleep)
+
+    with pytest.raises(BackendError) as excinfo:
+        call("sbatch", input="script", controller=controller)
+    assert not isinstance(excinfo.value, OverloadError)
+    assert num_calls() == 1
+    assert controller.overloads == 0
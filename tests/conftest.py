@@ -74,9 +74,9 @@ def filesystem():
     return FakeFilesystem()
 
 
-@pytest.fixture
-def schedule(filesystem):
-    return functools.partial(_schedule, filesystem=filesystem)
+@pytest.fixture(params=["depth-first", "level"])
+def schedule(request, filesystem):
+    return functools.partial(_schedule, filesystem=filesystem, engine=request.param)
 
 
 @pytest.fixture
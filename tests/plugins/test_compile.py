@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from gwf.cli import main
+
+
+SIMPLE_WORKFLOW = """from gwf import Workflow
+
+gwf = Workflow()
+gwf.target('Target1', inputs=[], outputs=['a.txt']) << "echo hello world"
+gwf.target('Target2', inputs=['a.txt'], outputs=['b.txt']) << "echo world hello"
+"""
+
+
+@pytest.fixture
+def simple_workflow(tmpdir):
+    workflow_file = tmpdir.join("workflow.py")
+    workflow_file.write(SIMPLE_WORKFLOW)
+    return tmpdir
+
+
+@pytest.fixture(autouse=True)
+def setup(simple_workflow):
+    with simple_workflow.as_cwd():
+        yield
+
+
+def test_compiled_plan_is_used_without_loading_workflow(cli_runner, simple_workflow):
+    result = cli_runner.invoke(main, ["-b", "testing", "compile"])
+    assert result.exit_code == 0
+
+    simple_workflow.join("workflow.py").write("raise Exception('not loaded')")
+
+    result = cli_runner.invoke(main, ["-b", "testing", "status", "--plan"])
+    assert result.exit_code == 0
+    assert "Target1" in result.output
+    assert "Target2" in result.output
+
+    result = cli_runner.invoke(main, ["-b", "testing", "info", "--plan", "Target2"])
+    doc = json.loads(result.output)
+    assert doc["Target2"]["dependencies"] == ["Target1"]
+    assert doc["Target2"]["spec"] == "echo world hello"
+
+
+def test_using_plan_before_compiling_fails(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "status", "--plan"])
+    assert result.exit_code != 0
+    assert "gwf compile" in result.output
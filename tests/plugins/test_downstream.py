@@ -0,0 +1,51 @@
+import pytest
+
+from gwf.cli import main
+
+
+WORKFLOW = """from gwf import Workflow
+
+gwf = Workflow()
+gwf.target('Reference', inputs=[], outputs=['ref.fa'])
+gwf.target('Align1', inputs=['ref.fa', 'reads1.fq'], outputs=['aln1.bam'])
+gwf.target('Align2', inputs=['ref.fa', 'reads2.fq'], outputs=['aln2.bam'])
+gwf.target('Merge', inputs=['aln1.bam', 'aln2.bam'], outputs=['merged.bam'])
+"""
+
+
+@pytest.fixture(autouse=True)
+def setup(tmpdir):
+    tmpdir.join("workflow.py").write(WORKFLOW)
+    with tmpdir.as_cwd():
+        yield
+
+
+def test_downstream_of_input_file(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "downstream", "reads1.fq"])
+    assert result.output.splitlines() == ["Align1", "Merge"]
+
+
+def test_downstream_of_target(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "downstream", "Reference"])
+    lines = result.output.splitlines()
+    assert lines[0] == "Reference"
+    assert set(lines[1:3]) == {"Align1", "Align2"}
+    assert lines[3] == "Merge"
+
+
+def test_downstream_of_target_name_pattern(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "downstream", "Align*"])
+    assert set(result.output.splitlines()) == {"Align1", "Align2", "Merge"}
+
+
+def test_downstream_of_path_pattern(cli_runner, tmpdir):
+    tmpdir.join("reads1.fq").write("")
+    tmpdir.join("reads2.fq").write("")
+    result = cli_runner.invoke(main, ["-b", "testing", "downstream", "*.fq"])
+    assert set(result.output.splitlines()) == {"Align1", "Align2", "Merge"}
+
+
+def test_downstream_of_unknown_file_fails(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "downstream", "other.fq"])
+    assert result.exit_code != 0
+    assert "does not match any target or file" in result.output
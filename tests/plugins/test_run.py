@@ -1,7 +1,14 @@
+import logging
+from unittest.mock import patch
+
 import pytest
 
+from gwf import Target
+from gwf.backends import Status
+from gwf.backends.testing import TestingBackend
 from gwf.cli import main
-
+from gwf.core import Graph
+from gwf.plugins.run import submit
 
 SIMPLE_WORKFLOW = """from gwf import Workflow
 
@@ -44,3 +51,144 @@ def setup(simple_workflow):
 #     args, kwargs = mock_schedule_many.call_args
 #     assert len(args[0]) == 1
 #     assert {x.name for x in args[0]} == {"Target1"}
+
+
+def test_run_passes_submit_workers_to_backend(cli_runner):
+    with patch.object(TestingBackend, "submit_full_many") as submit_full_many:
+        result = cli_runner.invoke(
+            main, ["-b", "testing", "run", "--submit-workers", "4"]
+        )
+
+    assert result.exit_code == 0
+    args, kwargs = submit_full_many.call_args
+    assert {target.name for target in args[0]} == {"Target1", "Target2"}
+    assert kwargs["workers"] == 4
+
+
+def test_run_rejects_zero_submit_workers(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "run", "--submit-workers", "0"])
+    assert result.exit_code != 0
+
+
+class QueueBackend(TestingBackend):
+    """A backend where all queued targets complete when it is refreshed."""
+
+    def __init__(self):
+        self.queued = set()
+        self.batches = []
+        self.refreshes = 0
+
+    def submit_many(self, targets, dependencies, workers=1):
+        self.batches.append(
+            {
+                target.name: sorted(dep.name for dep in dependencies[target])
+                for target in targets
+            }
+        )
+        self.queued.update(targets)
+
+    def status(self, target):
+        return Status.SUBMITTED if target in self.queued else Status.UNKNOWN
+
+    def refresh(self):
+        self.refreshes += 1
+        self.queued.clear()
+
+
+@pytest.fixture
+def chain(tmpdir):
+    targets = [
+        Target("A", inputs=[], outputs=["a.txt"], options={}, working_dir=str(tmpdir)),
+        Target(
+            "B",
+            inputs=["a.txt"],
+            outputs=["b.txt"],
+            options={},
+            working_dir=str(tmpdir),
+        ),
+        Target("C", inputs=[], outputs=["c.txt"], options={}, working_dir=str(tmpdir)),
+    ]
+    graph = Graph.from_targets(targets)
+    scheduled = {
+        graph.targets["A"]: set(),
+        graph.targets["B"]: {graph.targets["A"]},
+        graph.targets["C"]: set(),
+    }
+    return graph, scheduled
+
+
+def test_submit_with_max_queued_submits_first_window_only(chain, caplog):
+    graph, scheduled = chain
+    caplog.set_level(logging.INFO, logger="gwf.plugins.run")
+    backend = QueueBackend()
+    submit(graph, scheduled, {}, backend, dry_run=False, max_queued=2)
+
+    [batch] = backend.batches
+    assert len(batch) == 2
+    assert "Did not submit 1 target(s)" in caplog.text
+    assert backend.refreshes == 0
+
+
+def test_submit_with_max_queued_and_follow_refills_window(chain, tmpdir, monkeypatch):
+    graph, scheduled = chain
+    tmpdir.join("a.txt").write("")
+    monkeypatch.setattr("gwf.plugins.run.time.sleep", lambda seconds: None)
+    backend = QueueBackend()
+    submit(graph, scheduled, {}, backend, dry_run=False, max_queued=1, follow=True)
+
+    submitted = [name for batch in backend.batches for name in batch]
+    assert sorted(submitted) == ["A", "B", "C"]
+    assert all(len(batch) == 1 for batch in backend.batches)
+    assert submitted.index("A") < submitted.index("B")
+    # A had completed when B was submitted, so B does not wait for it.
+    assert {"B": []} in backend.batches
+    assert backend.refreshes == 2
+
+
+def test_submit_with_follow_drops_targets_whose_dependency_failed(
+    chain, monkeypatch, caplog
+):
+    graph, scheduled = chain
+    monkeypatch.setattr("gwf.plugins.run.time.sleep", lambda seconds: None)
+    backend = QueueBackend()
+    submit(graph, scheduled, {}, backend, dry_run=False, max_queued=1, follow=True)
+
+    submitted = [name for batch in backend.batches for name in batch]
+    assert sorted(submitted) == ["A", "C"]
+    assert "Not submitting target B since its dependency A left the queue" in (
+        caplog.text
+    )
+    assert (
+        "Did not submit 1 target(s) since a dependency left the queue without "
+        "producing its outputs: B"
+    ) in caplog.text
+
+
+def test_submit_with_follow_names_failed_target_when_dropping_dependents(
+    chain, tmpdir, monkeypatch, caplog
+):
+    graph, scheduled = chain
+    target = Target(
+        "D", inputs=["b.txt"], outputs=["d.txt"], options={}, working_dir=str(tmpdir)
+    )
+    graph = Graph.from_targets(list(graph.targets.values()) + [target])
+    scheduled = {
+        graph.targets[name]: {graph.targets[dep] for dep in deps}
+        for name, deps in [("A", []), ("B", ["A"]), ("C", []), ("D", ["B"])]
+    }
+    monkeypatch.setattr("gwf.plugins.run.time.sleep", lambda seconds: None)
+    caplog.set_level(logging.DEBUG, logger="gwf.plugins.run")
+    backend = QueueBackend()
+    reasons = dict.fromkeys(scheduled, "should run")
+    submit(graph, scheduled, reasons, backend, dry_run=False, max_queued=1, follow=True)
+
+    submitted = [name for batch in backend.batches for name in batch]
+    assert sorted(submitted) == ["A", "C"]
+    warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+    assert warnings == [
+        "Not submitting target B since its dependency A left the queue without "
+        "producing its outputs",
+        "Did not submit 2 target(s) since a dependency left the queue without "
+        "producing its outputs: B, D",
+    ]
+    assert "Not submitting target D since it depends on A, which left" in caplog.text
@@ -0,0 +1,36 @@
+import pytest
+
+from gwf.cli import main
+
+
+WORKFLOW = """from gwf import Workflow
+
+gwf = Workflow()
+gwf.target('Reference', inputs=[], outputs=['ref.fa'])
+gwf.target('Align1', inputs=['ref.fa', 'reads1.fq'], outputs=['aln1.bam'])
+gwf.target('Align2', inputs=['ref.fa', 'reads2.fq'], outputs=['aln2.bam'])
+gwf.target('Merge', inputs=['aln1.bam', 'aln2.bam'], outputs=['merged.bam'])
+"""
+
+
+@pytest.fixture(autouse=True)
+def setup(tmpdir):
+    tmpdir.join("workflow.py").write(WORKFLOW)
+    with tmpdir.as_cwd():
+        yield
+
+
+def test_upstream_of_target(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "upstream", "Align2"])
+    assert result.output.splitlines() == ["Reference", "Align2"]
+
+
+def test_upstream_of_output_file(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "upstream", "aln1.bam"])
+    assert result.output.splitlines() == ["Reference", "Align1"]
+
+
+def test_upstream_of_source_file(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "upstream", "reads1.fq"])
+    assert result.exit_code == 0
+    assert result.output == ""
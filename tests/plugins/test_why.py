@@ -0,0 +1,53 @@
+import os
+import time
+
+import pytest
+
+from gwf.cli import main
+
+
+WORKFLOW = """from gwf import Workflow
+
+gwf = Workflow()
+gwf.target('Target1', inputs=['input.txt'], outputs=['a.txt'])
+gwf.target('Target2', inputs=['a.txt'], outputs=['b.txt'])
+gwf.target('Target3', inputs=['b.txt'], outputs=['c.txt'])
+"""
+
+
+def _age(path, seconds):
+    timestamp = time.time() - seconds
+    os.utime(str(path), (timestamp, timestamp))
+
+
+@pytest.fixture(autouse=True)
+def setup(tmpdir):
+    tmpdir.join("workflow.py").write(WORKFLOW)
+    for age, name in enumerate(["c.txt", "b.txt", "a.txt", "input.txt"]):
+        tmpdir.join(name).write("")
+        _age(tmpdir.join(name), 100 * (age + 1))
+    with tmpdir.as_cwd():
+        yield
+
+
+def test_why_target_is_up_to_date(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "why", "Target3"])
+    assert result.output == "Target3 was not scheduled because it is up to date\n"
+
+
+def test_why_follows_scheduled_dependencies(cli_runner, tmpdir):
+    _age(tmpdir.join("input.txt"), 0)
+    result = cli_runner.invoke(main, ["-b", "testing", "why", "Target3"])
+    assert result.output.splitlines() == [
+        "Target3 was scheduled because its dependency Target2 was scheduled",
+        "Target2 was scheduled because its dependency Target1 was scheduled",
+        "Target1 was scheduled because input file {} is newer than output file {}".format(
+            tmpdir.join("input.txt"), tmpdir.join("a.txt")
+        ),
+    ]
+
+
+def test_why_unknown_target_fails(cli_runner):
+    result = cli_runner.invoke(main, ["-b", "testing", "why", "Target4"])
+    assert result.exit_code != 0
+    assert 'Target "Target4" does not exist' in result.output
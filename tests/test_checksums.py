@@ -0,0 +1,110 @@
+import hashlib
+import os
+import time
+
+import pytest
+
+import gwf.checksums
+from gwf.checksums import ChecksumStore, hash_file
+from gwf.core import CachedFilesystem, Graph, Target, schedule
+
+
+def _set_mtime(path, seconds_ago):
+    timestamp = time.time() - seconds_ago
+    os.utime(str(path), (timestamp, timestamp))
+
+
+@pytest.mark.parametrize("content", [b"", b"hello world", os.urandom(3 * 1024 * 1024)])
+def test_hash_file(tmpdir, content):
+    path = tmpdir.join("file.bin")
+    path.write_binary(content)
+    assert hash_file(str(path)) == hashlib.sha256(content).hexdigest()
+
+
+def test_checksum_store_only_hashes_changed_files(tmpdir, monkeypatch):
+    hashed = []
+    original_hash_file = gwf.checksums.hash_file
+
+    def fake_hash_file(path):
+        hashed.append(path)
+        return original_hash_file(path)
+
+    monkeypatch.setattr(gwf.checksums, "hash_file", fake_hash_file)
+
+    path = tmpdir.join("file.txt")
+    path.write("hello")
+    store_path = str(tmpdir.join("checksums.json"))
+
+    store = ChecksumStore(store_path, max_workers=1)
+    filesystem = CachedFilesystem()
+    store.checksums({str(path): filesystem.stat(str(path))})
+    store.save()
+
+    store = ChecksumStore(store_path, max_workers=1)
+    store.checksums({str(path): CachedFilesystem().stat(str(path))})
+    assert hashed == [str(path)]
+
+    path.write("hello world")
+    _set_mtime(path, -10)
+    checksum = store.checksums({str(path): CachedFilesystem().stat(str(path))})
+    assert hashed == [str(path), str(path)]
+    assert checksum[str(path)] == hashlib.sha256(b"hello world").hexdigest()
+
+
+def test_checksum_store_hashes_many_files_in_process_pool(tmpdir):
+    paths = []
+    for idx in range(8):
+        path = tmpdir.join("file{}.txt".format(idx))
+        path.write(str(idx))
+        paths.append(str(path))
+
+    store = ChecksumStore(str(tmpdir.join("checksums.json")), max_workers=2)
+    filesystem = CachedFilesystem()
+    checksums = store.checksums({path: filesystem.stat(path) for path in paths})
+    assert checksums == {path: hash_file(path) for path in paths}
+
+
+@pytest.fixture
+def workflow(tmpdir):
+    tmpdir.join("input.txt").write("input")
+    tmpdir.join("output.txt").write("output")
+    _set_mtime(tmpdir.join("input.txt"), 200)
+    _set_mtime(tmpdir.join("output.txt"), 100)
+
+    target = Target(
+        "TestTarget",
+        inputs=["input.txt"],
+        outputs=["output.txt"],
+        options={},
+        working_dir=str(tmpdir),
+    )
+    return tmpdir, target, Graph.from_targets([target])
+
+
+def _schedule(tmpdir, target, graph, staleness="checksum"):
+    config = {"staleness": staleness}
+    with tmpdir.as_cwd():
+        with CachedFilesystem.from_config(config) as filesystem:
+            scheduled, _ = schedule([target], graph, filesystem=filesystem)
+    return target in scheduled
+
+
+def test_touched_input_with_unchanged_checksum_is_not_scheduled(workflow):
+    tmpdir, target, graph = workflow
+    tmpdir.mkdir(".gwf")
+    assert not _schedule(tmpdir, target, graph)
+    assert tmpdir.join(".gwf", "checksums.json").exists()
+
+    _set_mtime(tmpdir.join("input.txt"), 0)
+    assert _schedule(tmpdir, target, graph, staleness="timestamp")
+    assert not _schedule(tmpdir, target, graph)
+
+    tmpdir.join("input.txt").write("changed")
+    assert _schedule(tmpdir, target, graph)
+
+
+def test_touched_input_without_recorded_checksums_is_scheduled(workflow):
+    tmpdir, target, graph = workflow
+    tmpdir.mkdir(".gwf")
+    _set_mtime(tmpdir.join("input.txt"), 0)
+    assert _schedule(tmpdir, target, graph)
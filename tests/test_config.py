@@ -52,3 +52,22 @@ def test_validator(tmpdir):
 
     assert str(e.value) == 'Value of "foo" must be "bar", but was "baz".'
     assert c["foo"] == "bar"
+
+
+@pytest.mark.parametrize("key", ["stat_workers", "submit_workers", "poll_interval"])
+@pytest.mark.parametrize("value", [0, -1, "many", True])
+def test_worker_counts_must_be_positive_integer(key, value):
+    import gwf.cli  # noqa: F401 (registers validators)
+    from gwf.conf import config
+
+    with pytest.raises(ConfigurationError):
+        config[key] = value
+
+
+@pytest.mark.parametrize("value", [-0.1, 1.5, "all", True])
+def test_completion_manifest_sample_must_be_fraction(value):
+    import gwf.cli  # noqa: F401 (registers validators)
+    from gwf.conf import config
+
+    with pytest.raises(ConfigurationError):
+        config["completion_manifest_sample"] = value
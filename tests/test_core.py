@@ -1,8 +1,29 @@
+import gc
+import os
+import pickle
+import random
+import tracemalloc
 import unittest
+import weakref
 
 import pytest
 
-from gwf.core import Graph, Target, TargetStatus, _flatten, get_status
+from gwf.core import (
+    SCHEDULERS,
+    CachedFilesystem,
+    Decision,
+    Graph,
+    LevelScheduler,
+    PathTable,
+    Reason,
+    Scheduler,
+    SpecTemplate,
+    Target,
+    TargetStatus,
+    _flatten,
+    get_status,
+)
+from gwf.core import schedule as _schedule
 from gwf.exceptions import NameError, WorkflowError
 
 
@@ -152,6 +173,312 @@ class TestTarget(unittest.TestCase):
                 working_dir="/some/path",
             )
 
+    def test_flattened_paths_are_cached_tuples(self):
+        target = Target(
+            name="TestTarget",
+            inputs={"A": ["a1.txt", "a2.txt"], "B": "/abs/b.txt"},
+            outputs=["out.txt"],
+            options={},
+            working_dir="/some/path",
+        )
+        inputs = target.flattened_inputs()
+        self.assertEqual(
+            inputs, ("/some/path/a1.txt", "/some/path/a2.txt", "/abs/b.txt")
+        )
+        self.assertIs(target.flattened_inputs(), inputs)
+        self.assertEqual(target.flattened_outputs(), ("/some/path/out.txt",))
+
+    def test_reassigning_paths_invalidates_flattened_paths(self):
+        target = Target(
+            name="TestTarget",
+            inputs=["in.txt"],
+            outputs=["out.txt"],
+            options={},
+            working_dir="/some/path",
+        )
+        target.flattened_inputs()
+        target.flattened_outputs()
+
+        target.inputs = ["other.txt"]
+        self.assertEqual(target.flattened_inputs(), ("/some/path/other.txt",))
+
+        target.working_dir = "/other/path"
+        self.assertEqual(target.flattened_inputs(), ("/other/path/other.txt",))
+        self.assertEqual(target.flattened_outputs(), ("/other/path/out.txt",))
+
+    def test_target_has_no_instance_dict(self):
+        target = Target.empty("TestTarget")
+        self.assertFalse(hasattr(target, "__dict__"))
+        with self.assertRaises(AttributeError):
+            target.foo = "bar"
+
+    def test_target_can_be_pickled(self):
+        target = Target(
+            name="TestTarget",
+            inputs=["in.txt"],
+            outputs=["out.txt"],
+            options={"cores": 2},
+            working_dir="/some/path",
+            protect=["out.txt"],
+        )
+        target.flattened_inputs()
+        restored = pickle.loads(pickle.dumps(target))
+        self.assertEqual(restored.name, "TestTarget")
+        self.assertEqual(restored.options, {"cores": 2})
+        self.assertEqual(restored.protected, {"out.txt"})
+        self.assertEqual(restored.flattened_inputs(), ("/some/path/in.txt",))
+        self.assertEqual(restored.flattened_outputs(), ("/some/path/out.txt",))
+
+
+class _CountingValue:
+    def __init__(self, value):
+        self.value = value
+        self.count = 0
+
+    def __format__(self, format_spec):
+        self.count += 1
+        return format(self.value, format_spec)
+
+
+def test_spec_template_is_rendered_when_spec_is_accessed():
+    value = _CountingValue("in.txt")
+    target = Target(
+        name="TestTarget",
+        inputs=["in.txt"],
+        outputs=["out.txt"],
+        options={},
+        working_dir="/some/dir",
+        spec=SpecTemplate("cat {} > {output}", value, output="out.txt"),
+    )
+    assert value.count == 0
+    assert target.spec == "cat in.txt > out.txt"
+    assert value.count == 1
+    assert isinstance(target.raw_spec, SpecTemplate)
+
+
+def test_scheduling_does_not_render_spec_templates(schedule):
+    value = _CountingValue("in.txt")
+    target = Target(
+        name="TestTarget",
+        inputs=[],
+        outputs=["out.txt"],
+        options={},
+        working_dir="/some/dir",
+    ) << SpecTemplate("touch {}", value)
+    graph = Graph.from_targets([target])
+    schedule([target], graph)
+    assert value.count == 0
+
+
+def test_spec_template_can_be_pickled():
+    target = Target.empty("TestTarget") << SpecTemplate("echo {name}", name="foo")
+    restored = pickle.loads(pickle.dumps(target))
+    assert restored.spec == "echo foo"
+
+
+def test_spec_template_must_be_a_string():
+    with pytest.raises(TypeError):
+        SpecTemplate(42)
+
+
+def test_cached_filesystem_prefetches_files(tmpdir):
+    existing = [str(tmpdir.join("file{}.txt".format(idx))) for idx in range(10)]
+    for path in existing:
+        with open(path, "w"):
+            pass
+    missing = str(tmpdir.join("missing.txt"))
+
+    filesystem = CachedFilesystem(max_workers=4)
+    filesystem.prefetch(existing + [missing, existing[0]])
+    assert filesystem.misses == 0
+
+    assert all(filesystem.exists(path) for path in existing)
+    assert filesystem.changed_at(existing[0]) == os.stat(existing[0]).st_mtime
+    assert not filesystem.exists(missing)
+    assert filesystem.hits == 12
+    assert filesystem.misses == 0
+
+    assert not filesystem.exists(str(tmpdir.join("other.txt")))
+    assert filesystem.misses == 1
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_cached_filesystem_prefetches_by_listing_directories(tmpdir, max_workers):
+    data = tmpdir.mkdir("data")
+    existing = [str(data.join("file{}.txt".format(idx))) for idx in range(5)]
+    for path in existing:
+        with open(path, "w"):
+            pass
+    os.symlink(str(data.join("nowhere")), str(data.join("dangling")))
+    missing = [
+        str(data.join("missing.txt")),
+        str(data.join("dangling")),
+        str(tmpdir.join("nodir", "a.txt")),
+        str(tmpdir.join("nodir", "sub", "b.txt")),
+    ]
+    unnormalized = str(tmpdir) + "/data//file0.txt"
+
+    filesystem = CachedFilesystem(max_workers=max_workers, stat_mode="scandir")
+    filesystem.prefetch(existing + missing + [unnormalized])
+    assert all(filesystem.exists(path) for path in existing + [unnormalized])
+    assert filesystem.changed_at(existing[1]) == os.stat(existing[1]).st_mtime
+    assert not any(filesystem.exists(path) for path in missing)
+    assert filesystem.misses == 0
+
+
+def test_cached_filesystem_only_lists_directories_with_many_needed_paths():
+    filesystem = CachedFilesystem(scan_threshold=3)
+    paths = ["/a/1", "/a/2", "/a/3", "/b/1", "/b/2", "relative"]
+    scans, files = filesystem._plan_prefetch(paths)
+    assert scans == {"/a": ["/a/1", "/a/2", "/a/3"]}
+    assert sorted(files) == ["/b/1", "/b/2", "relative"]
+
+    filesystem = CachedFilesystem(stat_mode="stat")
+    assert filesystem._plan_prefetch(paths) == ({}, paths)
+
+
+def test_cached_filesystem_does_not_list_directories_below_missing_directory(
+    tmpdir, monkeypatch
+):
+    listed = []
+    scandir = os.scandir
+
+    def fake_scandir(path):
+        listed.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", fake_scandir)
+    nodir = str(tmpdir.join("nodir"))
+    paths = [os.path.join(nodir, "a.txt"), os.path.join(nodir, "sub", "b.txt")]
+
+    filesystem = CachedFilesystem(stat_mode="scandir")
+    filesystem.prefetch(paths)
+    assert listed == [nodir]
+    assert not any(filesystem.exists(path) for path in paths)
+
+
+def test_cached_filesystem_stats_files_in_directories_it_can_not_list(
+    tmpdir, monkeypatch
+):
+    def fake_scandir(path):
+        raise PermissionError(13, "Permission denied", path)
+
+    monkeypatch.setattr(os, "scandir", fake_scandir)
+    data = tmpdir.mkdir("data")
+    data.join("a.txt").write("")
+    paths = [str(data.join("a.txt")), str(data.join("missing.txt"))]
+
+    filesystem = CachedFilesystem(stat_mode="scandir")
+    filesystem.prefetch(paths)
+    assert filesystem.exists(paths[0])
+    assert not filesystem.exists(paths[1])
+    assert filesystem.misses == 0
+
+
+def test_cached_filesystem_rejects_invalid_stat_mode():
+    with pytest.raises(ValueError):
+        CachedFilesystem(stat_mode="foo")
+
+
+def test_scheduler_prefetches_files_of_scheduled_targets(tmpdir):
+    target1 = Target(
+        name="Target1",
+        inputs=["in.txt"],
+        outputs=["a.txt"],
+        options={},
+        working_dir=str(tmpdir),
+    )
+    target2 = Target(
+        name="Target2",
+        inputs=["a.txt"],
+        outputs=["b.txt"],
+        options={},
+        working_dir=str(tmpdir),
+    )
+    target3 = Target(
+        name="Target3",
+        inputs=[],
+        outputs=["c.txt"],
+        options={},
+        working_dir=str(tmpdir),
+    )
+    tmpdir.join("in.txt").write("")
+    graph = Graph.from_targets([target1, target2, target3])
+
+    filesystem = CachedFilesystem(max_workers=2)
+    scheduled, _ = _schedule([target2], graph, filesystem=filesystem)
+    assert set(scheduled) == {target1, target2}
+    assert set(filesystem._cache) == {
+        str(tmpdir.join("in.txt")),
+        str(tmpdir.join("a.txt")),
+        str(tmpdir.join("b.txt")),
+    }
+    assert filesystem.misses == 0
+
+
+def test_path_table_interns_paths():
+    paths = [
+        "/some/dir/a.txt",
+        "/some/dir/b.txt",
+        "/some/other/dir/a.txt",
+        "/a.txt",
+        "relative/a.txt",
+        "a.txt",
+        "/some//dir/",
+        "/",
+    ]
+    table = PathTable(paths)
+    assert list(table) == paths
+    assert len(table) == len(paths)
+    assert table.intern("/some/dir/b.txt") == 1
+    assert len(table) == len(paths)
+    for path_id, path in enumerate(paths):
+        assert table[path_id] == path
+        assert table.get_id(path) == path_id
+    assert table.get_id("/some/dir") is None
+    assert "/some/dir/c.txt" not in table
+    with pytest.raises(IndexError):
+        table[len(paths)]
+
+
+def test_path_table_lookup_table_is_rebuilt_when_dropped():
+    table = PathTable(["/some/dir/a.txt", "/some/dir/b.txt"])
+    table.drop_lookup_table()
+    assert table.get_id("/some/dir/b.txt") == 1
+    assert table.intern("/some/dir/c.txt") == 2
+
+
+def test_path_table_can_be_pickled():
+    table = PathTable(["/some/dir/a.txt", "/some/other/dir/a.txt"])
+    restored = pickle.loads(pickle.dumps(table))
+    assert list(restored) == list(table)
+    assert restored.get_id("/some/other/dir/a.txt") == 1
+    assert restored.intern("/some/dir/b.txt") == 2
+
+
+def test_path_table_stores_shared_prefixes_once():
+    def generate_paths(count):
+        for idx in range(count):
+            yield "/faststorage/project/xyz/data/sample_{:05d}/file_{}.bam".format(
+                idx // 5, idx % 5
+            )
+
+    count = 20000
+    tracemalloc.start()
+    table = PathTable(generate_paths(count))
+    table.drop_lookup_table()
+    table_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    paths = list(generate_paths(count))
+    path_ids = {path: idx for idx, path in enumerate(paths)}
+    plain_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert len(table) == len(path_ids)
+    assert table_size * 2 < plain_size
+
 
 def test_graph_construction(graph_factory):
     t1 = Target(
@@ -214,6 +541,35 @@ def test_graph_construction(graph_factory):
     }
 
 
+def test_graph_views_behave_like_mappings(diamond_graph):
+    target1 = diamond_graph.targets["TestTarget1"]
+    target2 = diamond_graph.targets["TestTarget2"]
+    target3 = diamond_graph.targets["TestTarget3"]
+    target4 = diamond_graph.targets["TestTarget4"]
+
+    assert target1 not in diamond_graph.dependencies
+    assert target4 in diamond_graph.dependencies
+    assert set(diamond_graph.dependencies) == {target2, target3, target4}
+    assert set(diamond_graph.dependents) == {target1, target2, target3}
+    assert len(diamond_graph.dependents) == 3
+
+    assert "/some/dir/final_output.txt" in diamond_graph.provides
+    assert "/some/dir/does_not_exist.txt" not in diamond_graph.provides
+    assert len(diamond_graph.provides) == 4
+    assert not diamond_graph.unresolved
+
+    assert diamond_graph.endpoints() == {target4}
+
+
+def test_graph_input_and_output_paths(diamond_graph):
+    target4 = diamond_graph.targets["TestTarget4"]
+    assert diamond_graph.input_paths(target4) == [
+        "/some/dir/test_output2.txt",
+        "/some/dir/test_output3.txt",
+    ]
+    assert diamond_graph.output_paths(target4) == ["/some/dir/final_output.txt"]
+
+
 def test_graph_raises_multiple_providers_error():
     t1 = Target(
         name="Target1",
@@ -257,8 +613,70 @@ def test_graph_raises_circular_dependency_error(graph_factory):
         options={},
         working_dir="/some/dir",
     )
-    with pytest.raises(WorkflowError):
+    with pytest.raises(WorkflowError) as excinfo:
         Graph.from_targets({"Target1": t1, "Target2": t2, "Target3": t3})
+    assert "Target1 -> Target3 -> Target2 -> Target1" in str(excinfo.value)
+
+
+def test_graph_reports_cycle_reachable_from_acyclic_part(graph_factory):
+    t1 = Target(
+        "Target1",
+        inputs=["f2.txt"],
+        outputs=["f1.txt"],
+        options={},
+        working_dir="/some/dir",
+    )
+    t2 = Target(
+        "Target2",
+        inputs=["f3.txt"],
+        outputs=["f2.txt"],
+        options={},
+        working_dir="/some/dir",
+    )
+    t3 = Target(
+        "Target3",
+        inputs=["f2.txt"],
+        outputs=["f3.txt"],
+        options={},
+        working_dir="/some/dir",
+    )
+    with pytest.raises(WorkflowError) as excinfo:
+        graph_factory([t1, t2, t3])
+    assert "Target2 -> Target3 -> Target2" in str(excinfo.value)
+
+
+def _linear_chain(length):
+    targets = [
+        Target(
+            "Target0",
+            inputs=[],
+            outputs=["f0.txt"],
+            options={},
+            working_dir="/some/dir",
+        )
+    ]
+    for idx in range(1, length):
+        targets.append(
+            Target(
+                "Target{}".format(idx),
+                inputs=["f{}.txt".format(idx - 1)],
+                outputs=["f{}.txt".format(idx)],
+                options={},
+                working_dir="/some/dir",
+            )
+        )
+    return targets
+
+
+def test_graph_algorithms_handle_long_chains(graph_factory, schedule):
+    targets = _linear_chain(5000)
+    graph = graph_factory(targets)
+
+    assert graph.dfs(targets[-1]) == targets
+
+    scheduled, reasons = schedule([targets[-1]], graph)
+    assert len(scheduled) == 5000
+    assert scheduled[targets[-1]] == {targets[-2]}
 
 
 def test_graph_raises_when_two_targets_output_the_same_file(graph_factory):
@@ -297,6 +715,67 @@ def test_graph_subset(diamond_graph):
     assert set([target1, target2, target3, target4]) == set(g3.targets.values())
 
 
+def test_graph_subset_shares_arrays_with_graph(diamond_graph):
+    target2 = diamond_graph.targets["TestTarget2"]
+    subgraph = diamond_graph.subset([target2])
+    assert subgraph._nodes is diamond_graph._nodes
+    assert subgraph._paths is diamond_graph._paths
+    assert subgraph._dependencies is diamond_graph._dependencies
+    assert subgraph._inputs is diamond_graph._inputs
+
+
+def test_graph_subset_views_only_include_targets_in_subset(diamond_graph):
+    target1 = diamond_graph.targets["TestTarget1"]
+    target2 = diamond_graph.targets["TestTarget2"]
+    target4 = diamond_graph.targets["TestTarget4"]
+
+    subgraph = diamond_graph.subset([target2])
+    assert len(subgraph) == 2
+    assert target4 not in subgraph
+    assert subgraph.dependents[target1] == {target2}
+    assert set(subgraph.dependencies) == {target2}
+    assert subgraph.dependencies[target4] == set()
+    assert subgraph.endpoints() == {target2}
+    assert set(subgraph.provides) == {
+        "/some/dir/test_output1.txt",
+        "/some/dir/test_output2.txt",
+    }
+    assert "/some/dir/final_output.txt" not in subgraph.provides
+    assert list(subgraph.dfs(target2)) == [target1, target2]
+    assert list(subgraph.subset([target1])) == [target1]
+
+
+def test_graph_subset_unresolved_only_includes_inputs_of_subset():
+    target1 = Target(
+        name="Target1",
+        inputs=["a.txt"],
+        outputs=["b.txt"],
+        options={},
+        working_dir="/some/dir",
+    )
+    target2 = Target(
+        name="Target2",
+        inputs=["c.txt"],
+        outputs=[],
+        options={},
+        working_dir="/some/dir",
+    )
+    graph = Graph.from_targets([target1, target2])
+    assert set(graph.unresolved) == {"/some/dir/a.txt", "/some/dir/c.txt"}
+
+    subgraph = graph.subset([target1])
+    assert set(subgraph.unresolved) == {"/some/dir/a.txt"}
+    assert "/some/dir/c.txt" not in subgraph.unresolved
+
+
+def test_schedule_subset_of_graph(diamond_graph, schedule):
+    target1 = diamond_graph.targets["TestTarget1"]
+    target3 = diamond_graph.targets["TestTarget3"]
+    subgraph = diamond_graph.subset([target3])
+    scheduled, _ = schedule([target3], subgraph)
+    assert scheduled == {target1: set(), target3: {target1}}
+
+
 def test_schedule_if_one_of_its_output_files_does_not_exist(diamond_graph, schedule):
     target = diamond_graph.targets["TestTarget1"]
     scheduled, reasons = schedule([target], diamond_graph)
@@ -376,6 +855,245 @@ def test_do_not_schedule_if_all_outputs_are_newer_then_the_inputs(
     assert len(not_scheduled) == 4
 
 
+def test_graph_downstream_returns_cone_in_topological_order(diamond_graph):
+    idx = {target.name: diamond_graph._index[target] for target in diamond_graph}
+    order = diamond_graph._downstream([idx["TestTarget1"]])
+    assert order[0] == idx["TestTarget1"]
+    assert order[-1] == idx["TestTarget4"]
+    assert set(order[1:3]) == {idx["TestTarget2"], idx["TestTarget3"]}
+    assert diamond_graph._downstream([idx["TestTarget3"]]) == [
+        idx["TestTarget3"],
+        idx["TestTarget4"],
+    ]
+
+
+def test_graph_consumers_maps_paths_to_targets_using_them(diamond_graph):
+    path_id = diamond_graph._paths.get_id("/some/dir/test_output1.txt")
+    consumers = {
+        diamond_graph._nodes[idx].name for idx in diamond_graph._consumers[path_id]
+    }
+    assert consumers == {"TestTarget2", "TestTarget3"}
+
+    subgraph = diamond_graph.subset([diamond_graph.targets["TestTarget2"]])
+    consumers = {subgraph._nodes[idx].name for idx in subgraph._consumers[path_id]}
+    assert consumers == {"TestTarget2"}
+
+
+def test_graph_consumers(diamond_graph):
+    target2 = diamond_graph.targets["TestTarget2"]
+    target3 = diamond_graph.targets["TestTarget3"]
+    target4 = diamond_graph.targets["TestTarget4"]
+    assert diamond_graph.consumers["/some/dir/test_output1.txt"] == {target2, target3}
+    assert diamond_graph.consumers["/some/dir/test_output2.txt"] == {target4}
+    assert "/some/dir/final_output.txt" not in diamond_graph.consumers
+    assert len(diamond_graph.consumers) == 3
+
+
+def test_graph_downstream_and_upstream(diamond_graph):
+    target1 = diamond_graph.targets["TestTarget1"]
+    target2 = diamond_graph.targets["TestTarget2"]
+    target3 = diamond_graph.targets["TestTarget3"]
+    target4 = diamond_graph.targets["TestTarget4"]
+
+    assert diamond_graph.downstream(targets=[target3]) == [target3, target4]
+    assert diamond_graph.downstream(paths=["/some/dir/test_output2.txt"]) == [
+        target4
+    ]
+    assert diamond_graph.downstream(paths=["/some/dir/unknown.txt"]) == []
+
+    assert diamond_graph.upstream(targets=[target2]) == [target1, target2]
+    assert diamond_graph.upstream(paths=["/some/dir/test_output3.txt"]) == [
+        target1,
+        target3,
+    ]
+
+    subgraph = diamond_graph.subset([target2])
+    assert subgraph.downstream(targets=[target1]) == [target1, target2]
+    with pytest.raises(KeyError):
+        subgraph.downstream(targets=[target3])
+
+
+@pytest.fixture
+def up_to_date_diamond(diamond_graph, filesystem):
+    filesystem.add_file("/some/dir/test_output1.txt", changed_at=0)
+    filesystem.add_file("/some/dir/test_output2.txt", changed_at=1)
+    filesystem.add_file("/some/dir/test_output3.txt", changed_at=2)
+    filesystem.add_file("/some/dir/final_output.txt", changed_at=3)
+    return diamond_graph
+
+
+def _spy_on_decisions(scheduler, monkeypatch):
+    decided = []
+    should_schedule = scheduler._should_schedule
+
+    def spy(idx, graph):
+        decided.append(graph._nodes[idx].name)
+        return should_schedule(idx, graph)
+
+    monkeypatch.setattr(scheduler, "_should_schedule", spy)
+    return decided
+
+
+def test_reschedule_only_decides_targets_affected_by_changed_paths(
+    up_to_date_diamond, filesystem, monkeypatch
+):
+    graph = up_to_date_diamond
+    target4 = graph.targets["TestTarget4"]
+    scheduler = Scheduler(filesystem=filesystem)
+    scheduled, _ = scheduler.schedule([target4], graph)
+    assert scheduled == {}
+
+    decided = _spy_on_decisions(scheduler, monkeypatch)
+    filesystem.add_file("/some/dir/test_output2.txt", changed_at=5)
+    scheduled, reasons = scheduler.reschedule(
+        graph, changed_paths=["/some/dir/test_output2.txt"]
+    )
+    assert decided == ["TestTarget2", "TestTarget4"]
+    assert scheduled == {target4: set()}
+    assert reasons[target4] == (
+        "TestTarget4 was scheduled because input file /some/dir/test_output2.txt "
+        "is newer than output file /some/dir/final_output.txt"
+    )
+    assert reasons[graph.targets["TestTarget1"]] == (
+        "TestTarget1 was not scheduled because it is a source"
+    )
+
+
+def test_reschedule_after_targets_completed(diamond_graph, filesystem, monkeypatch):
+    target1 = diamond_graph.targets["TestTarget1"]
+    target4 = diamond_graph.targets["TestTarget4"]
+    filesystem.add_file("/some/dir/test_output1.txt", changed_at=0)
+    filesystem.add_file("/some/dir/test_output2.txt", changed_at=1)
+    filesystem.add_file("/some/dir/test_output3.txt", changed_at=2)
+
+    scheduler = Scheduler(filesystem=filesystem)
+    scheduled, _ = scheduler.schedule([target4], diamond_graph)
+    assert scheduled == {target4: set()}
+
+    decided = _spy_on_decisions(scheduler, monkeypatch)
+    filesystem.add_file("/some/dir/final_output.txt", changed_at=3)
+    scheduled, _ = scheduler.reschedule(diamond_graph, completed=[target4])
+    assert decided == ["TestTarget4"]
+    assert scheduled == {}
+
+    filesystem.add_file("/some/dir/test_output1.txt", changed_at=4)
+    scheduled, _ = scheduler.reschedule(diamond_graph, completed=[target1])
+    assert set(scheduled) == {
+        diamond_graph.targets["TestTarget2"],
+        diamond_graph.targets["TestTarget3"],
+        target4,
+    }
+    assert target1 not in scheduled
+
+
+def test_reschedule_ignores_targets_that_were_not_scheduled(
+    up_to_date_diamond, filesystem
+):
+    graph = up_to_date_diamond
+    scheduler = Scheduler(filesystem=filesystem)
+    scheduler.schedule([graph.targets["TestTarget2"]], graph)
+
+    filesystem.add_file("/some/dir/test_output1.txt", changed_at=5)
+    scheduled, reasons = scheduler.reschedule(
+        graph, changed_paths=["/some/dir/test_output1.txt"]
+    )
+    assert set(scheduled) == {graph.targets["TestTarget2"]}
+    assert graph.targets["TestTarget4"] not in reasons
+
+
+def test_reschedule_requires_graph_to_be_scheduled(diamond_graph, filesystem):
+    scheduler = Scheduler(filesystem=filesystem)
+    with pytest.raises(ValueError):
+        scheduler.reschedule(diamond_graph, changed_paths=["test_output1.txt"])
+
+
+def _random_workflow(rng, filesystem):
+    targets = []
+    for idx in range(rng.randint(1, 40)):
+        inputs = []
+        for dep in rng.sample(targets, min(len(targets), rng.randint(0, 3))):
+            inputs.extend(dep.flattened_outputs())
+        if rng.random() < 0.3:
+            inputs.append("source{}.txt".format(rng.randint(0, 5)))
+        inputs = sorted(set(inputs))
+        outputs = []
+        if rng.random() < 0.9:
+            outputs = ["out{}_{}.txt".format(idx, n) for n in range(rng.randint(1, 2))]
+        # Files given as dictionaries of empty lists flatten to nothing, even
+        # though the target is not a source or a sink.
+        if not inputs and rng.random() < 0.05:
+            inputs = {"none": []}
+        if not outputs and rng.random() < 0.2:
+            outputs = {"none": []}
+        targets.append(
+            Target(
+                "Target{}".format(idx),
+                inputs=inputs,
+                outputs=outputs,
+                options={},
+                working_dir="/some/dir",
+            )
+        )
+
+    paths = set()
+    for target in targets:
+        paths.update(target.flattened_inputs())
+        paths.update(target.flattened_outputs())
+    for path in sorted(paths):
+        if rng.random() < 0.9:
+            filesystem.add_file(path, changed_at=rng.randint(0, 5))
+    return targets, sorted(paths)
+
+
+def _decide(scheduler, func, *args):
+    try:
+        scheduled, reasons = func(*args)
+    except (WorkflowError, ValueError) as exc:
+        return "{}: {}".format(type(exc).__name__, exc)
+    return dict(scheduled), dict(reasons)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_level_scheduler_makes_same_decisions_as_scheduler(seed, filesystem):
+    rng = random.Random(seed)
+    targets, paths = _random_workflow(rng, filesystem)
+    graph = Graph.from_targets(targets)
+    endpoints = rng.sample(targets, rng.randint(1, len(targets)))
+
+    scheduler = Scheduler(filesystem=filesystem)
+    level_scheduler = LevelScheduler(filesystem=filesystem)
+    expected = _decide(scheduler, scheduler.schedule, endpoints, graph)
+    assert _decide(level_scheduler, level_scheduler.schedule, endpoints, graph) == (
+        expected
+    )
+    if isinstance(expected, str):
+        return
+
+    changed = rng.sample(paths, min(len(paths), rng.randint(1, 3)))
+    for path in changed:
+        filesystem.add_file(path, changed_at=rng.randint(0, 6))
+    expected = _decide(scheduler, scheduler.reschedule, graph, changed)
+    assert _decide(level_scheduler, level_scheduler.reschedule, graph, changed) == (
+        expected
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_level_scheduler_falls_back_to_scheduler_without_numpy(
+    seed, filesystem, monkeypatch
+):
+    monkeypatch.setattr("gwf.core.numpy", None)
+    rng = random.Random(seed)
+    targets, _ = _random_workflow(rng, filesystem)
+    graph = Graph.from_targets(targets)
+
+    scheduler = Scheduler(filesystem=filesystem)
+    level_scheduler = LevelScheduler(filesystem=filesystem)
+    assert _decide(level_scheduler, level_scheduler.schedule, targets, graph) == (
+        _decide(scheduler, scheduler.schedule, targets, graph)
+    )
+
+
 def test_scheduler_raises_if_input_file_is_not_provided_and_does_not_exist(
     schedule, graph_factory
 ):
@@ -483,6 +1201,90 @@ def test_scheduling_multiple_targets(diamond_graph, schedule):
     assert len(scheduled) == 3
 
 
+@pytest.mark.parametrize("engine", sorted(SCHEDULERS))
+def test_explain_returns_structured_decisions(engine, diamond_graph, filesystem):
+    filesystem.add_file("/some/dir/test_output1.txt", 2)
+    filesystem.add_file("/some/dir/test_output2.txt", 1)
+    filesystem.add_file("/some/dir/test_output3.txt", 3)
+    target1, target2, target3, target4 = (
+        diamond_graph.targets["TestTarget{}".format(i)] for i in range(1, 5)
+    )
+
+    scheduler = SCHEDULERS[engine](filesystem=filesystem)
+    scheduler.schedule([target4], diamond_graph)
+
+    assert scheduler.explain(target1) == Decision(
+        target1, False, Reason.SOURCE, None, None, None
+    )
+    assert scheduler.explain(target2) == Decision(
+        target2,
+        True,
+        Reason.INPUT_NEWER,
+        None,
+        "/some/dir/test_output1.txt",
+        "/some/dir/test_output2.txt",
+    )
+    assert scheduler.explain(target3) == Decision(
+        target3, False, Reason.UP_TO_DATE, None, None, None
+    )
+    decision = scheduler.explain(target4)
+    assert decision.scheduled
+    assert decision.reason == Reason.DEPENDENCY_SCHEDULED
+    assert decision.dependency == target2
+    assert str(decision) == (
+        "TestTarget4 was scheduled because its dependency TestTarget2 was scheduled"
+    )
+
+
+def test_explain_raises_for_target_that_was_not_scheduled(diamond_graph, filesystem):
+    scheduler = Scheduler(filesystem=filesystem)
+    with pytest.raises(KeyError):
+        scheduler.explain(diamond_graph.targets["TestTarget1"])
+
+    scheduler.schedule([diamond_graph.targets["TestTarget1"]], diamond_graph)
+    with pytest.raises(KeyError):
+        scheduler.explain(diamond_graph.targets["TestTarget4"])
+
+
+def test_decision_describes_missing_output(diamond_graph):
+    target = diamond_graph.targets["TestTarget1"]
+    decision = Decision(
+        target, True, Reason.OUTPUT_MISSING, None, None, "/some/dir/test_output1.txt"
+    )
+    assert str(decision) == (
+        "TestTarget1 was scheduled because its output file "
+        "/some/dir/test_output1.txt does not exist"
+    )
+
+
+def test_building_and_scheduling_many_graphs_does_not_leak_memory():
+    def build_and_schedule(run):
+        targets = _linear_chain(50)
+        for target in targets:
+            target.working_dir = "/some/dir/run{}".format(run)
+        graph = Graph.from_targets(targets)
+        graph.dfs(targets[-1])
+        scheduled, _ = _schedule([targets[-1]], graph)
+        assert len(scheduled) == 50
+        return weakref.ref(graph)
+
+    for run in range(10):
+        build_and_schedule(run)
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        refs = [build_and_schedule(run) for run in range(10, 110)]
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert all(ref() is None for ref in refs)
+    assert current - baseline < 256 * 1024
+
+
 def test_get_status(backend):
     target = Target(
         "TestTarget", inputs=[], outputs=[], options={}, working_dir="/some/dir"
@@ -0,0 +1,99 @@
+import sys
+
+import pytest
+
+from gwf.graphcache import GraphCache, load_graph
+
+
+WORKFLOW = """from gwf import Workflow
+
+from templates import copy
+
+with open("evaluations.txt", "a") as fileobj:
+    fileobj.write("x")
+
+gwf = Workflow()
+gwf.target("Target1", inputs=[], outputs=["a.txt"])
+for idx, path in enumerate(sorted(gwf.glob("*.in"))):
+    gwf.target_from_template("Copy{}".format(idx), copy(path, path + ".out"))
+"""
+
+TEMPLATES = """from gwf import AnonymousTarget
+
+
+def copy(src, dst):
+    return AnonymousTarget(
+        inputs=[src], outputs=[dst], options={}, spec="cp {} {}".format(src, dst)
+    )
+"""
+
+
+@pytest.fixture(autouse=True)
+def workflow_dir(tmpdir):
+    tmpdir.join("workflow.py").write(WORKFLOW)
+    tmpdir.join("templates.py").write(TEMPLATES)
+    tmpdir.join("a.in").write("")
+    tmpdir.mkdir(".gwf")
+    with tmpdir.as_cwd():
+        yield tmpdir
+
+
+def _load(workflow_dir, **kwargs):
+    # The workflow imports the templates module from the workflow directory,
+    # so make sure that each load imports it from scratch.
+    sys.modules.pop("templates", None)
+
+    config = {"file": "workflow.py:gwf", "graph_cache": True}
+    config.update(kwargs)
+    graph = load_graph(config)
+    return graph, len(workflow_dir.join("evaluations.txt").read())
+
+
+def test_cached_graph_is_used_when_nothing_changed(workflow_dir):
+    graph1, evaluations = _load(workflow_dir)
+    assert evaluations == 1
+
+    graph2, evaluations = _load(workflow_dir)
+    assert evaluations == 1
+    assert set(graph2.targets) == set(graph1.targets) == {"Target1", "Copy0"}
+    assert graph2.output_paths(graph2.targets["Copy0"]) == [
+        str(workflow_dir.join("a.in.out"))
+    ]
+
+
+def test_graph_is_rebuilt_when_workflow_file_changes(workflow_dir):
+    _load(workflow_dir)
+    workflow_dir.join("workflow.py").write(WORKFLOW + "\n# changed\n")
+    graph, evaluations = _load(workflow_dir)
+    assert evaluations == 2
+
+
+def test_graph_is_rebuilt_when_imported_module_changes(workflow_dir):
+    _load(workflow_dir)
+    workflow_dir.join("templates.py").write(TEMPLATES + "\n# changed\n")
+    graph, evaluations = _load(workflow_dir)
+    assert evaluations == 2
+
+
+def test_graph_is_rebuilt_when_glob_matches_change(workflow_dir):
+    _load(workflow_dir)
+    workflow_dir.join("b.in").write("")
+    graph, evaluations = _load(workflow_dir)
+    assert evaluations == 2
+    assert set(graph.targets) == {"Target1", "Copy0", "Copy1"}
+
+
+def test_graph_is_rebuilt_when_forced(workflow_dir):
+    _load(workflow_dir)
+    graph, evaluations = _load(workflow_dir, rebuild_cache=True)
+    assert evaluations == 2
+
+
+def test_graph_cache_is_not_used_unless_enabled(workflow_dir):
+    _load(workflow_dir, graph_cache=False)
+    assert not workflow_dir.join(".gwf").listdir()
+
+
+def test_graph_cache_is_stale_for_other_workflow_files(workflow_dir):
+    _load(workflow_dir)
+    assert GraphCache("other.py:gwf").load() is None
@@ -0,0 +1,215 @@
+import os
+import time
+
+import pytest
+
+from gwf.core import CachedFilesystem, Graph, SpecTemplate, Target, schedule
+from gwf.manifest import CompletionManifest
+
+
+def _age(path, seconds=3600):
+    timestamp = time.time() - seconds
+    os.utime(str(path), (timestamp, timestamp))
+
+
+@pytest.fixture(autouse=True)
+def no_sampling(monkeypatch):
+    # Trust records unless the test asks for all of them to be checked.
+    monkeypatch.setattr("gwf.manifest.random.random", lambda: 0.5)
+
+
+@pytest.fixture
+def workflow(tmpdir):
+    data = tmpdir.mkdir("data")
+    data.join("input.txt").write("input")
+    data.join("output.txt").write("output")
+    _age(data.join("input.txt"), 7200)
+    _age(data.join("output.txt"))
+    _age(data)
+
+    source = Target(
+        "Source",
+        inputs=[],
+        outputs=["data/input.txt"],
+        options={},
+        working_dir=str(tmpdir),
+        spec="echo input > data/input.txt",
+    )
+    target = Target(
+        "Target",
+        inputs=["data/input.txt"],
+        outputs=["data/output.txt"],
+        options={},
+        working_dir=str(tmpdir),
+        spec="cat data/input.txt > data/output.txt",
+    )
+    return tmpdir, source, target
+
+
+def _output_paths(target):
+    return list(target.flattened_outputs())
+
+
+def _record(manifest_path, *targets):
+    manifest = CompletionManifest(manifest_path)
+    for target in targets:
+        manifest.record(target)
+    manifest.save()
+
+
+def test_manifest_returns_recorded_stats_of_trusted_targets(workflow):
+    tmpdir, source, target = workflow
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    _record(manifest_path, source, target)
+
+    manifest = CompletionManifest(manifest_path)
+    found = manifest.lookup([source, target], _output_paths)
+    assert manifest.trusted == {"Source", "Target"}
+    path = str(tmpdir.join("data", "output.txt"))
+    assert found[path] == CachedFilesystem().stat(path)
+
+
+def test_manifest_does_not_trust_target_with_changed_spec(workflow):
+    tmpdir, source, target = workflow
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    _record(manifest_path, target)
+
+    target.spec = "cat data/input.txt data/input.txt > data/output.txt"
+    manifest = CompletionManifest(manifest_path)
+    assert manifest.lookup([target], _output_paths) == {}
+    assert manifest.trusted == set()
+
+
+def test_manifest_does_not_trust_target_in_changed_directory(workflow):
+    tmpdir, source, target = workflow
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    _record(manifest_path, target)
+
+    tmpdir.join("data", "other.txt").write("other")
+    _age(tmpdir.join("data"), 1800)
+    assert CompletionManifest(manifest_path).lookup([target], _output_paths) == {}
+
+
+def test_manifest_verifies_sampled_targets(workflow):
+    tmpdir, source, target = workflow
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    _record(manifest_path, target)
+
+    manifest = CompletionManifest(manifest_path, sample_rate=1.0)
+    assert manifest.lookup([target], _output_paths) == {}
+
+
+def test_manifest_ignores_partially_written_records(workflow):
+    tmpdir, source, target = workflow
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    _record(manifest_path, target)
+    with open(manifest_path, "a") as fileobj:
+        fileobj.write('{"version": 1, "target": "Sou')
+
+    manifest = CompletionManifest(manifest_path)
+    assert set(manifest.records) == {"Target"}
+
+
+def test_manifest_is_compacted(workflow, monkeypatch):
+    monkeypatch.setattr("gwf.manifest._COMPACT_SLACK", 2)
+    tmpdir, source, target = workflow
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    for _ in range(4):
+        _record(manifest_path, target)
+
+    manifest = CompletionManifest(manifest_path)
+    assert len(manifest.records) == 1
+    manifest.record(source)
+    manifest.save()
+
+    with open(manifest_path) as fileobj:
+        assert len(fileobj.readlines()) == 2
+    assert set(CompletionManifest(manifest_path).records) == {"Source", "Target"}
+
+
+def test_scheduler_records_and_trusts_completed_targets(workflow):
+    tmpdir, source, target = workflow
+    graph = Graph.from_targets([source, target])
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+
+    with CachedFilesystem(manifest=CompletionManifest(manifest_path)) as filesystem:
+        scheduled, _ = schedule([target], graph, filesystem=filesystem)
+    assert scheduled == {}
+    assert filesystem.manifest.trusted == set()
+
+    manifest = CompletionManifest(manifest_path)
+    filesystem = CachedFilesystem(manifest=manifest)
+    scheduled, _ = schedule([target], graph, filesystem=filesystem)
+    assert scheduled == {}
+    assert manifest.trusted == {"Source", "Target"}
+    assert filesystem.misses == 0
+
+
+@pytest.mark.parametrize("engine", ["depth-first", "level"])
+def test_scheduler_checks_outputs_of_trusted_target_found_out_of_date(workflow, engine):
+    tmpdir, source, target = workflow
+    graph = Graph.from_targets([target])
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    with CachedFilesystem(manifest=CompletionManifest(manifest_path)) as filesystem:
+        schedule([target], graph, filesystem=filesystem, engine=engine)
+
+    # The target is rerun after its input changed and rewrites its output in
+    # place, which does not change the modification time of the directory.
+    _age(tmpdir.join("data", "input.txt"), 1800)
+    tmpdir.join("data", "output.txt").write("new output")
+
+    manifest = CompletionManifest(manifest_path)
+    with CachedFilesystem(manifest=manifest) as filesystem:
+        scheduled, _ = schedule([target], graph, filesystem=filesystem, engine=engine)
+    assert scheduled == {}
+    assert manifest.trusted == set()
+
+    # The stale record was replaced.
+    manifest = CompletionManifest(manifest_path)
+    scheduled, _ = schedule(
+        [target], graph, filesystem=CachedFilesystem(manifest=manifest), engine=engine
+    )
+    assert scheduled == {}
+    assert manifest.trusted == {"Target"}
+
+
+class _Sample:
+    def __format__(self, format_spec):
+        return "data/input.txt"
+
+
+def test_manifest_trusts_spec_templates_with_arguments_without_stable_repr(
+    workflow,
+):
+    tmpdir, source, target = workflow
+    target.spec = SpecTemplate("cat {} > data/output.txt", _Sample())
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    _record(manifest_path, target)
+
+    target.spec = SpecTemplate("cat {} > data/output.txt", _Sample())
+    manifest = CompletionManifest(manifest_path)
+    manifest.lookup([target], _output_paths)
+    assert manifest.trusted == {"Target"}
+
+
+def test_scheduler_trusts_targets_without_rendering_spec_templates(
+    workflow, monkeypatch
+):
+    tmpdir, source, target = workflow
+    target.spec = SpecTemplate("cat {} > {}", "data/input.txt", "data/output.txt")
+    graph = Graph.from_targets([source, target])
+    manifest_path = str(tmpdir.join("completed.jsonl"))
+    with CachedFilesystem(manifest=CompletionManifest(manifest_path)) as filesystem:
+        schedule([target], graph, filesystem=filesystem)
+
+    def render(self):
+        raise AssertionError("spec template was rendered")
+
+    monkeypatch.setattr(SpecTemplate, "render", render)
+    manifest = CompletionManifest(manifest_path)
+    scheduled, _ = schedule(
+        [target], graph, filesystem=CachedFilesystem(manifest=manifest)
+    )
+    assert scheduled == {}
+    assert manifest.trusted == {"Source", "Target"}
+    assert target._flattened_outputs is None
@@ -0,0 +1,119 @@
+import pickle
+
+import pytest
+
+from gwf.core import Graph, Target
+from gwf.exceptions import GWFError
+from gwf.plan import FORMAT_VERSION, read_plan, write_plan
+
+
+@pytest.fixture
+def plan_graph():
+    target1 = Target(
+        "TestTarget1",
+        inputs=["input.txt"],
+        outputs={"A": ["a1.txt", "a2.txt"]},
+        options={"cores": 4, "memory": "4g"},
+        working_dir="/some/dir",
+        spec="echo hello",
+        protect=["a1.txt"],
+    )
+    target2 = Target(
+        "TestTarget2",
+        inputs=target1.outputs["A"],
+        outputs=["b.txt"],
+        options={"cores": 4, "memory": "4g"},
+        working_dir="/some/dir",
+        spec="echo world",
+    )
+    target3 = Target(
+        "TestTarget3",
+        inputs=["/some/dir/b.txt"],
+        outputs=[],
+        options={},
+        working_dir="/some/other/dir",
+    )
+    return Graph.from_targets([target1, target2, target3])
+
+
+def test_plan_roundtrip(plan_graph, tmpdir):
+    path = str(tmpdir.join("plan.bin"))
+    write_plan(plan_graph, path)
+    graph = read_plan(path)
+
+    assert set(graph.targets) == {"TestTarget1", "TestTarget2", "TestTarget3"}
+    target1 = graph.targets["TestTarget1"]
+    target2 = graph.targets["TestTarget2"]
+    target3 = graph.targets["TestTarget3"]
+
+    assert graph.dependencies[target2] == {target1}
+    assert graph.dependents[target2] == {target3}
+    assert graph.endpoints() == {target3}
+    assert graph.provides["/some/dir/a2.txt"] == target1
+    assert set(graph.unresolved) == {"/some/dir/input.txt"}
+    assert graph.dfs(target3) == [target1, target2, target3]
+
+    assert target1.spec == "echo hello"
+    assert target1.working_dir == "/some/dir"
+    assert target1.options == {"cores": 4, "memory": "4g"}
+    assert target1.protected == {"a1.txt"}
+    assert list(target1.outputs) == ["/some/dir/a1.txt", "/some/dir/a2.txt"]
+    assert target1.outputs[1:] == ["/some/dir/a2.txt"]
+    assert target1.outputs[::-1] == ["/some/dir/a2.txt", "/some/dir/a1.txt"]
+    assert target3.is_sink
+    assert not target3.is_source
+
+
+def test_plan_can_be_scheduled_and_subset(plan_graph, tmpdir, schedule, filesystem):
+    path = str(tmpdir.join("plan.bin"))
+    write_plan(plan_graph, path)
+    graph = read_plan(path)
+
+    filesystem.add_file("/some/dir/input.txt", changed_at=0)
+    target2 = graph.targets["TestTarget2"]
+    scheduled, reasons = schedule([target2], graph)
+    assert set(scheduled) == {graph.targets["TestTarget1"], target2}
+
+    subgraph = graph.subset([target2])
+    assert set(subgraph.targets) == {"TestTarget1", "TestTarget2"}
+
+
+def test_targets_loaded_from_plan_can_be_pickled(plan_graph, tmpdir):
+    path = str(tmpdir.join("plan.bin"))
+    write_plan(plan_graph, path)
+    target1 = read_plan(path).targets["TestTarget1"]
+
+    restored = pickle.loads(pickle.dumps(target1))
+    assert restored.outputs == ["/some/dir/a1.txt", "/some/dir/a2.txt"]
+    assert restored.flattened_outputs() == target1.flattened_outputs()
+
+
+def test_reading_missing_plan_raises(tmpdir):
+    with pytest.raises(GWFError):
+        read_plan(str(tmpdir.join("plan.bin")))
+
+
+def test_reading_plan_with_other_format_version_raises(plan_graph, tmpdir):
+    path = tmpdir.join("plan.bin")
+    write_plan(plan_graph, str(path))
+    data = bytearray(path.read_binary())
+    data[8] += 1
+    path.write_binary(bytes(data))
+
+    with pytest.raises(GWFError) as excinfo:
+        read_plan(str(path))
+    assert "plan format version {}, expected {}".format(
+        FORMAT_VERSION + 1, FORMAT_VERSION
+    ) in str(excinfo.value)
+
+
+def test_writing_plan_with_unserializable_options_raises(tmpdir):
+    target = Target(
+        "TestTarget",
+        inputs=[],
+        outputs=[],
+        options={"cores": object()},
+        working_dir="/some/dir",
+    )
+    with pytest.raises(GWFError):
+        write_plan(Graph.from_targets([target]), str(tmpdir.join("plan.bin")))
@@ -0,0 +1,100 @@
+import os
+import time
+
+import pytest
+
+from gwf.core import CachedFilesystem
+from gwf.statcache import StatCache
+
+
+def _age(path, seconds=3600):
+    timestamp = time.time() - seconds
+    os.utime(path, (timestamp, timestamp))
+
+
+@pytest.fixture
+def data(tmpdir):
+    data = tmpdir.mkdir("data")
+    data.join("a.txt").write("a")
+    data.join("b.txt").write("b")
+    _age(str(data))
+    return data
+
+
+def _stats(filesystem, paths):
+    filesystem.prefetch(paths)
+    return {path: filesystem.stat(path) for path in paths}
+
+
+def test_stat_cache_returns_stored_stats_when_directory_is_unchanged(tmpdir, data):
+    cache_path = str(tmpdir.join("stat-cache.json"))
+    paths = [str(data.join("a.txt")), str(data.join("missing.txt"))]
+
+    cache = StatCache(cache_path)
+    assert cache.lookup(paths) == {}
+    stats = _stats(CachedFilesystem(), paths)
+    cache.update(stats)
+    cache.save()
+
+    cache = StatCache(cache_path)
+    found = cache.lookup(paths + [str(data.join("b.txt"))])
+    assert found == stats
+    assert found[paths[0]].mtime == os.stat(paths[0]).st_mtime
+
+
+def test_stat_cache_ignores_entries_in_changed_directory(tmpdir, data):
+    cache_path = str(tmpdir.join("stat-cache.json"))
+    paths = [str(data.join("a.txt"))]
+
+    cache = StatCache(cache_path)
+    cache.lookup(paths)
+    cache.update(_stats(CachedFilesystem(), paths))
+    cache.save()
+
+    data.join("c.txt").write("c")
+    _age(str(data), seconds=1800)
+    assert StatCache(cache_path).lookup(paths) == {}
+
+
+def test_stat_cache_does_not_trust_recently_modified_directory(tmpdir, data):
+    cache_path = str(tmpdir.join("stat-cache.json"))
+    paths = [str(data.join("a.txt"))]
+    os.utime(str(data))
+
+    cache = StatCache(cache_path)
+    cache.lookup(paths)
+    cache.update(_stats(CachedFilesystem(), paths))
+    cache.save()
+    assert not os.path.exists(cache_path)
+
+
+def test_unreadable_stat_cache_is_ignored(tmpdir, data):
+    cache_path = tmpdir.join("stat-cache.json")
+    cache_path.write("{not json")
+    assert StatCache(str(cache_path)).lookup([str(data.join("a.txt"))]) == {}
+
+
+def test_cached_filesystem_uses_stat_cache_for_source_files(
+    tmpdir, data, monkeypatch
+):
+    cache_path = str(tmpdir.join("stat-cache.json"))
+    source = str(data.join("a.txt"))
+    output = str(data.join("b.txt"))
+
+    with CachedFilesystem(stat_cache=StatCache(cache_path)) as filesystem:
+        filesystem.prefetch([source, output], source_paths=[source])
+        expected = filesystem.changed_at(source)
+
+    stated = []
+    stat = CachedFilesystem._stat
+
+    def fake_stat(path):
+        stated.append(path)
+        return stat(path)
+
+    monkeypatch.setattr(CachedFilesystem, "_stat", staticmethod(fake_stat))
+    with CachedFilesystem(stat_cache=StatCache(cache_path)) as filesystem:
+        filesystem.prefetch([source, output], source_paths=[source])
+        assert filesystem.changed_at(source) == expected
+        assert filesystem.exists(output)
+    assert stated == [output]
@@ -1,20 +1,101 @@
+import pickle
+
 import pytest
 
-from gwf.utils import parse_path, cache, PersistableDict, ensure_trailing_newline, retry
+from gwf.utils import (
+    LRUCache,
+    OptionSet,
+    PersistableDict,
+    ensure_trailing_newline,
+    memoized_method,
+    parse_path,
+    retry,
+)
+
+
+class Memoized:
+    def __init__(self):
+        self.calls = 0
+
+    @memoized_method(maxsize=2)
+    def compute(self, x):
+        self.calls += 1
+        return object()
+
+
+def test_memoized_method_caches_per_instance():
+    obj1, obj2 = Memoized(), Memoized()
+    assert obj1.compute(42) is obj1.compute(42)
+    assert obj1.compute(42) is not obj2.compute(42)
+    assert obj1.calls == 1
+    assert obj2.calls == 1
+
+
+def test_memoized_method_is_bounded_and_can_be_cleared():
+    obj = Memoized()
+    obj.compute(1)
+    obj.compute(2)
+    obj.compute(3)
+    assert obj.compute.cache_size() == 2
+
+    obj.compute(1)
+    assert obj.calls == 4
+
+    obj.compute.cache_clear()
+    assert obj.compute.cache_size() == 0
+    obj.compute(1)
+    assert obj.calls == 5
+
+
+def test_lru_cache_discards_least_recently_used_item():
+    lru = LRUCache(maxsize=2)
+    lru["a"] = 1
+    lru["b"] = 2
+    lru["a"]
+    lru["c"] = 3
+    assert list(lru.keys()) == ["a", "c"]
 
 
-def test_cache_returns_same_object_when_called_twice_with_same_args():
-    func = cache(lambda x: object())
-    obj1 = func(42)
-    obj2 = func(42)
-    assert id(obj1) == id(obj2)
+def test_option_sets_are_interned():
+    options = OptionSet.intern({"cores": 1, "memory": "1g"})
+    assert OptionSet.intern({"memory": "1g", "cores": 1}) is options
+    assert OptionSet.intern(options) is options
+    assert OptionSet.intern({"cores": True, "memory": "1g"}) is not options
+    assert options == {"cores": 1, "memory": "1g"}
+    assert hash(options) == hash(OptionSet.intern(dict(options)))
 
 
-def test_cache_does_not_return_same_object_when_called_with_diff_args():
-    func = cache(lambda x: object())
-    obj1 = func(42)
-    obj2 = func(43)
-    assert id(obj1) != id(obj2)
+def test_option_sets_with_values_of_different_types_are_not_equal():
+    options = OptionSet.intern({"cores": 1})
+    assert options != OptionSet.intern({"cores": True})
+    assert options != OptionSet.intern({"cores": 1.0})
+    assert options != {"cores": True}
+    assert options == {"cores": 1}
+    assert OptionSet.intern({"constraint": ["a"]}) == {"constraint": ["a"]}
+
+
+def test_option_set_modifications_return_new_option_sets():
+    options = OptionSet.intern({"cores": 1, "memory": "1g"})
+    merged = options.merge({"cores": 4})
+    assert merged == {"cores": 4, "memory": "1g"}
+    assert options == {"cores": 1, "memory": "1g"}
+    assert options.merge({"cores": 4}) is merged
+    assert options.set("cores", 4) is merged
+    assert options.remove("memory") == {"cores": 1}
+    assert options.merge({}) is options
+
+
+def test_option_set_with_unhashable_values():
+    options = OptionSet.intern({"constraint": ["a", "b"]})
+    assert not options.is_hashable
+    with pytest.raises(TypeError):
+        hash(options)
+    assert options.merge({"cores": 2}) == {"constraint": ["a", "b"], "cores": 2}
+
+
+def test_option_set_is_interned_when_unpickled():
+    options = OptionSet.intern({"cores": 1})
+    assert pickle.loads(pickle.dumps(options)) is options
 
 
 @pytest.mark.parametrize(
@@ -117,3 +198,15 @@ def test_retry_4(mocker, no_sleep):
 
     assert wrapped_func() == 42
     assert len(succeeding_func.call_args_list) == 1
+
+
+def test_retry_does_not_retry_ignored_exceptions(mocker, no_sleep):
+    failing_func = mocker.Mock(side_effect=[KeyError, 42])
+    failing_func.__name__ = "failing_func"
+
+    retry_func = retry(on_exc=LookupError, max_retries=5, ignore=KeyError)
+    wrapped_func = retry_func(failing_func)
+
+    with pytest.raises(KeyError):
+        wrapped_func()
+    assert len(failing_func.call_args_list) == 1
@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import Mock, patch
 
-from gwf import AnonymousTarget, Workflow
+from gwf import AnonymousTarget, SpecTemplate, Workflow
 from gwf.exceptions import TypeError, WorkflowError
 
 
@@ -287,6 +287,43 @@ def test_map_naming_with_template_function():
     assert "my_template_2" in workflow.targets
 
 
+def test_map_targets_share_option_sets():
+    def my_template(path):
+        return AnonymousTarget(
+            inputs=[path], outputs=[path + ".new"], options={"cores": 2}
+        )
+
+    workflow = Workflow(working_dir="/some/dir", defaults={"memory": "4g"})
+    targets = workflow.map(my_template, ["a", "b", "c"])
+    option_sets = set(id(target.option_set) for target in targets)
+    assert len(option_sets) == 1
+    assert targets[0].options == {"cores": 2, "memory": "4g"}
+
+
+def test_target_from_template_keeps_spec_template_unrendered():
+    template = AnonymousTarget(
+        inputs=[], outputs=[], options={}, spec=SpecTemplate("echo {}", "hello")
+    )
+    workflow = Workflow(working_dir="/some/dir")
+    target = workflow.target_from_template("TestTarget", template)
+    assert target.raw_spec is template.raw_spec
+    assert target.spec == "echo hello"
+
+
+def test_modifying_target_options_does_not_affect_other_targets():
+    workflow = Workflow(working_dir="/some/dir", defaults={"cores": 1})
+    target1 = workflow.target("TestTarget1", inputs=[], outputs=[])
+    target2 = workflow.target("TestTarget2", inputs=[], outputs=[])
+    assert target1.option_set is target2.option_set
+
+    target1.options["cores"] = 8
+    assert target1.options == {"cores": 8}
+    assert target2.options == {"cores": 1}
+
+    del target1.options["cores"]
+    assert target1.options == {}
+
+
 def test_map_naming_with_template_class_instance():
     class MyTemplate:
         def __call__(self, path):